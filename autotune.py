@@ -0,0 +1,246 @@
+import os
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+from typing import Dict, List, Optional, Tuple
+
+from benchmark import BenchmarkError, benchmark_binary
+from build_cache import BuildCache, EXE_SUFFIX, copy_atomic, file_hash, source_hash
+from process_metrics import run_measured
+from trace_generator import write_track
+
+CPP_COMPILER = "g++"
+STANDARD_FLAGS = ["-std=c++17"]
+BASELINE_FLAGS = STANDARD_FLAGS + ["-O2"]  # command-line default; main.py passes its own COMPILE_FLAGS
+# (name, compiler flags, profile-guided); the PGO variant is built in two steps from a training run
+VARIANTS: List[Tuple[str, List[str], bool]] = [
+    ("O3", STANDARD_FLAGS + ["-O3"], False),
+    ("O3-native", STANDARD_FLAGS + ["-O3", "-march=native"], False),
+    ("O3-lto", STANDARD_FLAGS + ["-O3", "-flto"], False),
+    ("O3-native-lto", STANDARD_FLAGS + ["-O3", "-march=native", "-flto"], False),
+    ("O3-fast-math", STANDARD_FLAGS + ["-O3", "-ffast-math"], False),
+    ("O3-native-pgo", STANDARD_FLAGS + ["-O3", "-march=native"], True),
+]
+TRACE_POINTS = 500000  # per generated benchmark trace
+TRACE_PROFILES = ["city", "highway"]
+# PGO trains on its own trace; training on a benchmarked one would overstate the PGO variant
+TRAINING_POINTS = 200000
+TRAINING_PROFILE = "mixed"
+TRAINING_SEED = 1000
+RUNS = 5
+WARMUP = 1
+RUN_TIMEOUT = 60  # seconds per run
+
+
+def generate_traces(directory: str, points: int, profiles: List[str], seed: int = 0) -> List[str]:
+    """Large synthetic traces to benchmark and check variants on; existing ones are reused"""
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for index, profile in enumerate(profiles):
+        path = os.path.join(directory, f"autotune_{profile}_{points}_{seed + index}.json")
+        if not os.path.exists(path):
+            write_track(path, points, seed=seed + index, profile=profile)
+        paths.append(path)
+    return paths
+
+
+def harness_args(harness: Optional[str]) -> List[str]:
+    """Include directory and source of the I/O harness a correct_points() candidate is built with"""
+    if harness is None:
+        return []
+    harness = os.path.abspath(harness)
+    return ["-I", os.path.dirname(harness), harness]
+
+
+def compile_source(source_file: str, flags: List[str], output: str, harness: Optional[str] = None) -> Optional[str]:
+    """Compile source_file to output; returns the compiler diagnostics on failure"""
+    result = subprocess.run([CPP_COMPILER, *flags, source_file, *harness_args(harness),
+                             "-o", output], capture_output=True, text=True)
+    return result.stderr if result.returncode != 0 else None
+
+
+def build_variant(code: str, flags: List[str], pgo: bool, training_file: str, work_dir: str,
+                  build_cache: BuildCache, harness: Optional[str] = None) -> Tuple[Optional[str], Optional[str]]:
+    """(binary, error) for one variant, through the build cache.
+
+    Profile-guided builds compile an instrumented binary, run it on the
+    training trace, then recompile with the profile. GCC names profile files
+    after the source and output paths, so both steps use the same ones. A
+    harness source is compiled with the same flags as the candidate.
+    """
+    key_flags = flags + ([f"-fprofile-use:{file_hash(training_file)}"] if pgo else [])
+    if harness is not None:
+        key_flags.append(f"harness:{file_hash(harness)}:{file_hash(os.path.splitext(harness)[0] + '.h')}")
+    build_key = source_hash(code, CPP_COMPILER, key_flags)
+    with build_cache.lock(build_key):
+        cached_binary = build_cache.get_binary(build_key)
+        if cached_binary:
+            return cached_binary, None
+        cached_error = build_cache.get_compile_error(build_key)
+        if cached_error is not None:
+            return None, cached_error
+
+        source_file = os.path.join(work_dir, f"tune_{build_key[:16]}.cpp")
+        output = os.path.join(work_dir, f"tune_{build_key[:16]}{EXE_SUFFIX}")
+        with open(source_file, "w", encoding="utf-8") as f:
+            f.write(code)
+
+        error = None
+        if pgo:
+            profile_dir = os.path.abspath(os.path.join(work_dir, f"profile_{build_key[:16]}"))
+            error = compile_source(source_file, flags + [f"-fprofile-generate={profile_dir}"], output, harness)
+            if error is None:
+                with open(training_file, "rb") as stdin:
+                    training = subprocess.run([output], stdin=stdin, stdout=subprocess.DEVNULL,
+                                              stderr=subprocess.PIPE, timeout=RUN_TIMEOUT)
+                if training.returncode != 0:
+                    error = (f"Training run failed ({training.returncode}): "
+                             f"{training.stderr.decode('utf-8', errors='replace')}")
+            if error is None:
+                error = compile_source(source_file, flags + [f"-fprofile-use={profile_dir}",
+                                                             "-fprofile-correction"], output, harness)
+            shutil.rmtree(profile_dir, ignore_errors=True)
+        else:
+            error = compile_source(source_file, flags, output, harness)
+        os.remove(source_file)
+
+        if error is not None:
+            build_cache.put_compile_error(build_key, error)
+            return None, error
+        binary = build_cache.put_binary(build_key, output)
+        os.remove(output)
+        return binary, None
+
+
+def run_output(binary: str, input_file: str) -> bytes:
+    """Complete stdout of one run on input_file; raises on a failed run"""
+    with open(input_file, "rb") as f:
+        input_data = f.read()
+    returncode, stdout, stderr, _ = run_measured([binary], input_data, timeout=RUN_TIMEOUT)
+    if returncode != 0:
+        raise RuntimeError(f"{binary} failed on {input_file} ({returncode}): "
+                           f"{stderr.decode('utf-8', errors='replace')[:300]}")
+    return stdout
+
+
+def autotune(code: str, traces: List[str], check_files: List[str], work_dir: str, build_cache: BuildCache,
+             runs: int = RUNS, warmup: int = WARMUP, runner: Optional[str] = None,
+             harness: Optional[str] = None, baseline_flags: List[str] = BASELINE_FLAGS) -> Dict:
+    """Rebuild a candidate with every variant and benchmark those whose output matches the baseline.
+
+    The baseline is the build with baseline_flags, the flags candidates were
+    evaluated with. Output on the benchmark traces and on check_files must be
+    byte-identical to it; that is also the accuracy check that keeps
+    -ffast-math from changing any verdict or interpolated coordinate. The
+    fastest identical variant (total median over the traces) is reported as
+    "best". Profile-guided builds train on a separate generated trace that
+    is never benchmarked. With harness set, code is a correct_points()
+    candidate linked against that harness source.
+    """
+    os.makedirs(work_dir, exist_ok=True)
+    training_file = generate_traces(work_dir, TRAINING_POINTS, [TRAINING_PROFILE], seed=TRAINING_SEED)[0]
+    baseline_binary, error = build_variant(code, baseline_flags, False, training_file, work_dir, build_cache,
+                                            harness)
+    if baseline_binary is None:
+        return {"error": f"Baseline build failed: {error[:500]}"}
+    expected = {path: run_output(baseline_binary, path) for path in check_files + traces}
+    inputs = {}
+    for path in traces:
+        with open(path, "rb") as f:
+            inputs[path] = f.read()
+
+    variants = []
+    for name, flags, pgo in [("baseline", baseline_flags, False)] + VARIANTS:
+        variant = {"name": name, "flags": flags, "pgo": pgo, "status": "ok"}
+        variants.append(variant)
+        build_start = time.perf_counter()
+        binary, error = build_variant(code, flags, pgo, training_file, work_dir, build_cache, harness)
+        variant["build_time"] = time.perf_counter() - build_start
+        if binary is None:
+            variant.update(status="build failed", error=error[:500])
+            continue
+        variant["binary"] = binary
+
+        try:
+            mismatches = [os.path.basename(path) for path, output in expected.items()
+                          if run_output(binary, path) != output]
+        except Exception as e:
+            variant.update(status="run failed", error=str(e))
+            continue
+        if mismatches:
+            variant.update(status="output differs", error=f"Output differs from the baseline on {', '.join(mismatches)}")
+            continue
+
+        try:
+            benchmarks = {os.path.basename(path): benchmark_binary([binary], data, runs, warmup, RUN_TIMEOUT,
+                                                                   runner=runner)
+                          for path, data in inputs.items()}
+        except BenchmarkError as e:
+            variant.update(status="benchmark failed", error=str(e))
+            continue
+        variant["benchmarks"] = benchmarks
+        variant["median"] = sum(benchmark["median"] for benchmark in benchmarks.values())
+
+    timed = [variant for variant in variants if "median" in variant]
+    report = {"baseline": "baseline", "traces": [os.path.basename(path) for path in traces],
+              "training_trace": os.path.basename(training_file), "variants": variants, "best": None}
+    if timed:
+        best = min(timed, key=lambda variant: variant["median"])
+        baseline = next((variant for variant in timed if variant["name"] == report["baseline"]), None)
+        report["best"] = {"name": best["name"], "flags": best["flags"], "binary": best["binary"],
+                          "median": best["median"],
+                          "speedup": baseline["median"] / best["median"] if baseline and best["median"] else None}
+    return report
+
+
+def print_report(report: Dict):
+    if "error" in report:
+        print(f"Autotuning skipped: {report['error']}")
+        return
+    print(f"{'variant':>15} {'build':>8} {'median':>9}  status")
+    for variant in report["variants"]:
+        median = f"{variant['median']:.4f}s" if "median" in variant else "-"
+        print(f"{variant['name']:>15} {variant['build_time']:>7.2f}s {median:>9}  {variant['status']}")
+    best = report["best"]
+    if best:
+        speedup = f" ({best['speedup']:.2f}x over {report['baseline']})" if best["speedup"] else ""
+        print(f"Fastest: {best['name']} [{' '.join(best['flags'])}]{speedup}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild a C++ candidate with several compiler configurations "
+                                                 "and keep the fastest one whose output matches -O2")
+    parser.add_argument("source", nargs="?", default="best_algorithm.cpp")
+    parser.add_argument("--check", nargs="*", default=["points.json", "points2.json", "points3.json"],
+                        help="Extra input files whose output must match the baseline")
+    parser.add_argument("--points", type=int, default=TRACE_POINTS, help="Points per generated benchmark trace")
+    parser.add_argument("--runs", type=int, default=RUNS)
+    parser.add_argument("--warmup", type=int, default=WARMUP)
+    parser.add_argument("--work-dir", default=os.path.join(tempfile.gettempdir(), "gps_autotune"))
+    parser.add_argument("--build-cache", default="build_cache")
+    parser.add_argument("--harness", help="Link a correct_points() candidate against this harness source "
+                                          "(e.g. harness.cpp)")
+    parser.add_argument("--output", default=f"best_algorithm_tuned{EXE_SUFFIX}",
+                        help="Where to copy the fastest binary")
+    parser.add_argument("--report", help="Write the full autotuning report to this JSON file")
+    args = parser.parse_args()
+
+    with open(args.source, "r", encoding="utf-8") as f:
+        code = f.read()
+    traces = generate_traces(args.work_dir, args.points, TRACE_PROFILES)
+    report = autotune(code, traces, [path for path in args.check if os.path.exists(path)], args.work_dir,
+                      BuildCache(args.build_cache).create(), args.runs, args.warmup, harness=args.harness)
+    print_report(report)
+    if report.get("best"):
+        copy_atomic(report["best"]["binary"], args.output)
+        print(f"Binary saved to: {args.output}")
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
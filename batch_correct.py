@@ -0,0 +1,213 @@
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+import subprocess
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, List, Optional, Tuple
+
+from build_cache import BuildCache, EXE_SUFFIX, source_hash
+from trace_format import MAGIC, BINARY_FLAG, decode_points, encode_points
+from track_buffer import TrackBuffer
+from worker_pool import PROBE_REQUEST, WorkerPool, supports_persistent
+
+TRACE_EXTENSIONS = (".json", ".gpst")
+CPP_COMPILER = "g++"
+COMPILE_FLAGS = ["-std=c++17", "-O2"]  # as in main.py, so the build cache is shared
+RUN_TIMEOUT = 60  # seconds per file
+PROGRESS_INTERVAL = 1.0  # seconds between progress lines
+
+# Per-process engine state, set up by init_worker
+_engine: Dict = {}
+
+
+def find_traces(source: str) -> Tuple[str, List[str]]:
+    """Root directory and trace files for a directory (searched recursively) or a glob pattern"""
+    if os.path.isdir(source):
+        root = source
+        files = [os.path.join(directory, name) for directory, _, names in os.walk(source) for name in names]
+    else:
+        files = [path for path in glob.glob(source, recursive=True) if os.path.isfile(path)]
+        root = os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in files]) if files else "."
+    # Ground-truth files written by trace_generator.py sit next to the traces
+    files = [path for path in files if path.endswith(TRACE_EXTENSIONS) and not path.endswith(".labels.json")]
+    return root, sorted(files)
+
+
+def output_path(root: str, input_file: str, output_dir: str) -> str:
+    """Mirror of input_file's location under root, inside output_dir"""
+    return os.path.join(output_dir, os.path.relpath(os.path.abspath(input_file), os.path.abspath(root)))
+
+
+def is_done(input_file: str, output_file: str) -> bool:
+    """A non-empty output at least as new as its input was completed by an earlier batch"""
+    return (os.path.exists(output_file) and os.path.getsize(output_file) > 0 and
+            os.path.getmtime(output_file) >= os.path.getmtime(input_file))
+
+
+def build_binary(source_file: str, cache_dir: str) -> str:
+    """Compile a C++ source through the build cache and return the cached binary"""
+    with open(source_file, "r", encoding="utf-8") as f:
+        source = f.read()
+    build_cache = BuildCache(cache_dir).create()
+    build_key = source_hash(source, CPP_COMPILER, COMPILE_FLAGS)
+    cached_binary = build_cache.get_binary(build_key)
+    if cached_binary:
+        return cached_binary
+
+    build_output = os.path.join(cache_dir, f"batch_{build_key[:16]}_{os.getpid()}{EXE_SUFFIX}")
+    compile_result = subprocess.run([CPP_COMPILER, *COMPILE_FLAGS, source_file, "-o", build_output],
+                                    capture_output=True, text=True)
+    if compile_result.returncode != 0:
+        raise RuntimeError(f"Compilation of {source_file} failed:\n{compile_result.stderr}")
+    binary = build_cache.put_binary(build_key, build_output)
+    os.remove(build_output)
+    return binary
+
+
+def init_worker(engine: str, binary: Optional[str], persistent: Dict[str, bool]):
+    _engine.update(engine=engine, binary=binary, persistent=persistent, pools={})
+
+
+def binary_pool(binary_io: bool) -> WorkerPool:
+    """This process's worker pool for the binary engine, one per I/O format"""
+    pools = _engine["pools"]
+    if binary_io not in pools:
+        command = [_engine["binary"], BINARY_FLAG] if binary_io else [_engine["binary"]]
+        pools[binary_io] = WorkerPool(command, 1, timeout=RUN_TIMEOUT,
+                                      persistent=_engine["persistent"]["binary" if binary_io else "json"])
+    return pools[binary_io]
+
+
+def correct_file(input_file: str, output_file: str) -> Dict:
+    """Correct one trace file into output_file; failures are returned, never raised"""
+    start = time.perf_counter()
+    outcome = {"file": input_file, "status": "ok", "points": 0, "error": None}
+    partial_file = output_file + ".partial"
+    try:
+        with open(input_file, "rb") as f:
+            data = f.read()
+        binary_io = data.startswith(MAGIC)
+
+        if _engine["engine"] == "python":
+            from detector import correct_points, format_points
+            points = decode_points(data) if binary_io else json.loads(data)
+            corrected = correct_points(points)
+            output = encode_points(corrected) if binary_io else format_points(corrected).encode("utf-8")
+        else:
+            output = binary_pool(binary_io).process(data)
+            # Columnar buffers only count and validate; binary traces are viewed without copying
+            load = TrackBuffer.from_binary if binary_io else TrackBuffer.from_json_bytes
+            points = load(data)
+            corrected = load(output)
+            if len(corrected) != len(points):
+                raise ValueError(f"Output holds {len(corrected)} points, input {len(points)}")
+
+        os.makedirs(os.path.dirname(output_file) or ".", exist_ok=True)
+        with open(partial_file, "wb") as f:
+            f.write(output)
+        # Only complete outputs ever carry the final name, so later batches can skip them safely
+        os.replace(partial_file, output_file)
+        outcome["points"] = len(points)
+    except Exception as e:
+        # Any failure is confined to this file; the batch carries on
+        if os.path.exists(partial_file):
+            os.remove(partial_file)
+        outcome["status"] = "failed"
+        outcome["error"] = f"{type(e).__name__}: {str(e)[:300]}"
+    outcome["seconds"] = time.perf_counter() - start
+    return outcome
+
+
+def run_batch(jobs: List[Tuple[str, str]], engine: str, binary: Optional[str], workers: int) -> Dict:
+    """Correct every (input, output) job across worker processes, reporting progress"""
+    persistent = {}
+    if engine == "binary":
+        # Probe once here instead of once per worker process
+        persistent["json"] = supports_persistent([binary], PROBE_REQUEST)
+        persistent["binary"] = supports_persistent([binary, BINARY_FLAG], encode_points([]))
+
+    stats = {"files": len(jobs), "done": 0, "failed": [], "points": 0}
+    start = last_report = time.perf_counter()
+
+    def report(final: bool = False):
+        elapsed = max(time.perf_counter() - start, 1e-9)
+        completed = stats["done"] + len(stats["failed"])
+        print(f"[{completed}/{stats['files']}] {stats['done'] / elapsed:.1f} files/s, "
+              f"{stats['points'] / elapsed:,.0f} points/s, {len(stats['failed'])} failed"
+              + (f" in {elapsed:.1f}s" if final else ""), flush=True)
+
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                   initializer=init_worker, initargs=(engine, binary, persistent))
+    with executor:
+        pending = set()
+        next_job = 0
+        while next_job < len(jobs) or pending:
+            # Bounded submission keeps memory flat for very large fleets
+            while next_job < len(jobs) and len(pending) < 4 * workers:
+                pending.add(executor.submit(correct_file, *jobs[next_job]))
+                next_job += 1
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                outcome = future.result()
+                if outcome["status"] == "ok":
+                    stats["done"] += 1
+                    stats["points"] += outcome["points"]
+                else:
+                    stats["failed"].append(outcome)
+                    print(f"FAILED {outcome['file']}: {outcome['error']}", flush=True)
+            if time.perf_counter() - last_report >= PROGRESS_INTERVAL:
+                report()
+                last_report = time.perf_counter()
+
+    stats["seconds"] = time.perf_counter() - start
+    stats["files_per_second"] = stats["done"] / stats["seconds"] if stats["seconds"] else 0.0
+    stats["points_per_second"] = stats["points"] / stats["seconds"] if stats["seconds"] else 0.0
+    report(final=True)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Correct a fleet of GPS trace files with the chosen algorithm")
+    parser.add_argument("source", help="Directory of trace files (searched recursively) or a glob pattern")
+    parser.add_argument("output_dir", help="Corrected files are written here, mirroring the source tree")
+    parser.add_argument("--engine", choices=["binary", "python"], default="binary",
+                        help="Compiled candidate, or the in-process NumPy detector")
+    parser.add_argument("--source-file", default="best_algorithm.cpp",
+                        help="C++ source to build for the binary engine")
+    parser.add_argument("--binary", help="Prebuilt binary for the binary engine (skips the build)")
+    parser.add_argument("--build-cache", default="build_cache")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--force", action="store_true", help="Also redo files whose output is up to date")
+    parser.add_argument("--report", help="Write the batch statistics and failures to this JSON file")
+    args = parser.parse_args()
+
+    root, files = find_traces(args.source)
+    output_root = os.path.abspath(args.output_dir) + os.sep
+    files = [path for path in files if not os.path.abspath(path).startswith(output_root)]
+    if not files:
+        parser.error(f"No trace files found in {args.source}")
+    jobs = [(path, output_path(root, path, args.output_dir)) for path in files]
+    pending_jobs = jobs if args.force else [job for job in jobs if not is_done(*job)]
+    print(f"{len(files)} trace files, {len(files) - len(pending_jobs)} already done")
+
+    binary = None
+    if args.engine == "binary":
+        binary = os.path.abspath(args.binary or build_binary(args.source_file, args.build_cache))
+        print(f"Engine: {binary}")
+    else:
+        print("Engine: detector.py")
+
+    stats = run_batch(pending_jobs, args.engine, binary, max(1, args.workers))
+    stats["skipped"] = len(jobs) - len(pending_jobs)
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(stats, f, indent=2)
+    sys.exit(1 if stats["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import time
+import argparse
+import statistics
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from distance import equirectangular_segments, haversine_segments, threshold_distances
+from scoring import MAX_SPEED
+from trace_generator import SPEED_PROFILES, generate_track
+
+
+def generated_arrays(points: int, seed: int, profile: str):
+    """lat/lon/time arrays of a synthetic track"""
+    lat = np.empty(points)
+    lon = np.empty(points)
+    times = np.empty(points)
+    for index, (point, _) in enumerate(generate_track(points, seed=seed, profile=profile)):
+        lat[index], lon[index], times[index] = point["lat"], point["lon"], point["time"]
+    return lat, lon, times
+
+
+def median_time(func: Callable, repeat: int) -> float:
+    """Median wall time of repeat calls"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def bench_trace(points: int, seed: int, profile: str, repeat: int) -> Dict:
+    """Time exact, approximate and threshold-safe distances on one trace and check the verdicts agree"""
+    lat, lon, times = generated_arrays(points, seed, profile)
+    time_diff = np.diff(times)
+    limits = MAX_SPEED * time_diff
+
+    exact = haversine_segments(lat, lon)
+    approx = equirectangular_segments(lat, lon)
+    safe = threshold_distances(lat, lon, limits)
+    moving = exact > 1.0  # relative error is meaningless on sub-metre noise
+
+    # The scorer only compares distances with the limits; check that on a
+    # perturbed copy too, so violations and near-threshold segments occur
+    forward = time_diff > 0
+    verdicts_match = True
+    for check_lat in (lat, lat + np.where(np.arange(points) % 97 == 0, 3000, 0)):
+        check_exact = haversine_segments(check_lat, lon)
+        check_safe = threshold_distances(check_lat, lon, limits)
+        verdicts_match &= bool(np.array_equal(check_safe[forward] > limits[forward],
+                                              check_exact[forward] > limits[forward]))
+
+    return {
+        "points": points,
+        "profile": profile,
+        "haversine": median_time(lambda: haversine_segments(lat, lon), repeat),
+        "equirectangular": median_time(lambda: equirectangular_segments(lat, lon), repeat),
+        "threshold_safe": median_time(lambda: threshold_distances(lat, lon, limits), repeat),
+        "max_rel_error": float(np.max(np.abs(approx[moving] - exact[moving]) / exact[moving])) if moving.any() else 0.0,
+        "exact_fallbacks": int(np.count_nonzero(safe != approx)),
+        "verdicts_match": verdicts_match
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the approximate distance kernel against haversine")
+    parser.add_argument("--points", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--profiles", nargs="+", choices=sorted(SPEED_PROFILES), default=["city", "highway"])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    results: List[Dict] = []
+    print(f"{'points':>9} {'profile':>8} {'haversine':>10} {'approx':>10} {'safe':>10} "
+          f"{'speed-up':>8} {'max err':>9} {'exact':>6} verdicts")
+    for points in args.points:
+        for profile in args.profiles:
+            result = bench_trace(points, args.seed, profile, args.repeat)
+            results.append(result)
+            print(f"{points:>9} {profile:>8} {result['haversine'] * 1e3:>8.2f}ms "
+                  f"{result['equirectangular'] * 1e3:>8.2f}ms {result['threshold_safe'] * 1e3:>8.2f}ms "
+                  f"{result['haversine'] / result['threshold_safe']:>7.2f}x {result['max_rel_error']:>9.2e} "
+                  f"{result['exact_fallbacks']:>6} {'match' if result['verdicts_match'] else 'DIFFER'}")
+    if not all(result["verdicts_match"] for result in results):
+        raise SystemExit("Approximate verdicts differ from haversine")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+import os
+import sys
+import json
+import time
+import timeit
+import platform
+import argparse
+import statistics
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from main import analyze_results, sanitize_code, validate_code_structure, validate_json_output
+from scoring import analyze_results_batch, calculate_distance
+from detector import correct_points, format_points
+from trace_generator import generate_track
+from track_buffer import TrackBuffer
+
+SIZES = [1000, 10000, 100000, 1000000]
+BASELINE_FILE = "bench_baseline.json"
+THRESHOLD = 0.25  # fail when a benchmark is this much slower than its baseline
+SAMPLES = 5
+RECHECKS = 3  # fresh processes timing a benchmark over its limit before it counts as a regression
+BASELINE_RUNS = 3  # processes a baseline is the median of, as speed varies from one process to the next
+MIN_SAMPLE_TIME = 0.05  # seconds; fast functions are called repeatedly within one sample
+CALIBRATION = "sum(i * i for i in range(200000))"  # fixed pure-Python workload
+PROFILE = "mixed"
+CODE_FILE = "best_algorithm.cpp"
+
+
+def calibration_time(repeat: int = 3) -> float:
+    """Seconds of one run of the calibration workload, the fastest of repeat runs"""
+    return min(timeit.repeat(CALIBRATION, number=1, repeat=repeat))
+
+
+def time_call(func: Callable, samples: int = SAMPLES, min_time: float = MIN_SAMPLE_TIME) -> Tuple[float, float]:
+    """Fastest seconds per call over samples, and fastest ratio of a sample to the calibration workload.
+
+    Each sample is long enough to be measured reliably and follows a
+    calibration run. On a shared machine speed drifts by tens of percent
+    between runs; the ratio to the calibration timed just before cancels most
+    of that drift, so it is what gets compared with the baseline. The minimum
+    is the least disturbed by other load, which only ever adds time.
+    """
+    timer = timeit.Timer(func)
+    number = 1
+    elapsed = timer.timeit(number)
+    while elapsed < min_time:
+        number = max(number * 2, int(number * min_time / max(elapsed, 1e-9)))
+        elapsed = timer.timeit(number)
+    seconds, relative = [], []
+    for _ in range(samples):
+        calibration = calibration_time()
+        seconds.append(timer.timeit(number) / number)
+        relative.append(seconds[-1] / calibration)
+    return min(seconds), min(relative)
+
+
+def trace_benchmarks(track: List[Dict]) -> Dict[str, Callable]:
+    """Benchmarks over one generated trace and its correction by the reference detector"""
+    corrected = correct_points(track)
+    output = format_points(corrected)
+    output_bytes = output.encode("utf-8")
+    pairs = list(zip(track, track[1:]))
+    return {
+        "calculate_distance": lambda: [calculate_distance(a["lat"], a["lon"], b["lat"], b["lon"]) for a, b in pairs],
+        "analyze_results": lambda: analyze_results(track, corrected),
+        "analyze_results_batch": lambda: analyze_results_batch(track, corrected),
+        "validate_json_output": lambda: validate_json_output(output),
+        "TrackBuffer.from_json_bytes": lambda: TrackBuffer.from_json_bytes(output_bytes),
+    }
+
+
+def code_benchmarks(code: str) -> Dict[str, Callable]:
+    """Benchmarks of the code checks on a typical completion and on one near MAX_CODE_LENGTH"""
+    completion = f"Here is the improved algorithm:\n```cpp\n{code}\n```\nIt interpolates spikes."
+    long_code = (code * (15000 // len(code) + 1))[:15000]
+    return {
+        "sanitize_code": lambda: sanitize_code(completion),
+        "validate_code_structure": lambda: validate_code_structure(code),
+        "validate_code_structure[long]": lambda: validate_code_structure(long_code),
+    }
+
+
+def run_suite(sizes: List[int], samples: int, only: Optional[List[str]] = None) -> Dict[str, Tuple[float, float]]:
+    """time_call() of every benchmark, keyed "name[points]" for trace benchmarks"""
+    def selected(name: str) -> bool:
+        return not only or any(pattern in name for pattern in only)
+
+    results = {}
+    with open(CODE_FILE, "r", encoding="utf-8") as f:
+        code = f.read()
+    for name, func in code_benchmarks(code).items():
+        if selected(name):
+            results[name] = time_call(func, samples)
+            print(f"{name:>42} {results[name][0] * 1e6:>12.1f}us")
+
+    # Smaller traces are prefixes of the largest one, which is generated once
+    start = time.perf_counter()
+    full_track = [point for point, _ in generate_track(max(sizes), seed=0, profile=PROFILE)]
+    print(f"Generated a {len(full_track)}-point {PROFILE} trace in {time.perf_counter() - start:.1f}s")
+    for size in sorted(sizes):
+        for name, func in trace_benchmarks(full_track[:size]).items():
+            key = f"{name}[{size}]"
+            if selected(key):
+                results[key] = time_call(func, samples)
+                print(f"{key:>42} {results[key][0] * 1e3:>12.3f}ms")
+    return results
+
+
+def time_benchmark(name: str, samples: int) -> Tuple[float, float]:
+    """time_call() of a single benchmark, building only the inputs it needs"""
+    base, _, size = name.partition("[")
+    if size[:-1].isdigit():
+        # The same trace as the prefix run_suite() takes, since generation is sequential
+        track = [point for point, _ in generate_track(int(size[:-1]), seed=0, profile=PROFILE)]
+        return time_call(trace_benchmarks(track)[base], samples)
+    with open(CODE_FILE, "r", encoding="utf-8") as f:
+        return time_call(code_benchmarks(f.read())[name], samples)
+
+
+def recheck(results: Dict[str, Tuple[float, float]], limits: Dict[str, float], samples: int):
+    """Time benchmarks over their limit again, each time in a new interpreter; keeps the fastest timings.
+
+    Besides other load on the machine, a benchmark's speed depends on the
+    process it runs in (memory layout, hash seed), which no number of samples
+    within one process averages out. A benchmark only counts as regressed if
+    it stays over its limit in RECHECKS fresh processes.
+    """
+    context = multiprocessing.get_context("spawn")
+    for name, (seconds, relative) in results.items():
+        for _ in range(RECHECKS):
+            if name not in limits or relative <= limits[name]:
+                break
+            print(f"{name:>42} over its limit, timing it again in a new process")
+            with ProcessPoolExecutor(1, mp_context=context) as executor:
+                again = executor.submit(time_benchmark, name, max(samples, SAMPLES)).result()
+            seconds, relative = min(seconds, again[0]), min(relative, again[1])
+        results[name] = seconds, relative
+
+
+def compare(results: Dict[str, Tuple[float, float]], baseline: Dict, threshold: float) -> List[Dict]:
+    """Rows per benchmark with the ratio of its relative time to the baseline's"""
+    rows = []
+    for name, (seconds, relative) in results.items():
+        reference = baseline["relative"].get(name)
+        row = {"name": name, "seconds": seconds, "baseline": baseline["results"].get(name),
+               "ratio": None, "status": "new"}
+        if reference:
+            row["ratio"] = relative / reference
+            row["status"] = "REGRESSION" if row["ratio"] > 1 + threshold else "ok"
+        rows.append(row)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmarks of the Python harness hot paths, "
+                                                 "checked against a baseline")
+    parser.add_argument("--points", type=int, nargs="+", default=SIZES, help="Trace sizes to benchmark")
+    parser.add_argument("--samples", type=int, default=SAMPLES)
+    parser.add_argument("--only", nargs="+", help="Run benchmarks whose name contains any of these")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help="Allowed slowdown against the baseline, as a fraction (0.25 = 25%%)")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="Record these timings as the new baseline instead of comparing")
+    args = parser.parse_args()
+
+    if args.update_baseline:
+        runs = []
+        for run in range(BASELINE_RUNS):
+            print(f"Baseline run {run + 1} of {BASELINE_RUNS}")
+            with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context("spawn")) as executor:
+                runs.append(executor.submit(run_suite, args.points, args.samples, args.only).result())
+        results = {name: statistics.median(timings[name][0] for timings in runs) for name in runs[0]}
+        relative = {name: statistics.median(timings[name][1] for timings in runs) for name in runs[0]}
+        baseline = {"python": platform.python_version(), "machine": platform.machine(),
+                    "results": results, "relative": relative}
+        if os.path.exists(args.baseline) and args.only:
+            # A partial run only replaces the benchmarks it ran
+            with open(args.baseline, "r", encoding="utf-8") as f:
+                previous = json.load(f)
+            baseline = {**previous, "results": {**previous["results"], **results},
+                        "relative": {**previous.get("relative", {}), **relative}}
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Baseline written to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        sys.exit(f"No baseline at {args.baseline}; create one with --update-baseline")
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    if "relative" not in baseline:
+        sys.exit(f"{args.baseline} predates calibrated timings; record it again with --update-baseline")
+    if (baseline["machine"], baseline["python"]) != (platform.machine(), platform.python_version()):
+        print(f"Baseline recorded on {baseline['machine']} with Python {baseline['python']}; "
+              f"relative timings still shift across machines, so record one here with --update-baseline")
+    results = run_suite(args.points, args.samples, args.only)
+    recheck(results, {name: reference * (1 + args.threshold) for name, reference in baseline["relative"].items()},
+            args.samples)
+    rows = compare(results, baseline, args.threshold)
+
+    print(f"\nAgainst {args.baseline} (times relative to the calibration workload, threshold +{args.threshold:.0%}):")
+    for row in rows:
+        ratio = f"{row['ratio']:.2f}x" if row["ratio"] is not None else "-"
+        print(f"{row['name']:>42} {ratio:>7}  {row['status']}")
+    regressions = [row["name"] for row in rows if row["status"] == "REGRESSION"]
+    if regressions:
+        sys.exit(f"{len(regressions)} benchmark(s) regressed: {', '.join(regressions)}")
+
+
+if __name__ == "__main__":
+    main()
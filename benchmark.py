@@ -0,0 +1,80 @@
+import math
+import time
+import hashlib
+import statistics
+import subprocess
+from typing import List, Dict, Optional, Tuple
+
+from process_metrics import limit_error, run_measured
+
+
+class BenchmarkError(Exception):
+    """A benchmark run failed, reached a resource limit or wrote different output from the first run"""
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a non-empty sample"""
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def benchmark_binary(command: List[str], input_data: bytes, runs: int, warmup: int,
+                     timeout: float, memory_limit: Optional[int] = None,
+                     cpu_limit: Optional[float] = None, runner: Optional[str] = None) -> Dict:
+    """Run a candidate command repeatedly on the same input and summarise wall and CPU times.
+
+    Warmup runs are discarded. Wall time uses the monotonic perf_counter clock;
+    CPU user/sys time and peak RSS come from each reaped child's own rusage.
+    Every run, warmup included, must exit cleanly within the limits and write
+    the same output as the first; otherwise BenchmarkError is raised, so a
+    failed run never counts toward the statistics.
+    """
+    first_output = None
+
+    def measured_run() -> Tuple[float, Optional[Dict]]:
+        """(wall seconds, usage) of one checked run"""
+        nonlocal first_output
+        try:
+            start = time.perf_counter()
+            returncode, stdout, stderr, usage = run_measured(command, input_data, timeout, memory_limit, cpu_limit,
+                                                             runner=runner)
+            elapsed = time.perf_counter() - start
+        except subprocess.TimeoutExpired:
+            raise BenchmarkError(f"Run timed out ({timeout}s)")
+        exceeded = limit_error(returncode, stderr, usage, memory_limit, cpu_limit)
+        if exceeded:
+            raise BenchmarkError(f"RESOURCE LIMIT: {exceeded}")
+        if returncode != 0:
+            raise BenchmarkError(f"Run failed ({returncode}): {stderr.decode('utf-8', errors='replace')[:300]}")
+        output_hash = hashlib.sha256(stdout).digest()
+        if first_output is None:
+            first_output = output_hash
+        elif output_hash != first_output:
+            raise BenchmarkError("Output differs between runs")
+        return elapsed, usage
+
+    for _ in range(warmup):
+        measured_run()
+
+    wall, user, system, peak_rss = [], [], [], []
+    for _ in range(runs):
+        elapsed, usage = measured_run()
+        wall.append(elapsed)
+        if usage is not None:
+            user.append(usage["cpu_user"])
+            system.append(usage["cpu_sys"])
+            peak_rss.append(usage["peak_rss"])
+
+    return {
+        "runs": runs,
+        "warmup": warmup,
+        "median": statistics.median(wall),
+        "p95": percentile(wall, 95),
+        "mean": statistics.fmean(wall),
+        "stddev": statistics.stdev(wall) if runs > 1 else 0.0,
+        "min": min(wall),
+        "cpu_user": statistics.median(user) if user else None,
+        "cpu_sys": statistics.median(system) if system else None,
+        "peak_rss": max(peak_rss) if peak_rss else None
+    }
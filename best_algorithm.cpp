@@ -9,6 +9,12 @@
 #include <stdexcept>
 #include <limits>
 #include <cctype>
+#include <cstdint>
+#include <cstring>
+#ifdef _WIN32
+#include <io.h>
+#include <fcntl.h>
+#endif
 
 // Simple JSON parsing utilities (no external dependencies)
 struct GPSPoint {
@@ -119,6 +125,55 @@ bool parse_gps_array(const std::string& s, std::vector<GPSPoint>& points) {
     return pos == s.size();
 }
 
+// Binary trace format (selected with --binary): 16-byte header "GPST", uint16 version,
+// uint16 record size, uint64 count, then little-endian records of int32 lat, int32 lon, int64 time
+const char BINARY_MAGIC[4] = {'G', 'P', 'S', 'T'};
+const std::uint16_t BINARY_VERSION = 1;
+const std::uint16_t BINARY_RECORD_SIZE = 16;
+
+bool read_binary(std::istream& in, std::vector<GPSPoint>& points) {
+    char header[16];
+    if (!in.read(header, sizeof(header))) return false;
+    if (std::memcmp(header, BINARY_MAGIC, 4) != 0) return false;
+    std::uint16_t version, record_size;
+    std::uint64_t count;
+    std::memcpy(&version, header + 4, 2);
+    std::memcpy(&record_size, header + 6, 2);
+    std::memcpy(&count, header + 8, 8);
+    if (version != BINARY_VERSION || record_size != BINARY_RECORD_SIZE) return false;
+    points.reserve(count);
+    char record[16];
+    for (std::uint64_t i = 0; i < count; ++i) {
+        if (!in.read(record, sizeof(record))) return false;
+        std::int32_t lat, lon;
+        std::int64_t time;
+        std::memcpy(&lat, record, 4);
+        std::memcpy(&lon, record + 4, 4);
+        std::memcpy(&time, record + 8, 8);
+        points.push_back(GPSPoint{lat, lon, static_cast<int>(time)});
+    }
+    return true;
+}
+
+void output_binary(std::ostream& out, const std::vector<GPSPoint>& points) {
+    char header[16];
+    std::uint64_t count = points.size();
+    std::memcpy(header, BINARY_MAGIC, 4);
+    std::memcpy(header + 4, &BINARY_VERSION, 2);
+    std::memcpy(header + 6, &BINARY_RECORD_SIZE, 2);
+    std::memcpy(header + 8, &count, 8);
+    out.write(header, sizeof(header));
+    char record[16];
+    for (const GPSPoint& pt : points) {
+        std::int32_t lat = pt.lat, lon = pt.lon;
+        std::int64_t time = pt.time;
+        std::memcpy(record, &lat, 4);
+        std::memcpy(record + 4, &lon, 4);
+        std::memcpy(record + 8, &time, 8);
+        out.write(record, sizeof(record));
+    }
+}
+
 // Haversine formula to compute distance in meters between two lat/lon points (integers in microdegrees)
 double haversine(int lat1, int lon1, int lat2, int lon2) {
     // Convert to degrees
@@ -187,39 +242,91 @@ void correct_anomalies(std::vector<GPSPoint>& points, const std::vector<bool>& i
 }
 
 // Output JSON array in required format
-void output_json(const std::vector<GPSPoint>& points) {
-    std::cout << "[";
+void output_json(std::ostream& out, const std::vector<GPSPoint>& points) {
+    out << "[";
     for (size_t i = 0; i < points.size(); ++i) {
-        if (i) std::cout << ",";
-        std::cout << "{\"lat\":" << points[i].lat
+        if (i) out << ",";
+        out << "{\"lat\":" << points[i].lat
                   << ",\"lon\":" << points[i].lon
                   << ",\"time\":" << points[i].time << "}";
     }
-    std::cout << "]\n";
+    out << "]\n";
 }
 
-int main() {
-    // Read all input from stdin
-    std::string input, line;
-    while (std::getline(std::cin, line)) {
-        input += line;
-    }
+// Parse one trace, correct it and serialise the result in the same format
+bool process_trace(std::istream& in, std::ostream& out, bool binary) {
     std::vector<GPSPoint> points;
-    try {
+    if (binary) {
+        if (!read_binary(in, points)) {
+            std::cerr << "Invalid binary input\n";
+            return false;
+        }
+    } else {
+        // Read all input
+        std::string input;
+        std::string line;
+        while (std::getline(in, line)) {
+            input += line;
+        }
         if (!parse_gps_array(input, points)) {
             std::cerr << "Invalid JSON input\n";
-            return 1;
+            return false;
         }
-        if (points.size() < 2) {
-            output_json(points);
-            return 0;
+    }
+    try {
+        if (points.size() >= 2) {
+            std::vector<bool> is_anomaly = detect_anomalies(points);
+            correct_anomalies(points, is_anomaly);
+        }
+        if (binary) {
+            output_binary(out, points);
+        } else {
+            output_json(out, points);
         }
-        std::vector<bool> is_anomaly = detect_anomalies(points);
-        correct_anomalies(points, is_anomaly);
-        output_json(points);
     } catch (const std::exception& e) {
         std::cerr << "Error: " << e.what() << "\n";
-        return 1;
+        return false;
+    }
+    return true;
+}
+
+// Persistent worker: each request is a little-endian uint32 length followed by
+// one whole trace; each response is framed the same way, empty on failure.
+int serve(bool binary) {
+    char length_bytes[4];
+    while (std::cin.read(length_bytes, sizeof(length_bytes))) {
+        std::uint32_t length;
+        std::memcpy(&length, length_bytes, 4);
+        std::string payload(length, '\0');
+        if (length && !std::cin.read(&payload[0], length)) return 1;
+
+        std::istringstream in(payload);
+        std::ostringstream out;
+        std::string response;
+        if (process_trace(in, out, binary)) response = out.str();
+
+        std::uint32_t response_length = static_cast<std::uint32_t>(response.size());
+        std::memcpy(length_bytes, &response_length, 4);
+        std::cout.write(length_bytes, sizeof(length_bytes));
+        std::cout.write(response.data(), response.size());
+        std::cout.flush();
     }
     return 0;
 }
+
+int main(int argc, char* argv[]) {
+    bool binary = false, persistent = false;
+    for (int i = 1; i < argc; ++i) {
+        std::string arg = argv[i];
+        if (arg == "--binary") binary = true;
+        if (arg == "--serve") persistent = true;
+    }
+    if (binary || persistent) {
+#ifdef _WIN32
+        _setmode(_fileno(stdin), _O_BINARY);
+        _setmode(_fileno(stdout), _O_BINARY);
+#endif
+    }
+    if (persistent) return serve(binary);
+    return process_trace(std::cin, std::cout, binary) ? 0 : 1;
+}
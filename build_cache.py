@@ -0,0 +1,138 @@
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+import threading
+import subprocess
+from functools import lru_cache
+from typing import List, Dict, Optional
+
+CACHE_DIR = "build_cache"
+EXE_SUFFIX = ".exe" if os.name == "nt" else ""
+
+
+@lru_cache(maxsize=None)
+def compiler_version(compiler: str) -> str:
+    """First line of the compiler's --version output, part of every build key"""
+    try:
+        output = subprocess.run([compiler, "--version"], capture_output=True, text=True).stdout
+        return output.splitlines()[0] if output else compiler
+    except OSError:
+        return compiler
+
+
+def source_hash(code: str, compiler: str, flags: List[str]) -> str:
+    """Content address of a candidate build: compiler, flags and source text"""
+    digest = hashlib.sha256()
+    digest.update(compiler_version(compiler).encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(" ".join(flags).encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(code.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def file_hash(path: str) -> str:
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _atomic_write(path: str, data: bytes):
+    """Write through a temporary file so concurrent readers never see partial entries"""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def copy_atomic(src: str, dest: str):
+    """Copy a file so that dest is replaced in one step, even while another process uses it"""
+    with open(src, "rb") as f:
+        _atomic_write(dest, f.read())
+    shutil.copymode(src, dest)
+
+
+class BuildCache:
+    """Content-addressed store of compiled binaries and memoized test results.
+
+    Constructing a cache does not touch the disk; create() makes its
+    directories before the first build.
+    """
+
+    def __init__(self, root: str = CACHE_DIR):
+        self.root = root
+        self.binary_dir = os.path.join(root, "bin")
+        self.result_dir = os.path.join(root, "results")
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def create(self) -> "BuildCache":
+        os.makedirs(self.binary_dir, exist_ok=True)
+        os.makedirs(self.result_dir, exist_ok=True)
+        return self
+
+    def lock(self, key: str) -> threading.Lock:
+        """Per-key lock serialising builds of the same source within this process"""
+        with self._locks_guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def binary_path(self, key: str) -> str:
+        return os.path.join(self.binary_dir, key + EXE_SUFFIX)
+
+    def get_binary(self, key: str) -> Optional[str]:
+        """Path of the cached binary for this build key, if any"""
+        path = self.binary_path(key)
+        return path if os.path.exists(path) else None
+
+    def put_binary(self, key: str, binary_file: str) -> str:
+        """Store a freshly compiled binary under its build key"""
+        with open(binary_file, "rb") as f:
+            _atomic_write(self.binary_path(key), f.read())
+        os.chmod(self.binary_path(key), 0o755)
+        return self.binary_path(key)
+
+    def get_compile_error(self, key: str) -> Optional[str]:
+        """Compiler diagnostics of a build key that is known not to compile"""
+        path = os.path.join(self.binary_dir, key + ".err")
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
+
+    def put_compile_error(self, key: str, stderr: str):
+        _atomic_write(os.path.join(self.binary_dir, key + ".err"), stderr.encode("utf-8"))
+
+    def _result_path(self, key: str, input_key: str) -> str:
+        return os.path.join(self.result_dir, f"{key}_{input_key}.json")
+
+    def output_path(self, key: str, input_key: str) -> str:
+        """Where the corrected output of a passing evaluation is kept beside its entry"""
+        return os.path.join(self.result_dir, f"{key}_{input_key}.out.json")
+
+    def get_result(self, key: str, input_key: str) -> Optional[Dict]:
+        """Memoized evaluation of a build on one input file"""
+        path = self._result_path(key, input_key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def put_result(self, key: str, input_key: str, entry: Dict):
+        _atomic_write(self._result_path(key, input_key), json.dumps(entry).encode("utf-8"))
+
+    def clear(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+        self.create()
@@ -0,0 +1,122 @@
+import json
+import random
+import argparse
+from decimal import Decimal
+from typing import Callable, Dict, List, Tuple
+
+from main import INPUT_FILES, analyze_results
+from scoring import analyze_results_batch, analyze_stream
+from detector import correct_points
+from trace_generator import SPEED_PROFILES, generate_track
+from track_buffer import TrackBuffer
+
+SCORERS: Dict[str, Callable] = {
+    "analyze_results_batch": analyze_results_batch,
+    "analyze_stream": analyze_stream,
+}
+# How candidates may spell the same integral value; the harness must score all of them alike
+NUMBER_STYLES: Dict[str, Callable[[int], str]] = {
+    "int": str,
+    "float": lambda value: f"{value}.0",
+    "exponent": lambda value: format(Decimal(value), "e"),
+}
+
+
+def reverse_times(points: List[Dict], rng: random.Random) -> List[Dict]:
+    """Copy with a few timestamps repeated or moved behind their predecessor"""
+    points = [dict(point) for point in points]
+    for _ in range(rng.randint(1, 3)):
+        index = rng.randrange(1, len(points))
+        points[index]["time"] = points[index - 1]["time"] - rng.choice([0, 0, 1, 30])
+    return points
+
+
+def displace(points: List[Dict], rng: random.Random, distance: Tuple[int, int]) -> List[Dict]:
+    """Copy with a few points moved by a random number of microdegrees in the given range"""
+    points = [dict(point) for point in points]
+    for _ in range(rng.randint(1, 4)):
+        point = points[rng.randrange(len(points))]
+        point[rng.choice(["lat", "lon"])] += rng.choice([-1, 1]) * rng.randint(*distance)
+    return points
+
+
+def output_variants(track: List[Dict], rng: random.Random) -> Dict[str, List[Dict]]:
+    """Candidate outputs for a track, covering every counter of the analysis"""
+    corrected = correct_points(track)
+    return {
+        "unchanged": track,
+        "corrected": corrected,
+        "outliers": displace(corrected, rng, (2000, 80000)),  # remaining anomalies, invalid changes
+        "nudged": displace(corrected, rng, (1, 30)),  # small, mostly legal-looking changes
+        "reversed": reverse_times(corrected, rng),  # time mismatches and reversals
+        "truncated": corrected[:-1],
+    }
+
+
+def random_track(rng: random.Random, max_points: int) -> List[Dict]:
+    """Generated track with spikes, sometimes with repeated or reversed input timestamps"""
+    track = [point for point, _ in generate_track(rng.randint(2, max_points), seed=rng.randrange(1 << 30),
+                                                   profile=rng.choice(sorted(SPEED_PROFILES)),
+                                                   spike_rate=rng.choice([0.01, 0.05, 0.2]))]
+    if len(track) > 1 and rng.random() < 0.3:
+        track = reverse_times(track, rng)
+    return track
+
+
+def format_points(points: List[Dict], style: str) -> bytes:
+    spell = NUMBER_STYLES[style]
+    return ("[" + ",".join(f'{{"lat": {spell(p["lat"])}, "lon": {spell(p["lon"])}, "time": {spell(p["time"])}}}'
+                           for p in points) + "]").encode("utf-8")
+
+
+def compare(track: List[Dict], output: List[Dict]) -> List[str]:
+    """Names of the scorers whose verdict or counters differ from the analyze_results reference.
+
+    Besides the scorers on point dicts this checks the path the harness
+    takes: output text parsed by TrackBuffer, in every number style, against
+    analyze_results on the same text parsed by json.loads.
+    """
+    reference = analyze_results(track, output)
+    mismatches = [name for name, scorer in SCORERS.items() if scorer(track, output) != reference]
+    input_buffer = TrackBuffer.from_json_bytes(format_points(track, "int"))
+    for style in NUMBER_STYLES:
+        text = format_points(output, style)
+        try:
+            parsed = analyze_results_batch(input_buffer, TrackBuffer.from_json_bytes(text))
+        except ValueError:
+            parsed = None
+        if parsed != analyze_results(track, json.loads(text)):
+            mismatches.append(f"TrackBuffer[{style}]")
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the vectorized and streaming scorers against "
+                                                 "the analyze_results reference loop")
+    parser.add_argument("--inputs", nargs="*", default=INPUT_FILES)
+    parser.add_argument("--cases", type=int, default=200, help="Random tracks to check")
+    parser.add_argument("--max-points", type=int, default=300, help="Largest random track")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    tracks = []
+    for input_file in args.inputs:
+        with open(input_file, "r", encoding="utf-8") as f:
+            tracks.append((input_file, json.load(f)))
+    tracks += [(f"random[{case}]", random_track(rng, args.max_points)) for case in range(args.cases)]
+
+    checked, mismatches = 0, []
+    for name, track in tracks:
+        for variant, output in output_variants(track, rng).items():
+            checked += 1
+            mismatches += [f"{name} {variant}: {scorer}" for scorer in compare(track, output)]
+    for mismatch in mismatches:
+        print(f"MISMATCH {mismatch}")
+    print(f"{checked} cases, {len(mismatches)} mismatches")
+    if mismatches:
+        raise SystemExit("Scorers disagree with analyze_results")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+import os
+import json
+import tempfile
+from typing import Dict, Optional
+
+CHECKPOINT_VERSION = 1
+
+
+def save_checkpoint(path: str, state: Dict):
+    """Atomically replace the checkpoint, so an interrupted write keeps the previous one"""
+    data = json.dumps({"version": CHECKPOINT_VERSION, **state}, indent=2).encode("utf-8")
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def load_checkpoint(path: str) -> Optional[Dict]:
+    """Checkpoint state written by save_checkpoint, or None if there is none"""
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        state = json.load(f)
+    if state.get("version") != CHECKPOINT_VERSION:
+        raise ValueError(f"Unsupported checkpoint version {state.get('version')} in {path}")
+    return state
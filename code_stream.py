@@ -0,0 +1,88 @@
+import re
+import time
+from typing import Callable, Dict, Optional
+
+FENCE = "```"
+MAX_PROSE_CHARS = 200  # text tolerated before the code block, e.g. "Here is the code:"
+CHECK_OVERLAP = 64  # longer than any pattern the check looks for, so none is missed across deltas
+CODE_START = re.compile(r"\s*(#|//|/\*)")  # an unfenced completion that starts straight with code
+
+
+class CodeStream:
+    """Incremental view of a completion that should be a single fenced C++ block.
+
+    feed() takes text deltas as they arrive and returns a reason to cancel
+    the request as soon as the output breaks the contract: prose instead of
+    code, a code block longer than max_length, or a violation that check
+    finds in the code received so far. check only ever sees the new code
+    plus a short overlap, so it must look for patterns that are visible in
+    any prefix. finished turns True when the code block closes; the rest of
+    the completion would only be explanation and need not be generated.
+    """
+
+    def __init__(self, max_length: int, check: Callable[[str], Optional[str]],
+                 max_prose: int = MAX_PROSE_CHARS):
+        self.max_length = max_length
+        self.check = check
+        self.max_prose = max_prose
+        self.text = ""
+        self.deltas = 0
+        self.abort_reason: Optional[str] = None
+        self._code_start: Optional[int] = None
+        self._code_end: Optional[int] = None
+        self._checked = 0
+        self._started = time.perf_counter()
+        self._first_delta: Optional[float] = None
+
+    @property
+    def finished(self) -> bool:
+        return self._code_end is not None
+
+    @property
+    def stopped(self) -> bool:
+        """Nothing more is needed: the block is closed or the request should be cancelled"""
+        return self.finished or self.abort_reason is not None
+
+    def feed(self, delta: str) -> Optional[str]:
+        if self._first_delta is None:
+            self._first_delta = time.perf_counter() - self._started
+        self.deltas += 1
+        self.text += delta
+        if not self.stopped:
+            self.abort_reason = self._inspect()
+        return self.abort_reason
+
+    def _inspect(self) -> Optional[str]:
+        if self._code_start is None:
+            fence = self.text.find(FENCE)
+            if fence < 0 and CODE_START.match(self.text):
+                self._code_start = 0
+            else:
+                prose = self.text[:fence] if fence >= 0 else self.text
+                if len(prose.strip()) > self.max_prose:
+                    return f"More than {self.max_prose} characters of prose before the code block"
+                line_end = self.text.find("\n", fence) if fence >= 0 else -1
+                if line_end < 0:
+                    return None
+                self._code_start = line_end + 1
+
+        close = self.text.find(FENCE, max(self._code_start, self._code_start + self._checked - len(FENCE)))
+        if close >= 0:
+            self._code_end = close
+        code = self.text[self._code_start:self._code_end]
+        if len(code) > self.max_length:
+            return f"Code exceeds {self.max_length} characters"
+        reason = self.check(code[max(0, self._checked - CHECK_OVERLAP):])
+        self._checked = len(code)
+        return reason
+
+    def stats(self) -> Dict:
+        """Latency and size of the completion received so far"""
+        return {
+            "first_delta": self._first_delta,
+            "latency": time.perf_counter() - self._started,
+            "deltas": self.deltas,
+            "characters": len(self.text),
+            "outcome": "aborted" if self.abort_reason else "closed" if self.finished else "ended",
+            "abort_reason": self.abort_reason
+        }
@@ -0,0 +1,139 @@
+import sys
+import json
+from typing import List, Dict, Sequence, Tuple
+
+import numpy as np
+
+EARTH_RADIUS = 6371000.0  # Earth radius in meters, as in best_algorithm.cpp
+MAX_SPEED = 50.0  # m/s
+
+Track = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+def haversine(lat1: np.ndarray, lon1: np.ndarray, lat2: np.ndarray, lon2: np.ndarray) -> np.ndarray:
+    """Element-wise haversine in meters, evaluated in the same operation order as best_algorithm.cpp"""
+    dlat = (lat2 - lat1) * 1e-6
+    dlon = (lon2 - lon1) * 1e-6
+    alat1 = lat1 * 1e-6 * np.pi / 180.0
+    alat2 = lat2 * 1e-6 * np.pi / 180.0
+    dlat_rad = dlat * np.pi / 180.0
+    dlon_rad = dlon * np.pi / 180.0
+    a = (np.sin(dlat_rad / 2) * np.sin(dlat_rad / 2) +
+         np.cos(alat1) * np.cos(alat2) *
+         np.sin(dlon_rad / 2) * np.sin(dlon_rad / 2))
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+    return EARTH_RADIUS * c
+
+
+def round_half_away(values: np.ndarray) -> np.ndarray:
+    """std::round semantics (halves away from zero); np.round rounds halves to even"""
+    whole = np.trunc(values)
+    return whole + np.sign(values) * (np.abs(values - whole) >= 0.5)
+
+
+def _fast_segments(lat: np.ndarray, lon: np.ndarray, times: np.ndarray) -> np.ndarray:
+    """Segments (i, i + 1) with advancing time and a speed above MAX_SPEED"""
+    dt = times[1:] - times[:-1]
+    forward = dt > 0
+    speed = np.zeros(dt.shape)
+    np.divide(haversine(lat[:-1], lon[:-1], lat[1:], lon[1:]), dt, out=speed, where=forward)
+    return forward & (speed > MAX_SPEED)
+
+
+def _interpolate(lat: np.ndarray, lon: np.ndarray, times: np.ndarray,
+                 anomaly: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Replace anomalous points by linear interpolation between the surrounding good points"""
+    n = len(anomaly)
+    index = np.arange(n)
+    good = ~anomaly
+    prev_good = np.maximum.accumulate(np.where(good, index, 0))
+    next_good = np.minimum.accumulate(np.where(good, index, n - 1)[::-1])[::-1]
+
+    targets = np.flatnonzero(anomaly)
+    prev_idx = prev_good[targets]
+    next_idx = next_good[targets]
+    t0 = times[prev_idx]
+    t1 = times[next_idx]
+    usable = t1 != t0
+    targets, prev_idx, next_idx, t0, t1 = (a[usable] for a in (targets, prev_idx, next_idx, t0, t1))
+
+    alpha = (times[targets] - t0) / (t1 - t0)
+    new_lat = lat.copy()
+    new_lon = lon.copy()
+    new_lat[targets] = round_half_away(lat[prev_idx] + alpha * (lat[next_idx] - lat[prev_idx]))
+    new_lon[targets] = round_half_away(lon[prev_idx] + alpha * (lon[next_idx] - lon[prev_idx]))
+    return new_lat, new_lon
+
+
+def _as_track(lat, lon, times) -> Track:
+    return (np.asarray(lat, dtype=np.int64), np.asarray(lon, dtype=np.int64),
+            np.asarray(times, dtype=np.int64))
+
+
+def detect_anomalies(lat: np.ndarray, lon: np.ndarray, times: np.ndarray) -> np.ndarray:
+    """Mask of points adjacent to a segment faster than MAX_SPEED; endpoints are never flagged"""
+    lat, lon, times = _as_track(lat, lon, times)
+    n = len(lat)
+    anomaly = np.zeros(n, dtype=bool)
+    if n < 2:
+        return anomaly
+    fast = _fast_segments(lat, lon, times)
+    anomaly[1:] |= fast
+    anomaly[:-1] |= fast
+    anomaly[0] = anomaly[-1] = False
+    return anomaly
+
+
+def correct_track(lat: np.ndarray, lon: np.ndarray, times: np.ndarray) -> Track:
+    """Corrected (lat, lon, time) arrays for one track, matching best_algorithm.cpp output"""
+    lat, lon, times = _as_track(lat, lon, times)
+    if len(lat) < 3:
+        return lat.copy(), lon.copy(), times.copy()
+    new_lat, new_lon = _interpolate(lat, lon, times, detect_anomalies(lat, lon, times))
+    return new_lat, new_lon, times.copy()
+
+
+def correct_tracks(tracks: Sequence[Track]) -> List[Track]:
+    """Correct many tracks with one set of whole-array operations over their concatenation"""
+    if not tracks:
+        return []
+    tracks = [_as_track(*track) for track in tracks]
+    lengths = np.array([len(track[0]) for track in tracks])
+    lat, lon, times = (np.concatenate([track[k] for track in tracks]) for k in range(3))
+
+    anomaly = np.zeros(len(lat), dtype=bool)
+    if len(lat) > 1:
+        fast = _fast_segments(lat, lon, times)
+        # Segments joining the end of one track to the start of the next do not exist
+        ends = np.cumsum(lengths)
+        boundaries = ends[:-1] - 1
+        fast[boundaries[(boundaries >= 0) & (boundaries < len(fast))]] = False
+        anomaly[1:] |= fast
+        anomaly[:-1] |= fast
+        starts = ends - lengths
+        nonempty = lengths > 0
+        anomaly[starts[nonempty]] = False
+        anomaly[ends[nonempty] - 1] = False
+
+    # Every track keeps its endpoints, so interpolation never reaches across a track boundary
+    new_lat, new_lon = _interpolate(lat, lon, times, anomaly)
+    split_at = np.cumsum(lengths)[:-1]
+    return list(zip(np.split(new_lat, split_at), np.split(new_lon, split_at), np.split(times.copy(), split_at)))
+
+
+def correct_points(points: List[Dict]) -> List[Dict]:
+    """Convenience wrapper for the harness's list-of-dicts representation"""
+    lat, lon, times = correct_track([p["lat"] for p in points], [p["lon"] for p in points],
+                                    [p["time"] for p in points])
+    return [{"lat": int(a), "lon": int(b), "time": int(t)} for a, b, t in zip(lat, lon, times)]
+
+
+def format_points(points: List[Dict]) -> str:
+    """Serialise points exactly like best_algorithm.cpp's output_json"""
+    body = ",".join(f'{{"lat":{p["lat"]},"lon":{p["lon"]},"time":{p["time"]}}}' for p in points)
+    return f"[{body}]\n"
+
+
+if __name__ == "__main__":
+    # Drop-in for the compiled binary: JSON array on stdin, corrected JSON array on stdout
+    sys.stdout.write(format_points(correct_points(json.load(sys.stdin))))
@@ -0,0 +1,73 @@
+import math
+
+import numpy as np
+
+EARTH_RADIUS = 6371000  # Earth radius in meters
+MICRODEGREE = math.pi / 180e6  # radians per microdegree
+
+# Domain and accuracy of the equirectangular kernel. Over 4M random segments up
+# to 100 km long with both ends within +-80 degrees latitude, the worst relative
+# error against haversine was 3.5e-4; the bound used below leaves ~3x margin.
+APPROX_MAX_DISTANCE = 100000.0  # meters
+APPROX_MAX_LATITUDE = 80.0  # degrees
+APPROX_REL_ERROR = 1e-3
+APPROX_ABS_ERROR = 1e-6  # meters, covers rounding on near-zero segments
+
+
+def haversine_pairs(lat1: np.ndarray, lon1: np.ndarray, lat2: np.ndarray, lon2: np.ndarray) -> np.ndarray:
+    """Element-wise haversine distance in meters between microdegree points"""
+    lat1 = np.asarray(lat1, dtype=np.float64) / 1e6
+    lon1 = np.asarray(lon1, dtype=np.float64) / 1e6
+    lat2 = np.asarray(lat2, dtype=np.float64) / 1e6
+    lon2 = np.asarray(lon2, dtype=np.float64) / 1e6
+    sin_dlat = np.sin(np.radians(lat2 - lat1) / 2)
+    sin_dlon = np.sin(np.radians(lon2 - lon1) / 2)
+    a = (sin_dlat * sin_dlat +
+         np.cos(np.radians(lat1)) * np.cos(np.radians(lat2)) * sin_dlon * sin_dlon)
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+    return EARTH_RADIUS * c
+
+
+def haversine_segments(lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    """Haversine distance in meters between consecutive points (microdegrees)"""
+    return haversine_pairs(lat[:-1], lon[:-1], lat[1:], lon[1:])
+
+
+def equirectangular_segments(lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    """Approximate distance in meters between consecutive points (microdegrees).
+
+    Projects each segment onto a plane scaled by the mean of its endpoints'
+    cos(latitude), with one cosine per point shared by both adjacent segments.
+    Within APPROX_MAX_DISTANCE and APPROX_MAX_LATITUDE the relative error
+    against haversine is below APPROX_REL_ERROR.
+    """
+    lat = np.asarray(lat, dtype=np.float64)
+    lon = np.asarray(lon, dtype=np.float64)
+    cos_lat = np.cos(lat * MICRODEGREE)
+    x = (lon[1:] - lon[:-1]) * (0.5 * MICRODEGREE) * (cos_lat[:-1] + cos_lat[1:])
+    y = (lat[1:] - lat[:-1]) * MICRODEGREE
+    return EARTH_RADIUS * np.sqrt(x * x + y * y)
+
+
+def threshold_distances(lat: np.ndarray, lon: np.ndarray, limits: np.ndarray) -> np.ndarray:
+    """Segment distances that compare against limits exactly as haversine distances would.
+
+    The equirectangular kernel is used wherever its error bound cannot flip
+    the comparison with the segment's limit (e.g. MAX_SPEED * time_diff);
+    segments within the error band or outside the kernel's domain are
+    recomputed with haversine, so every verdict matches the exact one.
+    """
+    lat = np.asarray(lat, dtype=np.float64)
+    lon = np.asarray(lon, dtype=np.float64)
+    limits = np.asarray(limits, dtype=np.float64)
+    distances = equirectangular_segments(lat, lon)
+    max_lat = APPROX_MAX_LATITUDE * 1e6
+    near_limit = (np.abs(distances - limits) <=
+                  APPROX_REL_ERROR * np.maximum(distances, limits) + APPROX_ABS_ERROR)
+    # Long segments include any that wrap the antimeridian, where the kernel is meaningless
+    outside_domain = ((distances > APPROX_MAX_DISTANCE) |
+                      (np.abs(lat[:-1]) > max_lat) | (np.abs(lat[1:]) > max_lat))
+    exact = np.flatnonzero(near_limit | outside_domain)
+    if len(exact):
+        distances[exact] = haversine_pairs(lat[exact], lon[exact], lat[exact + 1], lon[exact + 1])
+    return distances
@@ -0,0 +1,243 @@
+// Prebuilt I/O harness: compiled once to an object file and linked with each candidate
+// that implements correct_points() (see harness.h). Reads the whole trace with one
+// buffered read, parses and formats integers without iostreams, and writes the result
+// with one write, so benchmarks measure the candidate's detection rather than its I/O.
+#include "harness.h"
+
+#include <charconv>
+#include <cstdio>
+#include <cstring>
+#include <exception>
+#include <string>
+#include <vector>
+#ifdef _WIN32
+#include <io.h>
+#include <fcntl.h>
+#endif
+
+namespace {
+
+// Binary trace format: 16-byte header "GPST", uint16 version, uint16 record size,
+// uint64 count, then little-endian records of int32 lat, int32 lon, int64 time
+const char BINARY_MAGIC[4] = {'G', 'P', 'S', 'T'};
+const std::uint16_t BINARY_VERSION = 1;
+const std::uint16_t BINARY_RECORD_SIZE = 16;
+const std::size_t READ_CHUNK = 1 << 20;
+
+std::string read_all(std::FILE* in) {
+    std::string data;
+    std::size_t size = 0;
+    while (true) {
+        data.resize(size + READ_CHUNK);
+        std::size_t got = std::fread(&data[size], 1, READ_CHUNK, in);
+        size += got;
+        if (got < READ_CHUNK) break;
+    }
+    data.resize(size);
+    return data;
+}
+
+bool read_exact(std::FILE* in, char* buffer, std::size_t size) {
+    return std::fread(buffer, 1, size, in) == size;
+}
+
+bool write_all(std::FILE* out, const char* data, std::size_t size) {
+    return std::fwrite(data, 1, size, out) == size;
+}
+
+inline const char* skip_space(const char* p, const char* end) {
+    while (p < end && (*p == ' ' || *p == '\n' || *p == '\r' || *p == '\t')) ++p;
+    return p;
+}
+
+// Parse one {"lat":..,"lon":..,"time":..} object, keys in any order
+const char* parse_point(const char* p, const char* end, GpsPoint& point) {
+    p = skip_space(p, end);
+    if (p == end || *p != '{') return nullptr;
+    ++p;
+    int seen = 0;
+    while (true) {
+        p = skip_space(p, end);
+        if (p == end || *p != '"') return nullptr;
+        const char* key = ++p;
+        while (p < end && *p != '"') ++p;
+        if (p == end) return nullptr;
+        std::size_t key_length = p - key;
+        p = skip_space(p + 1, end);
+        if (p == end || *p != ':') return nullptr;
+        p = skip_space(p + 1, end);
+
+        std::int64_t value;
+        auto parsed = std::from_chars(p, end, value);
+        if (parsed.ec != std::errc()) return nullptr;
+        p = parsed.ptr;
+        if (key_length == 3 && std::memcmp(key, "lat", 3) == 0) {
+            point.lat = static_cast<std::int32_t>(value);
+            seen |= 1;
+        } else if (key_length == 3 && std::memcmp(key, "lon", 3) == 0) {
+            point.lon = static_cast<std::int32_t>(value);
+            seen |= 2;
+        } else if (key_length == 4 && std::memcmp(key, "time", 4) == 0) {
+            point.time = value;
+            seen |= 4;
+        } else {
+            return nullptr;
+        }
+
+        p = skip_space(p, end);
+        if (p == end) return nullptr;
+        if (*p == ',') {
+            ++p;
+            continue;
+        }
+        if (*p != '}') return nullptr;
+        return seen == 7 ? p + 1 : nullptr;
+    }
+}
+
+bool parse_json(const std::string& input, std::vector<GpsPoint>& points) {
+    const char* p = input.data();
+    const char* end = p + input.size();
+    p = skip_space(p, end);
+    if (p == end || *p != '[') return false;
+    p = skip_space(p + 1, end);
+    if (p < end && *p == ']') return skip_space(p + 1, end) == end;
+    // Roughly 45 bytes per point; avoids repeated growth on large traces
+    points.reserve(input.size() / 40);
+    while (true) {
+        GpsPoint point;
+        p = parse_point(p, end, point);
+        if (!p) return false;
+        points.push_back(point);
+        p = skip_space(p, end);
+        if (p == end) return false;
+        if (*p == ',') {
+            ++p;
+            continue;
+        }
+        if (*p != ']') return false;
+        return skip_space(p + 1, end) == end;
+    }
+}
+
+void format_json(const std::vector<GpsPoint>& points, std::string& out) {
+    // Worst case per point: 11 + 11 + 20 digits plus 26 bytes of keys and punctuation
+    out.resize(points.size() * 68 + 3);
+    char* p = &out[0];
+    char* end = p + out.size();
+    *p++ = '[';
+    for (std::size_t i = 0; i < points.size(); ++i) {
+        if (i) *p++ = ',';
+        std::memcpy(p, "{\"lat\":", 7);
+        p = std::to_chars(p + 7, end, points[i].lat).ptr;
+        std::memcpy(p, ",\"lon\":", 7);
+        p = std::to_chars(p + 7, end, points[i].lon).ptr;
+        std::memcpy(p, ",\"time\":", 8);
+        p = std::to_chars(p + 8, end, points[i].time).ptr;
+        *p++ = '}';
+    }
+    *p++ = ']';
+    *p++ = '\n';
+    out.resize(p - out.data());
+}
+
+bool parse_binary(const std::string& input, std::vector<GpsPoint>& points) {
+    if (input.size() < 16 || std::memcmp(input.data(), BINARY_MAGIC, 4) != 0) return false;
+    std::uint16_t version, record_size;
+    std::uint64_t count;
+    std::memcpy(&version, input.data() + 4, 2);
+    std::memcpy(&record_size, input.data() + 6, 2);
+    std::memcpy(&count, input.data() + 8, 8);
+    if (version != BINARY_VERSION || record_size != BINARY_RECORD_SIZE) return false;
+    if (input.size() != 16 + count * BINARY_RECORD_SIZE) return false;
+    points.resize(count);
+    const char* record = input.data() + 16;
+    for (std::uint64_t i = 0; i < count; ++i, record += BINARY_RECORD_SIZE) {
+        std::memcpy(&points[i].lat, record, 4);
+        std::memcpy(&points[i].lon, record + 4, 4);
+        std::memcpy(&points[i].time, record + 8, 8);
+    }
+    return true;
+}
+
+void format_binary(const std::vector<GpsPoint>& points, std::string& out) {
+    std::uint64_t count = points.size();
+    out.resize(16 + count * BINARY_RECORD_SIZE);
+    char* p = &out[0];
+    std::memcpy(p, BINARY_MAGIC, 4);
+    std::memcpy(p + 4, &BINARY_VERSION, 2);
+    std::memcpy(p + 6, &BINARY_RECORD_SIZE, 2);
+    std::memcpy(p + 8, &count, 8);
+    p += 16;
+    for (const GpsPoint& point : points) {
+        std::memcpy(p, &point.lat, 4);
+        std::memcpy(p + 4, &point.lon, 4);
+        std::memcpy(p + 8, &point.time, 8);
+        p += BINARY_RECORD_SIZE;
+    }
+}
+
+// Parse one trace, run the candidate and serialise the result in the same format
+bool process_trace(const std::string& input, std::string& output, bool binary) {
+    std::vector<GpsPoint> points;
+    if (!(binary ? parse_binary(input, points) : parse_json(input, points))) {
+        std::fprintf(stderr, binary ? "Invalid binary input\n" : "Invalid JSON input\n");
+        return false;
+    }
+    try {
+        correct_points(points.data(), points.size());
+    } catch (const std::exception& e) {
+        std::fprintf(stderr, "Error: %s\n", e.what());
+        return false;
+    } catch (...) {
+        std::fprintf(stderr, "Error: unknown exception in correct_points\n");
+        return false;
+    }
+    if (binary) {
+        format_binary(points, output);
+    } else {
+        format_json(points, output);
+    }
+    return true;
+}
+
+// Persistent worker: each request is a little-endian uint32 length followed by
+// one whole trace; each response is framed the same way, empty on failure.
+int serve(bool binary) {
+    char length_bytes[4];
+    std::string input, output;
+    while (read_exact(stdin, length_bytes, sizeof(length_bytes))) {
+        std::uint32_t length;
+        std::memcpy(&length, length_bytes, 4);
+        input.resize(length);
+        if (length && !read_exact(stdin, &input[0], length)) return 1;
+
+        if (!process_trace(input, output, binary)) output.clear();
+        std::uint32_t response_length = static_cast<std::uint32_t>(output.size());
+        std::memcpy(length_bytes, &response_length, 4);
+        if (!write_all(stdout, length_bytes, sizeof(length_bytes)) ||
+            !write_all(stdout, output.data(), output.size()) || std::fflush(stdout) != 0) {
+            return 1;
+        }
+    }
+    return 0;
+}
+
+}  // namespace
+
+int main(int argc, char* argv[]) {
+    bool binary = false, persistent = false;
+    for (int i = 1; i < argc; ++i) {
+        if (std::strcmp(argv[i], "--binary") == 0) binary = true;
+        if (std::strcmp(argv[i], "--serve") == 0) persistent = true;
+    }
+#ifdef _WIN32
+    _setmode(_fileno(stdin), _O_BINARY);
+    _setmode(_fileno(stdout), _O_BINARY);
+#endif
+    if (persistent) return serve(binary);
+
+    std::string output;
+    if (!process_trace(read_all(stdin), output, binary)) return 1;
+    return write_all(stdout, output.data(), output.size()) && std::fflush(stdout) == 0 ? 0 : 1;
+}
@@ -0,0 +1,21 @@
+// Stable interface between the prebuilt I/O harness (harness.cpp) and a candidate detector.
+// The harness owns main(), stdin/stdout, JSON and binary traces (--binary) and the framed
+// persistent protocol (--serve); a candidate only defines correct_points().
+#ifndef GPS_HARNESS_H
+#define GPS_HARNESS_H
+
+#include <cstddef>
+#include <cstdint>
+
+struct GpsPoint {
+    std::int32_t lat;   // microdegrees
+    std::int32_t lon;   // microdegrees
+    std::int64_t time;  // seconds
+};
+
+// Correct points[0..count) in place. The harness writes back exactly these
+// count points, so time stamps are expected to stay as they are. Throwing an
+// exception fails the trace.
+void correct_points(GpsPoint* points, std::size_t count);
+
+#endif
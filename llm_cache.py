@@ -0,0 +1,73 @@
+import os
+import json
+import time
+import hashlib
+import tempfile
+from typing import Optional
+
+
+class ReplayMissError(Exception):
+    """Raised in replay mode when a prompt has no recorded response"""
+
+
+class ResponseCache:
+    """On-disk cache of chat completions keyed by (model, temperature, max_tokens, prompt hash).
+
+    Entries are evicted least-recently-used first once the cache grows past max_bytes.
+    The directory is created by the first put(). Aborted completions are recorded
+    for replays only; get() skips them unless include_aborted is set.
+    """
+
+    def __init__(self, root: str, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def key(model: str, temperature: float, max_tokens: int, prompt: str) -> str:
+        prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        material = json.dumps([model, float(temperature), int(max_tokens), prompt_hash])
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, f"{key}.json")
+
+    def get(self, key: str, include_aborted: bool = False) -> Optional[str]:
+        """Recorded completion text for key, refreshing its recency"""
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        if entry.get("aborted") and not include_aborted:
+            return None
+        os.utime(path)
+        return entry["content"]
+
+    def put(self, key: str, content: str, model: str, temperature: float, max_tokens: int, prompt: str,
+            aborted: bool = False):
+        entry = {
+            "model": model,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "prompt_hash": hashlib.sha256(prompt.encode("utf-8")).hexdigest(),
+            "recorded_at": time.time(),
+            "aborted": aborted,
+            "content": content
+        }
+        os.makedirs(self.root, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.root)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, self._path(key))
+        self.evict()
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits in max_bytes"""
+        entries = [entry for entry in os.scandir(self.root) if entry.name.endswith(".json")]
+        total = sum(entry.stat().st_size for entry in entries)
+        for entry in sorted(entries, key=lambda e: e.stat().st_mtime):
+            if total <= self.max_bytes:
+                break
+            total -= entry.stat().st_size
+            os.remove(entry.path)
@@ -2,15 +2,47 @@ import os
 import json
 import subprocess
 import time
-import math
 import shutil
 import re
+import asyncio
+import threading
+import argparse
+import functools
+import hashlib
+import contextlib
+from collections import OrderedDict
 from datetime import datetime
-from typing import List, Dict, Optional, Tuple
-from openai import OpenAI
+from typing import Iterator, List, Dict, Optional, Tuple, Union
+from openai import OpenAI, AsyncOpenAI
+
+from llm_cache import ResponseCache, ReplayMissError
+from build_cache import BuildCache, EXE_SUFFIX, copy_atomic, source_hash, file_hash
+from scheduler import JobScheduler
+from checkpoint import load_checkpoint, save_checkpoint
+from benchmark import BenchmarkError, benchmark_binary
+from worker_pool import SERVE_FLAG, LimitExceeded, WorkerError, WorkerPool, PROBE_REQUEST, supports_persistent
+from process_metrics import limit_error, run_measured
+from trace_format import MAGIC, BINARY_FLAG, encode_points, is_binary_trace
+from scoring import analyze_results_batch, analyze_stream, calculate_distance, iter_json_points
+from tracing import Tracer, summarize
+from track_buffer import TrackBuffer
+from autotune import TRACE_PROFILES, autotune, generate_traces, print_report
+from results_store import ResultsStore, new_run_id
+from code_stream import CodeStream
 
 # Configuration
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL")  # e.g. a local stub_server.py
+MODEL = "gpt-4.1"
+TEMPERATURE = 0.3
+MAX_TOKENS = 5000
+# More than one temperature requests that many candidates concurrently per iteration
+CANDIDATE_TEMPERATURES = [TEMPERATURE]
+MAX_IN_FLIGHT_REQUESTS = 4
+LLM_CACHE_DIR = "llm_cache"
+LLM_CACHE_MAX_BYTES = 64 * 1024 * 1024
+# Replay recorded responses only; no request ever reaches the API
+LLM_REPLAY = os.getenv("LLM_REPLAY") == "1"
 INPUT_FILES = ["points.json", "points2.json", "points3.json"]
 MAX_ITERATIONS = 15
 CPP_COMPILER = "g++"
@@ -18,16 +50,74 @@ BASE_OUTPUT_NAME = "gps_algorithm"
 RESULTS_DIR = "iteration_results"
 COMPILED_DIR = "compiled_binaries"
 CORRECTED_DIR = "corrected_data"
+CHECKPOINT_FILE = os.path.join(RESULTS_DIR, "checkpoint.json")  # rewritten after every iteration
 MAX_CODE_LENGTH = 15000
-CPP_SOURCE = os.path.join(COMPILED_DIR, "current_iteration.cpp")
-
-# Initialize OpenAI client
-client = OpenAI(api_key=OPENAI_API_KEY)
+# Stream completions and cancel them once the code block closes or clearly breaks the contract
+STREAM_COMPLETIONS = True
+STREAM_MAX_PROSE_CHARS = 200  # text tolerated before the code block
+COMPILE_FLAGS = ["-std=c++17", "-O2"]
+BUILD_CACHE_DIR = "build_cache"
+MAX_WORKERS = os.cpu_count() or 1  # parallel (candidate, input file) evaluations
+MAX_PENDING_JOBS = 2 * MAX_WORKERS  # bound on jobs queued in the worker pool
+BENCHMARK_MODE = True  # time passing binaries over repeated runs instead of one sample
+BENCHMARK_RUNS = 10
+BENCHMARK_WARMUP = 2
+# Inputs larger than this are scored by streaming both files instead of loading them
+STREAMING_SCORE_BYTES = 64 * 1024 * 1024
+# Evaluation stages: regex validation, -fsyntax-only, optimised build, smallest input, remaining inputs
+SYNTAX_CHECK = True  # run the cheap front-end check before the optimised build
+FAIL_FAST = True  # stop at the first failing stage; False runs every input file once the build succeeds
+# Candidate I/O contract: "json", or "binary" for fixed-width records with --binary (see trace_format.py)
+IO_FORMAT = "json"
+# Keep candidates that support the framed --serve protocol running across traces
+PERSISTENT_WORKERS = True
+# Enforced on every candidate run; a run over either limit fails. None disables a limit
+MEMORY_LIMIT_BYTES = 512 * 1024 * 1024  # address space (RLIMIT_AS)
+CPU_LIMIT_SECONDS = 10.0  # user + system CPU per trace
+# Small launcher that applies the limits and reports each run's own rusage (POSIX only)
+MEASURE_RUNNER_SOURCE = "measure_run.cpp"
+# Candidates only implement correct_points() from harness.h and are linked against the
+# prebuilt harness.cpp object, which owns all I/O; False keeps the whole-program contract
+HARNESS_MODE = False
+HARNESS_SOURCE = "harness.cpp"
+HARNESS_HEADER = "harness.h"
+# Span timings of every stage, exported to trace.json and summarised in final_report.json
+TRACING = True
+TRACE_DIR = os.path.join(RESULTS_DIR, "trace")  # per-process span buffers, merged by the final report
+# Rebuild the final best candidate with other compiler flags and PGO, keeping the fastest identical build
+AUTOTUNE = True
+AUTOTUNE_POINTS = 500000  # per generated benchmark trace
+AUTOTUNE_DIR = os.path.join(COMPILED_DIR, "autotune")
+# Every TestResult of every run; the final report, leaderboard and regressions are queried from it
+RESULTS_DB = "results.sqlite"
+LEADERBOARD_SIZE = 10
+REGRESSION_TOLERANCE = 0.1  # best time may be this much slower than earlier runs' best before it is reported
+
+# Survives clean_environment() so unchanged prompts are answered from disk
+response_cache = ResponseCache(LLM_CACHE_DIR, LLM_CACHE_MAX_BYTES)
+
+# Survives clean_environment() so identical candidates are never rebuilt or re-run
+build_cache = BuildCache(BUILD_CACHE_DIR)
+# Per-process candidate worker pools, keyed by command line, least recently used first
+worker_pools: "OrderedDict[tuple, WorkerPool]" = OrderedDict()
+worker_pool_users: Dict[tuple, int] = {}  # threads currently holding each pool
+worker_pools_lock = threading.Lock()
+# Configured at import, so spawned scheduler workers trace into the same directory
+tracer = Tracer(TRACE_DIR if TRACING else None)
+# Survives clean_environment() so runs can be compared with each other
+results_store = ResultsStore(RESULTS_DB)
+# Latency and outcome of every completion request, drained into the iteration's report
+llm_requests: List[Dict] = []
+
+
+class CompletionAborted(Exception):
+    """A completion was cancelled because its output broke the code contract"""
 
 
 class TestResult:
     def __init__(self):
         self.iteration = 0
+        self.candidate = 0
         self.timestamp = datetime.now().isoformat()
         self.compile_success = False
         self.anomaly_detected = False
@@ -54,6 +144,13 @@ def setup_environment():
     os.makedirs(RESULTS_DIR, exist_ok=True)
     os.makedirs(COMPILED_DIR, exist_ok=True)
     os.makedirs(CORRECTED_DIR, exist_ok=True)
+    build_cache.create()
+
+
+@functools.lru_cache(maxsize=None)
+def openai_client() -> OpenAI:
+    """Created on first use, so importing this module needs no API key"""
+    return OpenAI(api_key=OPENAI_API_KEY or ("replay" if LLM_REPLAY else None), base_url=OPENAI_BASE_URL)
 
 
 def clean_environment():
@@ -67,6 +164,15 @@ def clean_environment():
     setup_environment()
 
 
+def forbidden_code(code: str) -> Optional[str]:
+    """Violations visible in any prefix of the code, so a streamed completion can be cancelled on them"""
+    if "using namespace std;" in code:
+        return "Avoid 'using namespace std;' - use std:: prefix instead"
+    if HARNESS_MODE and re.search(r"\bint\s+main\s*\(", code):
+        return "Do not define main() - the harness provides it"
+    return None
+
+
 def validate_code_structure(code: str) -> Optional[str]:
     """Check for common issues before compilation"""
     required_components = [
@@ -81,17 +187,23 @@ def validate_code_structure(code: str) -> Optional[str]:
         if re.search(pattern, code) and requirement not in code:
             return f"Missing '{requirement}' required for pattern '{pattern}'"
 
-    if "using namespace std;" in code:
-        return "Avoid 'using namespace std;' - use std:: prefix instead"
-
-    # Check for basic JSON parsing capability
-    json_patterns = [
-        r"std\s*::\s*string\s+line",
-        r"std\s*::\s*getline\s*\(\s*std\s*::\s*cin",
-        r"std\s*::\s*stoi"
-    ]
-    if not any(re.search(p, code) for p in json_patterns):
-        return "Missing essential JSON parsing components"
+    forbidden = forbidden_code(code)
+    if forbidden:
+        return forbidden
+
+    if HARNESS_MODE:
+        # The harness provides main() and all parsing; the candidate provides the detector
+        if not re.search(r"void\s+correct_points\s*\(", code):
+            return "Missing 'void correct_points(GpsPoint* points, std::size_t count)' definition"
+    else:
+        # Check for basic JSON parsing capability
+        json_patterns = [
+            r"std\s*::\s*string\s+line",
+            r"std\s*::\s*getline\s*\(\s*std\s*::\s*cin",
+            r"std\s*::\s*stoi"
+        ]
+        if not any(re.search(p, code) for p in json_patterns):
+            return "Missing essential JSON parsing components"
 
     # Check for anomaly detection logic
     anomaly_patterns = [
@@ -105,20 +217,6 @@ def validate_code_structure(code: str) -> Optional[str]:
     return None
 
 
-def calculate_distance(lat1: int, lon1: int, lat2: int, lon2: int) -> float:
-    """Calculate distance between two GPS points in meters using Haversine formula"""
-    lat1, lon1, lat2, lon2 = lat1 / 1e6, lon1 / 1e6, lat2 / 1e6, lon2 / 1e6
-
-    R = 6371000  # Earth radius in meters
-    dlat = math.radians(lat2 - lat1)
-    dlon = math.radians(lon2 - lon1)
-    a = (math.sin(dlat / 2) * math.sin(dlat / 2) +
-         math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) *
-         math.sin(dlon / 2) * math.sin(dlon / 2))
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-    return R * c
-
-
 def analyze_results(input_data: List[Dict], output_data: List[Dict]) -> Tuple[bool, Dict]:
     """Check if output data meets quality criteria with enhanced validation"""
     analysis = {
@@ -207,6 +305,8 @@ def analyze_results(input_data: List[Dict], output_data: List[Dict]) -> Tuple[bo
 
 
 def generate_initial_prompt() -> str:
+    if HARNESS_MODE:
+        return generate_harness_prompt()
     return """Write a C++ program for GPS anomaly detection with these REQUIREMENTS:
 
 1. MUST INCLUDE these headers:
@@ -248,10 +348,52 @@ Example input:
 Example output:
 [{"lat":48480512,"lon":32271152,"time":1743465601},{"lat":48480008,"lon":32271596,"time":1743465606}]
 
+Provide ONLY the compilable C++ code with no additional text.""" + binary_io_prompt() + persistent_io_prompt()
+
+
+def generate_harness_prompt() -> str:
+    """Initial prompt for HARNESS_MODE: only the detection function, I/O is provided"""
+    with open(HARNESS_HEADER, "r", encoding="utf-8") as f:
+        header = f.read()
+    return f"""Write a C++ GPS anomaly correction function for this FIXED interface:
+
+```cpp
+{header}```
+
+1. Technical Specifications:
+- Use C++17 standard; start with #include "harness.h"
+- Define correct_points(), which corrects the points in place
+- Do NOT define main() and do NOT read stdin or write stdout: a prebuilt harness
+  parses the input, calls correct_points() once per trace and writes the result
+- Detect anomalies using speed thresholds (max 50 m/s)
+- Implement linear interpolation ONLY for anomalous points
+- Non-anomalous points MUST remain unchanged
+- Time stamps MUST remain unchanged
+- NEVER change first and last points
+
+2. Critical Requirements:
+- Use std:: prefix for all standard functions
+- Max code length: 15000 characters
+- ONLY change points with impossible speeds (over 50 m/s)
+- Runtime is measured, so focus on the detection and interpolation themselves
+
 Provide ONLY the compilable C++ code with no additional text."""
 
 
 def generate_improvement_prompt(previous_code: str, errors: str, execution_stats: Dict, feedback: str) -> str:
+    if HARNESS_MODE:
+        io_requirements = """- Keep the correct_points() signature from harness.h and do not define main()
+- Do not read stdin or write stdout; the harness handles all I/O
+- Fix any compilation errors"""
+        io_spec = """- Input: points[0..count) with lat/lon in microdegrees and time in seconds
+- Output: the same points, corrected in place"""
+    else:
+        io_requirements = """- Ensure complete input reading from stdin
+- Validate JSON parsing handles all cases
+- Fix any compilation errors
+- Maintain consistent JSON output format"""
+        io_spec = """- Input: JSON array of objects with "lat","lon","time" (integers)
+- Output: Corrected JSON array in same format"""
     return f"""Improve this GPS correction code based on SPECIFIC ISSUES:
 
 1. FIX THESE ERRORS FIRST:
@@ -261,12 +403,12 @@ def generate_improvement_prompt(previous_code: str, errors: str, execution_stats
 - Success rate: {execution_stats.get('passed', 0)}/{execution_stats.get('total', 3)}
 - Avg time: {execution_stats.get('avg_time', 0):.2f}s
 - Best time: {execution_stats.get('best_time', 0):.2f}s
+- Peak memory (RSS): {execution_stats.get('peak_rss', 0) / (1024 * 1024):.1f} MB (limit {limit_description(MEMORY_LIMIT_BYTES, 1024 * 1024, 'MB')})
+- Avg CPU time (user + sys): {execution_stats.get('avg_cpu', 0):.3f}s (limit {limit_description(CPU_LIMIT_SECONDS, 1, 's')})
+- Avg context switches: {execution_stats.get('avg_switches', 0):.0f}
 
 3. REQUIRED IMPROVEMENTS:
-- Ensure complete input reading from stdin
-- Validate JSON parsing handles all cases
-- Fix any compilation errors
-- Maintain consistent JSON output format
+{io_requirements}
 - Only change anomalous points (speed > 50 m/s)
 - Never change time stamps
 - Keep non-anomalous points unchanged
@@ -280,8 +422,7 @@ def generate_improvement_prompt(previous_code: str, errors: str, execution_stats
 - Optimize for both accuracy and performance
 
 5. Input/Output SPEC:
-- Input: JSON array of objects with "lat","lon","time" (integers)
-- Output: Corrected JSON array in same format
+{io_spec}
 - Time stamps MUST remain unchanged
 - Only coordinates of anomalous points should be modified
 
@@ -295,31 +436,83 @@ Provide ONLY the complete corrected C++ code with:
 1. All required headers
 2. Fixed namespace issues
 3. No external dependencies
-4. No additional commentary"""
+4. No additional commentary""" + binary_io_prompt() + persistent_io_prompt()
+
+
+def limit_description(limit: Optional[float], unit: float, suffix: str) -> str:
+    return "none" if limit is None else f"{limit / unit:g} {suffix}"
+
 
+def binary_io_prompt() -> str:
+    """Extra contract for candidates when they are run with binary I/O"""
+    if IO_FORMAT != "binary" or HARNESS_MODE:
+        return ""
+    return f"""
 
-def save_iteration_artifacts(iteration: int, code: str, binary_path: str):
+BINARY I/O MODE (REQUIRED):
+- When started with the argument {BINARY_FLAG}, read and write binary instead of JSON
+- Header (16 bytes, little-endian): 4 bytes "GPST", uint16 version = 1, uint16 record size = 16, uint64 count
+- Then count records of int32 lat, int32 lon, int64 time (little-endian)
+- Output uses the same header and record layout
+- Without {BINARY_FLAG}, keep the JSON stdin/stdout behaviour described above"""
+
+
+def persistent_io_prompt() -> str:
+    """Optional contract that lets one candidate process serve many traces"""
+    if not PERSISTENT_WORKERS or HARNESS_MODE:
+        return ""
+    return f"""
+
+PERSISTENT MODE (OPTIONAL):
+- When started with the argument {SERVE_FLAG}, loop until stdin reaches EOF
+- Each request is a uint32 little-endian byte length followed by one whole input trace
+- Answer each request with a uint32 little-endian length and the corrected trace, then flush stdout
+- Answer with a zero length if a trace cannot be processed, and keep serving
+- {SERVE_FLAG} may be combined with other arguments; without it, keep the one-shot behaviour"""
+
+
+def artifact_tag(iteration: int, candidate: int = 0) -> str:
+    """Name stem for per-iteration files; extra candidates of an iteration get a suffix"""
+    return str(iteration) if candidate == 0 else f"{iteration}_{candidate}"
+
+
+def save_iteration_artifacts(iteration: int, code: str, binary_path: str, candidate: int = 0):
     """Save both source code and compiled binary for the iteration"""
-    # Save source code
-    code_filename = os.path.join(RESULTS_DIR, f"iteration_{iteration}_code.cpp")
-    with open(code_filename, "w", encoding="utf-8") as f:
-        f.write(code)
+    with tracer.span("write_artifacts"):
+        # Save source code
+        code_filename = os.path.join(RESULTS_DIR, f"iteration_{artifact_tag(iteration, candidate)}_code.cpp")
+        with open(code_filename, "w", encoding="utf-8") as f:
+            f.write(code)
 
-    # Save binary
-    if os.path.exists(binary_path):
-        binary_filename = os.path.join(RESULTS_DIR, f"iteration_{iteration}_binary")
-        shutil.copy2(binary_path, binary_filename)
-        os.chmod(binary_filename, 0o755)
+        # Save binary
+        if os.path.exists(binary_path):
+            binary_filename = os.path.join(RESULTS_DIR, f"iteration_{artifact_tag(iteration, candidate)}_binary")
+            shutil.copy2(binary_path, binary_filename)
+            os.chmod(binary_filename, 0o755)
 
 
-def save_corrected_data(input_file: str, iteration: int, corrected_points: List[Dict]):
-    """Save corrected GPS points to a file"""
-    filename = os.path.join(
+def corrected_data_path(input_file: str, iteration: int, candidate: int = 0) -> str:
+    return os.path.join(
         CORRECTED_DIR,
-        f"iter_{iteration}_{os.path.basename(input_file)}"
+        f"iter_{artifact_tag(iteration, candidate)}_{os.path.basename(input_file)}"
     )
-    with open(filename, "w", encoding="utf-8") as f:
-        json.dump(corrected_points, f, indent=2)
+
+
+def save_corrected_data(input_file: str, iteration: int, corrected_points: Union[List[Dict], TrackBuffer],
+                        candidate: int = 0):
+    """Save corrected GPS points to a file"""
+    filename = corrected_data_path(input_file, iteration, candidate)
+    with tracer.span("write_corrected", points=len(corrected_points)):
+        if isinstance(corrected_points, TrackBuffer):
+            corrected_points.save_json(filename)
+            return
+        with open(filename, "w", encoding="utf-8") as f:
+            json.dump(corrected_points, f, indent=2)
+
+
+def save_corrected_file(input_file: str, iteration: int, output_file: str, candidate: int = 0):
+    """Save a streamed corrected output file as-is; large traces are never re-serialised"""
+    shutil.copyfile(output_file, corrected_data_path(input_file, iteration, candidate))
 
 
 def sanitize_code(raw_code: str) -> str:
@@ -344,37 +537,107 @@ def validate_json_output(output: str) -> bool:
         return False
 
 
-def get_output_from_binary(result: TestResult) -> Optional[List[Dict]]:
-    """Get output from compiled binary and parse it"""
-    binary_file = os.path.join(COMPILED_DIR, f"iter_{result.iteration}_bin")
-    if not os.path.exists(binary_file):
-        return None
+@functools.lru_cache(maxsize=None)
+def harness_object() -> str:
+    """Object file of the I/O harness, compiled once into the build cache"""
+    with open(HARNESS_SOURCE, "r", encoding="utf-8") as f:
+        source = f.read()
+    with open(HARNESS_HEADER, "r", encoding="utf-8") as f:
+        source += f.read()
+    build_key = source_hash(source, CPP_COMPILER, COMPILE_FLAGS + ["-c"])
+    with build_cache.lock(build_key):
+        cached_object = build_cache.get_binary(build_key)
+        if cached_object:
+            return cached_object
+        build_output = os.path.join(BUILD_CACHE_DIR, f"harness_{build_key[:16]}_{os.getpid()}.o")
+        with tracer.span("compile", source_hash=build_key[:12], target="harness"):
+            compile_result = subprocess.run([CPP_COMPILER, *COMPILE_FLAGS, "-c", HARNESS_SOURCE, "-o", build_output],
+                                            capture_output=True, text=True)
+        if compile_result.returncode != 0:
+            raise RuntimeError(f"Harness build failed:\n{compile_result.stderr}")
+        harness = build_cache.put_binary(build_key, build_output)
+        os.remove(build_output)
+        return harness
+
+
+def candidate_compile_args() -> Tuple[List[str], List[str], List[str]]:
+    """(flags in the build key, include arguments, objects to link) for building a candidate"""
+    if not HARNESS_MODE:
+        return COMPILE_FLAGS, [], []
+    harness = harness_object()
+    include_dir = os.path.dirname(os.path.abspath(HARNESS_HEADER))
+    # The harness object's cache name is its own build key, so a harness change rebuilds every candidate
+    return COMPILE_FLAGS + [f"harness:{os.path.basename(harness)}"], ["-I", include_dir], [harness]
+
+
+def build_candidate(cpp_code: str, result: TestResult) -> Optional[str]:
+    """Compile through the build cache; returns the cached binary path or None on failure"""
+    key_flags, include_args, link_objects = candidate_compile_args()
+    build_key = source_hash(cpp_code, CPP_COMPILER, key_flags)
+    cache_status = result.details.setdefault("cache", {"binary": "miss", "result": "miss"})
+    result.details["source_hash"] = build_key
+
+    # Concurrent candidates with identical source must not compile into the same files
+    with build_cache.lock(build_key):
+        cached_binary = build_cache.get_binary(build_key)
+        if cached_binary:
+            cache_status["binary"] = "hit"
+            return cached_binary
+
+        cached_error = build_cache.get_compile_error(build_key)
+        if cached_error is not None:
+            cache_status["binary"] = "hit"
+            result.errors = f"COMPILE ERROR:\n{cached_error}"
+            return None
+
+        # Save C++ code
+        build_source = os.path.join(COMPILED_DIR, f"build_{build_key[:16]}.cpp")
+        build_output = os.path.join(COMPILED_DIR, f"build_{build_key[:16]}{EXE_SUFFIX}")
+        with open(build_source, "w", encoding="utf-8") as f:
+            f.write(cpp_code)
 
-    with open(result.input_file, "r", encoding="utf-8") as f:
-        input_data = f.read()
+        # Compile with optimizations
+        compile_start = time.perf_counter()
+        with tracer.span("compile", source_hash=build_key[:12]):
+            compile_result = subprocess.run(
+                [CPP_COMPILER, *COMPILE_FLAGS, *include_args, build_source, *link_objects,
+                 "-o", build_output],
+                capture_output=True,
+                text=True
+            )
+        result.details["compile_time"] = time.perf_counter() - compile_start
+        os.remove(build_source)
 
-    try:
-        run_result = subprocess.run(
-            [binary_file],
-            input=input_data,
-            capture_output=True,
-            text=True,
-            timeout=15
-        )
-        if run_result.returncode == 0:
-            try:
-                return json.loads(run_result.stdout)
-            except json.JSONDecodeError:
-                return None
-    except Exception:
-        pass
-    return None
+        if compile_result.returncode != 0:
+            build_cache.put_compile_error(build_key, compile_result.stderr)
+            result.errors = f"COMPILE ERROR:\n{compile_result.stderr}"
+            return None
+
+        binary = build_cache.put_binary(build_key, build_output)
+        os.remove(build_output)
+        return binary
+
+
+def compile_and_run(cpp_code: str, input_file: str, iteration: int, candidate: int = 0,
+                    persistent: Optional[bool] = None) -> TestResult:
+    """Scheduler job: evaluate a candidate on one input file, tracing it as one span"""
+    with tracer.span("compile_and_run", iteration=iteration, candidate=candidate, input_file=input_file) as span:
+        result = evaluate_input_file(cpp_code, input_file, iteration, candidate, persistent)
+        cache_status = result.details.get("cache", {})
+        span.set("binary_cache", cache_status.get("binary"))
+        span.set("result_cache", cache_status.get("result"))
+        span.set("passed", result.correction_success)
+    # Worker processes hand their spans to the final report through the trace directory
+    tracer.flush()
+    return result
 
 
-def compile_and_run(cpp_code: str, input_file: str, iteration: int) -> TestResult:
+def evaluate_input_file(cpp_code: str, input_file: str, iteration: int, candidate: int = 0,
+                        persistent: Optional[bool] = None) -> TestResult:
     result = TestResult()
     result.input_file = input_file
     result.iteration = iteration
+    result.candidate = candidate
     result.algorithm_code = cpp_code
     result.details["code_size"] = len(cpp_code)
 
@@ -385,75 +648,66 @@ def compile_and_run(cpp_code: str, input_file: str, iteration: int) -> TestResul
         return result
 
     try:
-        # Prepare file names
-        binary_file = os.path.join(COMPILED_DIR, f"iter_{iteration}_bin")
-
-        # Save C++ code
-        with open(CPP_SOURCE, "w", encoding="utf-8") as f:
-            f.write(cpp_code)
-
-        # Compile with optimizations
-        compile_start = time.time()
-        compile_result = subprocess.run(
-            [CPP_COMPILER, "-std=c++17", "-O2", CPP_SOURCE,
-             "-o", binary_file],
-            capture_output=True,
-            text=True
-        )
-        result.details["compile_time"] = time.time() - compile_start
-
-        if compile_result.returncode != 0:
-            result.errors = f"COMPILE ERROR:\n{compile_result.stderr}"
+        binary_file = os.path.join(COMPILED_DIR, f"iter_{artifact_tag(iteration, candidate)}_bin{EXE_SUFFIX}")
+        binary = build_candidate(cpp_code, result)
+        if binary is None:
             return result
 
         result.compile_success = True
-
-        # Get binary size
-        if os.path.exists(binary_file):
-            result.details["binary_size"] = os.path.getsize(binary_file)
-
-        # Run with input data
-        with open(input_file, "r", encoding="utf-8") as f:
-            input_data = f.read()
-
-        run_start = time.time()
-        run_result = subprocess.run(
-            [binary_file],
-            input=input_data,
-            capture_output=True,
-            text=True,
-            timeout=15
-        )
-        result.execution_time = time.time() - run_start
-
-        if run_result.returncode != 0:
-            result.errors = f"RUNTIME ERROR ({run_result.returncode}):\n{run_result.stderr}"
-            return result
-
-        # Validate JSON structure
-        if not validate_json_output(run_result.stdout):
-            result.errors = f"INVALID OUTPUT: Not a valid JSON array\n{run_result.stdout[:200]}..."
+        result.details["binary_size"] = os.path.getsize(binary)
+        copy_atomic(binary, binary_file)
+
+        build_key = result.details["source_hash"]
+        input_key = evaluation_key(input_file)
+        cache_status = result.details["cache"]
+
+        # Reuse the evaluation of an identical build on identical input
+        cached_result = build_cache.get_result(build_key, input_key)
+        if cached_result is not None:
+            cache_status["result"] = "hit"
+            restore_cached_result(result, cached_result)
+            if result.correction_success:
+                save_iteration_artifacts(iteration, cpp_code, binary_file, candidate)
+                if cached_result.get("output_file"):
+                    save_corrected_file(input_file, iteration, cached_result["output_file"], candidate)
+                else:
+                    # Entries recorded before outputs were kept as files hold the points inline
+                    save_corrected_data(input_file, iteration, cached_result["output"], candidate)
             return result
 
-        # Parse and validate output
-        try:
-            input_points = json.loads(input_data)
-            output_points = json.loads(run_result.stdout)
-
-            correction_quality, analysis = analyze_results(input_points, output_points)
-            result.anomaly_detected = input_points != output_points
-            result.correction_success = correction_quality
-            result.details.update(analysis)
-
-            # Save artifacts on success
+        if (IO_FORMAT == "json" and not is_binary_trace(input_file) and
+                os.path.getsize(input_file) > STREAMING_SCORE_BYTES):
+            # Too large to materialise; repeated benchmark runs are skipped for such traces
+            output_file = build_cache.output_path(build_key, input_key)
+            run_and_analyze_streaming(result, binary, input_file, output_file)
+            if deterministic_outcome(result):
+                build_cache.put_result(build_key, input_key, cache_entry(result, output_file))
             if result.correction_success:
-                save_iteration_artifacts(iteration, cpp_code, binary_file)
-                save_corrected_data(input_file, iteration, output_points)
+                save_iteration_artifacts(iteration, cpp_code, binary_file, candidate)
+                save_corrected_file(input_file, iteration, output_file, candidate)
+            return result
 
-        except json.JSONDecodeError as e:
-            result.errors = f"JSON PARSE ERROR: {str(e)}\nOutput: {run_result.stdout[:200]}..."
-        except Exception as e:
-            result.errors = f"ANALYSIS ERROR: {str(e)}"
+        output_points = run_and_analyze(result, binary, input_file, IO_FORMAT, persistent)
+        if result.correction_success and BENCHMARK_MODE:
+            try:
+                benchmark_candidate(result, binary, input_file)
+            except BenchmarkError as e:
+                # One passing run is not enough when repeated runs crash, time out or disagree
+                result.correction_success = False
+                result.errors = f"BENCHMARK FAILED: {str(e)}"
+        output_file = None
+        if result.correction_success:
+            # Kept beside the cache entry rather than inline, like streamed outputs
+            output_file = build_cache.output_path(build_key, input_key)
+            with tracer.span("write_corrected", points=len(output_points)):
+                output_points.save_json(output_file)
+        if deterministic_outcome(result):
+            build_cache.put_result(build_key, input_key, cache_entry(result, output_file))
+
+        # Save artifacts on success
+        if result.correction_success:
+            save_iteration_artifacts(iteration, cpp_code, binary_file, candidate)
+            save_corrected_file(input_file, iteration, output_file, candidate)
 
     except subprocess.TimeoutExpired:
         result.errors = "Execution timed out (15s)"
@@ -463,62 +717,511 @@ def compile_and_run(cpp_code: str, input_file: str, iteration: int) -> TestResul
     return result
 
 
-def get_ai_response(prompt: str) -> str:
-    response = client.chat.completions.create(
-        model="gpt-4.1",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.3,
-        max_tokens=5000
-    )
-    return sanitize_code(response.choices[0].message.content)
+def benchmark_candidate(result: TestResult, binary: str, input_file: str):
+    """Time a passing binary over repeated runs into result.details; raises BenchmarkError if any run fails"""
+    command, stdin_data = candidate_command(binary, input_file, IO_FORMAT)
+    with tracer.span("benchmark", runs=BENCHMARK_RUNS, io_format=IO_FORMAT):
+        result.details["benchmark"] = benchmark_binary(
+            command, stdin_data, BENCHMARK_RUNS, BENCHMARK_WARMUP, timeout=15,
+            memory_limit=MEMORY_LIMIT_BYTES, cpu_limit=CPU_LIMIT_SECONDS, runner=measure_runner())
+    if IO_FORMAT == "binary":
+        # Same detection work behind JSON I/O; the difference is the text parsing/formatting cost
+        command, stdin_data = candidate_command(binary, input_file, "json")
+        with tracer.span("benchmark", runs=BENCHMARK_RUNS, io_format="json"):
+            json_benchmark = benchmark_binary(
+                command, stdin_data, BENCHMARK_RUNS, BENCHMARK_WARMUP, timeout=15,
+                memory_limit=MEMORY_LIMIT_BYTES, cpu_limit=CPU_LIMIT_SECONDS, runner=measure_runner())
+        result.details["io_cost"] = {
+            "binary_median": result.details["benchmark"]["median"],
+            "json_median": json_benchmark["median"],
+            "json_overhead": json_benchmark["median"] - result.details["benchmark"]["median"]
+        }
+
+
+def evaluation_key(input_file: str) -> str:
+    """Result-cache key of an input file under the settings that can change an evaluation's outcome"""
+    settings = json.dumps([IO_FORMAT, MEMORY_LIMIT_BYTES, CPU_LIMIT_SECONDS,
+                           BENCHMARK_MODE, BENCHMARK_RUNS, BENCHMARK_WARMUP])
+    settings_hash = hashlib.sha256(settings.encode("utf-8")).hexdigest()[:16]
+    return f"{IO_FORMAT}_{settings_hash}_{file_hash(input_file)}"
+
+
+def deterministic_outcome(result: TestResult) -> bool:
+    """Whether a rerun would reach the same verdict: passed, wrong output or unparseable output.
+
+    Timeouts, resource limits, crashes and harness errors can depend on the
+    machine's load, so they are never memoized.
+    """
+    return not result.errors or result.errors.startswith("INVALID OUTPUT")
+
+
+def candidate_command(binary_file: str, input_file: str, io_format: str) -> Tuple[List[str], bytes]:
+    """Command line and stdin payload to run a candidate on a trace file in the given I/O format"""
+    with open(input_file, "rb") as f:
+        data = f.read()
+    trace_is_binary = data.startswith(MAGIC)
+    if io_format == "binary":
+        if not trace_is_binary:
+            data = TrackBuffer.from_json_bytes(data).to_binary()
+        return [binary_file, BINARY_FLAG], data
+    if trace_is_binary:
+        data = TrackBuffer.from_binary(data).to_json_bytes()
+    return [binary_file], data
+
+
+@functools.lru_cache(maxsize=None)
+def measure_runner() -> Optional[str]:
+    """Compiled measure_run launcher from the build cache; None where it is unavailable"""
+    if os.name != "posix" or not os.path.exists(MEASURE_RUNNER_SOURCE):
+        return None
+    with open(MEASURE_RUNNER_SOURCE, "r", encoding="utf-8") as f:
+        source = f.read()
+    build_key = source_hash(source, CPP_COMPILER, COMPILE_FLAGS)
+    with build_cache.lock(build_key):
+        cached_binary = build_cache.get_binary(build_key)
+        if cached_binary or build_cache.get_compile_error(build_key) is not None:
+            return cached_binary
+        build_output = os.path.join(BUILD_CACHE_DIR, f"measure_run_{build_key[:16]}_{os.getpid()}{EXE_SUFFIX}")
+        with tracer.span("compile", source_hash=build_key[:12], target="measure_run"):
+            compile_result = subprocess.run([CPP_COMPILER, *COMPILE_FLAGS, MEASURE_RUNNER_SOURCE, "-o", build_output],
+                                            capture_output=True, text=True)
+        if compile_result.returncode != 0:
+            print(f"measure_run build failed, peak RSS includes the harness:\n{compile_result.stderr[:500]}")
+            build_cache.put_compile_error(build_key, compile_result.stderr)
+            return None
+        binary = build_cache.put_binary(build_key, build_output)
+        os.remove(build_output)
+        return binary
+
+
+@contextlib.contextmanager
+def candidate_pool(command: List[str], persistent: Optional[bool] = None) -> Iterator[WorkerPool]:
+    """Check out the worker pool for a candidate command, reused across traces within this process.
+
+    Each scheduler process already runs one job at a time, so a pool holds a
+    single worker. Once more pools exist than candidates are evaluated at a
+    time, the least recently used idle ones are closed.
+    """
+    key = tuple(command)
+    with worker_pools_lock:
+        pool = worker_pools.get(key)
+        if pool is None:
+            if not PERSISTENT_WORKERS:
+                persistent = False
+            pool = WorkerPool(command, 1, timeout=15, probe=probe_payload(command), persistent=persistent,
+                              memory_limit=MEMORY_LIMIT_BYTES, cpu_limit=CPU_LIMIT_SECONDS,
+                              runner=measure_runner())
+            worker_pools[key] = pool
+        worker_pools.move_to_end(key)
+        worker_pool_users[key] = worker_pool_users.get(key, 0) + 1
+    try:
+        yield pool
+    finally:
+        with worker_pools_lock:
+            worker_pool_users[key] -= 1
+            evicted = []
+            for other in list(worker_pools):
+                if len(worker_pools) <= max(1, len(CANDIDATE_TEMPERATURES)):
+                    break
+                if not worker_pool_users.get(other):
+                    worker_pool_users.pop(other, None)
+                    evicted.append(worker_pools.pop(other))
+        # Closed outside the lock: a worker may take a second to exit
+        for other in evicted:
+            other.close()
+
+
+def probe_payload(command: List[str]) -> bytes:
+    """An empty trace in the I/O format the command selects"""
+    return encode_points([]) if BINARY_FLAG in command else PROBE_REQUEST
+
+
+def close_worker_pools():
+    with worker_pools_lock:
+        pools = list(worker_pools.values())
+        worker_pools.clear()
+        worker_pool_users.clear()
+    for pool in pools:
+        pool.close()
+
+
+def run_and_analyze(result: TestResult, binary_file: str, input_file: str,
+                    io_format: str, persistent: Optional[bool] = None) -> Optional[TrackBuffer]:
+    """Run a compiled binary on one input file and score its output into result"""
+    command, input_data = candidate_command(binary_file, input_file, io_format)
+    with candidate_pool(command, persistent) as pool:
+        result.details["persistent"] = pool.persistent
+
+        run_start = time.perf_counter()
+        try:
+            with tracer.span("execute", persistent=pool.persistent, bytes_in=len(input_data)):
+                stdout_data, usage = pool.process_measured(input_data)
+        except LimitExceeded as e:
+            result.execution_time = time.perf_counter() - run_start
+            result.errors = f"RESOURCE LIMIT: {str(e)}"
+            return None
+        except WorkerError as e:
+            result.execution_time = time.perf_counter() - run_start
+            result.errors = f"RUNTIME ERROR:\n{str(e)}"
+            return None
+    result.execution_time = time.perf_counter() - run_start
+    record_resources(result, usage)
+
+    # Both tracks are parsed into columnar buffers; no list of point dicts is built
+    with tracer.span("parse_output", io_format=io_format, bytes_out=len(stdout_data)):
+        if io_format == "binary":
+            try:
+                output_points = TrackBuffer.from_binary(stdout_data)
+            except ValueError as e:
+                result.errors = f"INVALID OUTPUT: {str(e)}\n{stdout_data[:64]!r}..."
+                return None
+            input_points = TrackBuffer.from_binary(input_data)
+        else:
+            try:
+                output_points = TrackBuffer.from_json_bytes(stdout_data)
+            except ValueError as e:
+                stdout = stdout_data[:200].decode("utf-8", errors="replace")
+                result.errors = f"INVALID OUTPUT: {str(e)}\nOutput: {stdout}..."
+                return None
+            input_points = TrackBuffer.from_json_bytes(input_data)
+
+    # Parse and validate output
+    try:
+        with tracer.span("analyze", points=len(input_points)):
+            correction_quality, analysis = analyze_results_batch(input_points, output_points)
+        result.anomaly_detected = input_points != output_points
+        result.correction_success = correction_quality
+        result.details.update(analysis)
+        result.details["io_format"] = io_format
+        return output_points
+
+    except Exception as e:
+        result.errors = f"ANALYSIS ERROR: {str(e)}"
+    return None
+
+
+def run_and_analyze_streaming(result: TestResult, binary_file: str, input_file: str, output_file: str):
+    """Run a binary with file-backed stdin/stdout and score the output in one streaming pass"""
+    partial_file = output_file + ".partial"
+    with open(input_file, "rb") as stdin, open(partial_file, "wb") as stdout:
+        run_start = time.perf_counter()
+        with tracer.span("execute", persistent=False, streamed=True):
+            returncode, _, stderr, usage = run_measured([binary_file], timeout=15, memory_limit=MEMORY_LIMIT_BYTES,
+                                                        cpu_limit=CPU_LIMIT_SECONDS, stdin=stdin, stdout=stdout,
+                                                        runner=measure_runner())
+        result.execution_time = time.perf_counter() - run_start
+    record_resources(result, usage)
+
+    exceeded = limit_error(returncode, stderr, usage, MEMORY_LIMIT_BYTES, CPU_LIMIT_SECONDS)
+    if exceeded or returncode != 0:
+        os.remove(partial_file)
+        if exceeded:
+            result.errors = f"RESOURCE LIMIT: {exceeded}"
+        else:
+            result.errors = f"RUNTIME ERROR ({returncode}):\n{stderr.decode('utf-8', errors='replace')}"
+        return
+    os.replace(partial_file, output_file)
+
+    try:
+        with tracer.span("analyze", streamed=True), open(input_file, "r", encoding="utf-8") as input_stream, \
+                open(output_file, "r", encoding="utf-8") as output_stream:
+            correction_quality, analysis = analyze_stream(iter_json_points(input_stream),
+                                                          iter_json_points(output_stream))
+        result.anomaly_detected = (not analysis["point_count_match"] or analysis["changed_points"] > 0 or
+                                   analysis["time_mismatches"] > 0)
+        result.correction_success = correction_quality
+        result.details.update(analysis)
+        result.details["streamed"] = True
+
+    except ValueError as e:
+        with open(output_file, "r", encoding="utf-8") as f:
+            result.errors = f"INVALID OUTPUT: {str(e)}\n{f.read(200)}..."
+    except Exception as e:
+        result.errors = f"ANALYSIS ERROR: {str(e)}"
+
+
+def record_resources(result: TestResult, usage: Optional[Dict]):
+    """Store one run's resource usage; memory_usage is its peak RSS in bytes"""
+    if usage is None:
+        return
+    result.details["resources"] = usage
+    result.details["memory_usage"] = usage["peak_rss"]
+
+
+def cache_entry(result: TestResult, output_file: Optional[str] = None) -> Dict:
+    """Portion of a TestResult that depends only on the build and the input file"""
+    return {
+        "anomaly_detected": result.anomaly_detected,
+        "correction_success": result.correction_success,
+        "execution_time": result.execution_time,
+        "errors": result.errors,
+        "details": {k: v for k, v in result.details.items() if k not in ("cache", "compile_time")},
+        "output_file": output_file if result.correction_success else None
+    }
+
+
+def restore_cached_result(result: TestResult, entry: Dict):
+    """Fill a fresh TestResult from a memoized cache entry"""
+    result.anomaly_detected = entry["anomaly_detected"]
+    result.correction_success = entry["correction_success"]
+    result.execution_time = entry["execution_time"]
+    result.errors = entry["errors"]
+    result.details.update(entry["details"])
+
+
+def cached_ai_response(prompt: str, temperature: float) -> Tuple[str, Optional[str]]:
+    """Look up a recorded completion; returns (cache key, content or None)"""
+    key = response_cache.key(MODEL, temperature, MAX_TOKENS, prompt)
+    # Aborted completions are only replayed; a live run requests a fresh one
+    content = response_cache.get(key, include_aborted=LLM_REPLAY)
+    if content is None and LLM_REPLAY:
+        raise ReplayMissError(f"No recorded response for prompt {key[:12]} (temperature {temperature})")
+    return key, content
+
+
+def code_stream() -> CodeStream:
+    return CodeStream(MAX_CODE_LENGTH, forbidden_code, STREAM_MAX_PROSE_CHARS)
+
+
+def finish_request(stream: CodeStream, span, temperature: float, cache_hit: bool, cancelled: bool) -> str:
+    """Record a completion's latency and outcome; returns its code or raises CompletionAborted"""
+    stats = stream.stats()
+    stats.update(temperature=temperature, cache_hit=cache_hit,
+                 # Deltas approximate tokens; a cancelled request saves at most the rest of max_tokens
+                 max_tokens_saved=max(MAX_TOKENS - stream.deltas, 0) if cancelled else 0)
+    llm_requests.append(stats)
+    span.set("outcome", stats["outcome"])
+    span.set("deltas", stream.deltas)
+    if stream.abort_reason:
+        raise CompletionAborted(stream.abort_reason)
+    return sanitize_code(stream.text)
+
+
+def get_ai_response(prompt: str, temperature: float = TEMPERATURE) -> str:
+    with tracer.span("llm_request", temperature=temperature) as span:
+        key, content = cached_ai_response(prompt, temperature)
+        span.set("cache_hit", content is not None)
+        stream = code_stream()
+        cancelled = False
+        if content is not None:
+            stream.feed(content)
+        elif STREAM_COMPLETIONS:
+            response = openai_client().chat.completions.create(
+                model=MODEL,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=temperature,
+                max_tokens=MAX_TOKENS,
+                stream=True
+            )
+            try:
+                for chunk in response:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        stream.feed(chunk.choices[0].delta.content)
+                        if stream.stopped:
+                            cancelled = True
+                            break
+            finally:
+                # Closing the response cancels generation of the remaining tokens
+                response.close()
+            response_cache.put(key, stream.text, MODEL, temperature, MAX_TOKENS, prompt,
+                               aborted=stream.abort_reason is not None)
+        else:
+            response = openai_client().chat.completions.create(
+                model=MODEL,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=temperature,
+                max_tokens=MAX_TOKENS
+            )
+            stream.feed(response.choices[0].message.content)
+            response_cache.put(key, stream.text, MODEL, temperature, MAX_TOKENS, prompt,
+                               aborted=stream.abort_reason is not None)
+        return finish_request(stream, span, temperature, content is not None, cancelled)
+
+
+async def get_ai_response_async(async_client: AsyncOpenAI, prompt: str, temperature: float) -> str:
+    # Concurrent requests share the event loop thread, so their spans overlap on one timeline row
+    with tracer.span("llm_request", temperature=temperature) as span:
+        key, content = cached_ai_response(prompt, temperature)
+        span.set("cache_hit", content is not None)
+        stream = code_stream()
+        cancelled = False
+        if content is not None:
+            stream.feed(content)
+        elif STREAM_COMPLETIONS:
+            response = await async_client.chat.completions.create(
+                model=MODEL,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=temperature,
+                max_tokens=MAX_TOKENS,
+                stream=True
+            )
+            try:
+                async for chunk in response:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        stream.feed(chunk.choices[0].delta.content)
+                        if stream.stopped:
+                            cancelled = True
+                            break
+            finally:
+                await response.close()
+            response_cache.put(key, stream.text, MODEL, temperature, MAX_TOKENS, prompt,
+                               aborted=stream.abort_reason is not None)
+        else:
+            response = await async_client.chat.completions.create(
+                model=MODEL,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=temperature,
+                max_tokens=MAX_TOKENS
+            )
+            stream.feed(response.choices[0].message.content)
+            response_cache.put(key, stream.text, MODEL, temperature, MAX_TOKENS, prompt,
+                               aborted=stream.abort_reason is not None)
+        return finish_request(stream, span, temperature, content is not None, cancelled)
+
+
+def report_llm_requests(iteration: int) -> List[Dict]:
+    """Print and hand over the completion requests made since the last report"""
+    requests = llm_requests[:]
+    llm_requests.clear()
+    if not requests:
+        return requests
+    fetched = [request for request in requests if not request["cache_hit"]]
+    line = f"Iteration {iteration} completions: {len(requests)} request(s), {len(requests) - len(fetched)} cached"
+    if fetched:
+        latency = sum(request["latency"] for request in fetched) / len(fetched)
+        first = [request["first_delta"] for request in fetched if request["first_delta"] is not None]
+        first_text = f", first token {sum(first) / len(first):.2f}s" if first else ""
+        line += (f", mean latency {latency:.2f}s{first_text}, "
+                 f"up to {sum(request['max_tokens_saved'] for request in fetched)} tokens saved")
+    print(line)
+    for request in requests:
+        if request["abort_reason"]:
+            print(f"- Cancelled (temperature {request['temperature']}): {request['abort_reason']}")
+    return requests
+
+
+async def generate_candidates(prompt: str, iteration: int,
+                              scheduler: JobScheduler) -> List[Tuple[str, List[TestResult]]]:
+    """Request one candidate per temperature concurrently and evaluate each as it arrives"""
+    semaphore = asyncio.Semaphore(MAX_IN_FLIGHT_REQUESTS)
+    loop = asyncio.get_running_loop()
+
+    async with AsyncOpenAI(api_key=openai_client().api_key, base_url=OPENAI_BASE_URL) as async_client:
+        async def request(candidate: int, temperature: float) -> Tuple[int, str]:
+            async with semaphore:
+                return candidate, await get_ai_response_async(async_client, prompt, temperature)
+
+        tasks = [asyncio.ensure_future(request(candidate, temperature))
+                 for candidate, temperature in enumerate(CANDIDATE_TEMPERATURES)]
+        evaluations = []
+        for next_response in asyncio.as_completed(tasks):
+            try:
+                candidate, cpp_code = await next_response
+            except CompletionAborted:
+                continue  # reported with the iteration's completions
+            except Exception as e:
+                print(f"AI Error: {str(e)}")
+                continue
+            cpp_code = cpp_code[:MAX_CODE_LENGTH]
+            print(f"Candidate {candidate} received (temperature {CANDIDATE_TEMPERATURES[candidate]})")
+            # Evaluation blocks on compilers and subprocesses, so keep it off the event loop
+            evaluations.append(loop.run_in_executor(
+                None, evaluate_candidate, cpp_code, iteration, scheduler, candidate))
+
+        candidates = []
+        for evaluation in asyncio.as_completed(evaluations):
+            candidates.append(await evaluation)
+    return candidates
+
+
+def robust_time(result: TestResult) -> Tuple[float, float]:
+    """Speed sort key: benchmark median then p95 when benchmarked, else the single run"""
+    benchmark = result.details.get("benchmark")
+    if benchmark:
+        return benchmark["median"], benchmark["p95"]
+    return result.execution_time, result.execution_time
+
+
+def select_best_candidate(candidates: List[Tuple[str, List[TestResult]]]) -> Tuple[str, List[TestResult]]:
+    """Most input files passed, then lowest total median time of the passing runs"""
+    def rank(candidate: Tuple[str, List[TestResult]]):
+        passed = [r for r in candidate[1] if r.correction_success]
+        return -len(passed), sum(robust_time(r)[0] for r in passed)
+    return min(candidates, key=rank)
 
 
 def save_iteration_result(result: TestResult):
     """Save detailed results for each iteration"""
     filename = os.path.join(RESULTS_DIR,
-                            f"iter_{result.iteration}_{result.input_file.replace('.', '_')}.json")
+                            f"iter_{artifact_tag(result.iteration, result.candidate)}_{result.input_file.replace('.', '_')}.json")
     with open(filename, "w", encoding="utf-8") as f:
         json.dump(result.__dict__, f, indent=2)
 
 
-def generate_final_report(results: List[TestResult]):
-    """Generate detailed final report with statistics"""
-    successful_results = [r for r in results if r.correction_success]
+def generate_final_report(run_id: str):
+    """Generate detailed final report with statistics from the run's rows in the results store"""
+    rows = results_store.run_results(run_id)
+    successful_rows = [row for row in rows if row["correction_success"]]
 
     report = {
         "summary": {
-            "total_iterations": len(results),
-            "successful_runs": len(successful_results),
+            "run_id": run_id,
+            "total_iterations": len({row["iteration"] for row in rows}),
+            "successful_runs": len({row["iteration"] for row in successful_rows}),
             "best_iteration": None,
+            "best_candidate": None,
             "best_execution_time": float('inf'),
             "initial_execution_time": None
         },
         "iterations": []
     }
 
-    if successful_results:
-        best_result = min(successful_results, key=lambda x: x.execution_time)
-        report["summary"]["best_iteration"] = best_result.iteration
-        report["summary"]["best_execution_time"] = best_result.execution_time
-        report["summary"]["initial_execution_time"] = successful_results[0].execution_time
-
-    for result in results:
+    if successful_rows:
+        best_row = min(successful_rows, key=lambda row: (row["robust_time"], row["robust_p95"]))
+        first_iteration = successful_rows[0]["iteration"]
+        report["summary"]["best_iteration"] = best_row["iteration"]
+        report["summary"]["best_candidate"] = best_row["candidate"]
+        report["summary"]["best_code_hash"] = best_row["code_hash"]
+        report["summary"]["best_execution_time"] = best_row["robust_time"]
+        report["summary"]["best_benchmark"] = best_row["details"].get("benchmark")
+        report["summary"]["best_resources"] = best_row["details"].get("resources")
+        report["summary"]["initial_execution_time"] = min(row["robust_time"] for row in successful_rows
+                                                          if row["iteration"] == first_iteration)
+        if AUTOTUNE:
+            with tracer.span("autotune", iteration=best_row["iteration"], candidate=best_row["candidate"]):
+                report["autotune"] = autotune_best(results_store.source(best_row["code_hash"]))
+
+    for row in rows:
         report["iterations"].append({
-            "iteration": result.iteration,
-            "timestamp": result.timestamp,
-            "input_file": result.input_file,
-            "compile_success": result.compile_success,
-            "correction_success": result.correction_success,
-            "execution_time": result.execution_time,
-            "code_size": result.details["code_size"],
-            "binary_size": result.details["binary_size"],
-            "test_cases_passed": result.details.get("test_cases_passed", 0),
-            "unchanged_points": result.details.get("unchanged_points", 0),
-            "changed_points": result.details.get("changed_points", 0),
-            "time_mismatches": result.details.get("time_mismatches", 0),
-            "errors": result.errors
+            "iteration": row["iteration"],
+            "candidate": row["candidate"],
+            "timestamp": row["timestamp"],
+            "input_file": row["input_file"],
+            "code_hash": row["code_hash"],
+            "compile_success": bool(row["compile_success"]),
+            "correction_success": bool(row["correction_success"]),
+            "execution_time": row["execution_time"],
+            "benchmark": row["details"].get("benchmark"),
+            "resources": row["details"].get("resources"),
+            "memory_usage": row["details"].get("memory_usage", 0),
+            "code_size": row["code_size"],
+            "binary_size": row["binary_size"],
+            "test_cases_passed": row["details"].get("test_cases_passed", 0),
+            "unchanged_points": row["unchanged_points"] or 0,
+            "changed_points": row["changed_points"] or 0,
+            "time_mismatches": row["time_mismatches"] or 0,
+            "cache": row["details"].get("cache"),
+            "pipeline": row["details"].get("pipeline"),
+            "errors": row["errors"]
         })
 
+    report["leaderboard"] = results_store.leaderboard(INPUT_FILES, LEADERBOARD_SIZE)
+    report["regressions"] = results_store.regressions(run_id, REGRESSION_TOLERANCE)
+
+    if tracer.enabled:
+        # Spans from every process; open trace.json in chrome://tracing or ui.perfetto.dev
+        report["trace"] = summarize(tracer.export(os.path.join(RESULTS_DIR, "trace.json")))
+
     with open(os.path.join(RESULTS_DIR, "final_report.json"), "w", encoding="utf-8") as f:
         json.dump(report, f, indent=2)
 
@@ -529,82 +1232,364 @@ def generate_final_report(results: List[TestResult]):
     if report["summary"]["best_iteration"] is not None:
         print(f"\nBest Algorithm (Iteration {report['summary']['best_iteration']}):")
         print(f"- Execution Time: {report['summary']['best_execution_time']:.4f}s")
+        best_benchmark = report["summary"]["best_benchmark"]
+        if best_benchmark:
+            print(f"- Median/p95 over {best_benchmark['runs']} runs: "
+                  f"{best_benchmark['median']:.4f}s / {best_benchmark['p95']:.4f}s "
+                  f"(stddev {best_benchmark['stddev']:.4f}s)")
+        best_resources = report["summary"]["best_resources"]
+        if best_resources:
+            print(f"- Peak RSS: {best_resources['peak_rss'] / (1024 * 1024):.1f} MB, "
+                  f"CPU: {best_resources['cpu_user']:.4f}s user / {best_resources['cpu_sys']:.4f}s sys, "
+                  f"context switches: {best_resources['voluntary_switches']} voluntary / "
+                  f"{best_resources['involuntary_switches']} involuntary")
 
         # Save best version
-        best_code = os.path.join(RESULTS_DIR, f"iteration_{report['summary']['best_iteration']}_code.cpp")
+        best_tag = artifact_tag(report["summary"]["best_iteration"], report["summary"]["best_candidate"])
+        best_code = os.path.join(RESULTS_DIR, f"iteration_{best_tag}_code.cpp")
         if os.path.exists(best_code):
-            shutil.copy2(best_code, "best_algorithm.cpp")
-            print(f"- Code saved to: best_algorithm.cpp")
+            # Harness candidates are not whole programs, so they never replace best_algorithm.cpp
+            best_file = "best_correct_points.cpp" if HARNESS_MODE else "best_algorithm.cpp"
+            shutil.copy2(best_code, best_file)
+            print(f"- Code saved to: {best_file}")
+
+    if report["leaderboard"]:
+        print("\nLeaderboard across all runs (total time over the input files):")
+        for position, entry in enumerate(report["leaderboard"][:5], 1):
+            current = " (this run)" if entry["run_id"] == run_id else ""
+            print(f"{position}. {entry['total_time']:.4f}s {entry['code_hash'][:12]}, "
+                  f"iteration {entry['iteration']} of run {entry['run_id']}{current}")
+    for regression in report["regressions"]:
+        current = f"{regression['best_time']:.4f}s" if regression["best_time"] is not None else "no passing result"
+        print(f"Regression on {regression['input_file']}: {current} vs "
+              f"{regression['previous_best']:.4f}s in run {regression['previous_run']}")
+
+    if report.get("trace"):
+        print("\nWhere the time went (self time, excluding nested spans):")
+        for row in sorted(report["trace"], key=lambda row: row["self"], reverse=True)[:8]:
+            print(f"- {row['span']}: {row['self']:.3f}s self, {row['total']:.3f}s total over {row['count']} spans")
+
+
+def autotune_best(cpp_code: str) -> Dict:
+    """Autotune the best candidate's compiler flags; the fastest identical binary is saved with the report"""
+    print("\nAutotuning compiler flags of the best candidate...")
+    traces = generate_traces(AUTOTUNE_DIR, AUTOTUNE_POINTS, TRACE_PROFILES)
+    check_files = [path for path in INPUT_FILES if not is_binary_trace(path)]
+    try:
+        tuning = autotune(cpp_code, traces, check_files, AUTOTUNE_DIR, build_cache,
+                          runner=measure_runner(), harness=HARNESS_SOURCE if HARNESS_MODE else None,
+                          baseline_flags=COMPILE_FLAGS)
+    except Exception as e:
+        tuning = {"error": f"{type(e).__name__}: {str(e)[:300]}"}
+    print_report(tuning)
+    if tuning.get("best"):
+        tuned_binary = os.path.join(RESULTS_DIR, f"best_algorithm_tuned{EXE_SUFFIX}")
+        copy_atomic(tuning["best"]["binary"], tuned_binary)
+        tuning["best"]["binary"] = tuned_binary
+        print(f"- Tuned binary saved to: {tuned_binary}")
+    return tuning
+
+
+def syntax_check(cpp_code: str, result: TestResult) -> bool:
+    """Front-end only compile (-fsyntax-only), skipped when the build cache already knows the outcome"""
+    key_flags, include_args, _ = candidate_compile_args()
+    build_key = source_hash(cpp_code, CPP_COMPILER, key_flags)
+    # Concurrent candidates with identical source must not check through the same file
+    with build_cache.lock(build_key):
+        if build_cache.get_binary(build_key) or build_cache.get_compile_error(build_key) is not None:
+            return True
+
+        source_file = os.path.join(COMPILED_DIR, f"syntax_{build_key[:16]}.cpp")
+        with open(source_file, "w", encoding="utf-8") as f:
+            f.write(cpp_code)
+        with tracer.span("syntax_compile", source_hash=build_key[:12]):
+            check = subprocess.run([CPP_COMPILER, *COMPILE_FLAGS, "-fsyntax-only", *include_args, source_file],
+                                   capture_output=True, text=True)
+        os.remove(source_file)
+        if check.returncode != 0:
+            # A syntax error fails the optimised build too, so it is cached as that build's error
+            build_cache.put_compile_error(build_key, check.stderr)
+            result.errors = f"COMPILE ERROR:\n{check.stderr}"
+            return False
+        return True
+
+
+def evaluate_candidate(cpp_code: str, iteration: int, scheduler: JobScheduler,
+                       candidate: int = 0) -> Tuple[str, List[TestResult]]:
+    """Evaluate a candidate through stages ordered by cost, stopping at the first failure.
+
+    Stages: regex validation, -fsyntax-only, optimised build, the smallest
+    input file, then the remaining files in parallel. With FAIL_FAST off every
+    input file is run once the build succeeds. Per-stage times and the exit
+    reason are stored in each result's details["pipeline"].
+    """
+    input_files = sorted(INPUT_FILES, key=os.path.getsize)
+    pipeline = {"stages": [], "exit_stage": None, "exit_reason": "passed"}
+    build_result = TestResult()
+    build_result.input_file = input_files[0]
+    build_result.iteration = iteration
+    build_result.candidate = candidate
+    build_result.algorithm_code = cpp_code
+    build_result.details["code_size"] = len(cpp_code)
+    build_result.details["pipeline"] = pipeline
+    iteration_results = []
+    binary = None
+
+    def run_jobs(files: List[str], persistent: Optional[bool]) -> bool:
+        jobs = [(cpp_code, input_file, iteration, candidate, persistent) for input_file in files]
+        print(f"Testing with {', '.join(files)}...")
+        results = scheduler.map(compile_and_run, jobs)
+        iteration_results.extend(results)
+        failed = [r for r in results if not r.correction_success]
+        if failed:
+            pipeline["exit_reason"] = (f"{len(failed)}/{len(results)} input files failed: "
+                                       f"{failed[0].errors.splitlines()[0] if failed[0].errors else 'no correction'}")
+        return not failed
+
+    def stage(name: str, check) -> bool:
+        start = time.perf_counter()
+        with tracer.span(f"stage:{name}", iteration=iteration, candidate=candidate) as span:
+            passed = check()
+            span.set("passed", passed)
+        pipeline["stages"].append({"stage": name, "time": time.perf_counter() - start, "passed": passed})
+        pipeline["exit_stage"] = name
+        if not passed and build_result.errors:
+            pipeline["exit_reason"] = build_result.errors.splitlines()[0]
+        return passed
+
+    def validate() -> bool:
+        validation_error = validate_code_structure(cpp_code)
+        if validation_error:
+            build_result.errors = f"Validation error: {validation_error}"
+        return validation_error is None
+
+    def build() -> bool:
+        nonlocal binary
+        binary = build_candidate(cpp_code, build_result)
+        return binary is not None
+
+    completed = (stage("validate", validate) and
+                 (not SYNTAX_CHECK or stage("syntax", lambda: syntax_check(cpp_code, build_result))) and
+                 stage("build", build))
+    if completed:
+        measure_runner()  # build the launcher here rather than in every worker process
+        persistent = None
+        if PERSISTENT_WORKERS:
+            # Probe once here so the worker processes skip the probe timeout for one-shot candidates
+            command = candidate_command(binary, input_files[0], IO_FORMAT)[0]
+            with tracer.span("probe_persistent", candidate=candidate) as span:
+                persistent = supports_persistent(command, probe_payload(command))
+                span.set("persistent", persistent)
+        if FAIL_FAST:
+            if stage("smallest", lambda: run_jobs(input_files[:1], persistent)) and len(input_files) > 1:
+                stage("remaining", lambda: run_jobs(input_files[1:], persistent))
+        else:
+            stage("all", lambda: run_jobs(input_files, persistent))
+    else:
+        iteration_results.append(build_result)
+
+    if pipeline["exit_reason"] != "passed":
+        print(f"Stopped at stage '{pipeline['exit_stage']}': {pipeline['exit_reason'][:200]}")
+
+    # Jobs reuse the binary built above; report that build rather than their cache lookup
+    with tracer.span("write_results", iteration=iteration, candidate=candidate):
+        for result in iteration_results:
+            result.details["pipeline"] = pipeline
+            if result is not build_result and "cache" in build_result.details and "cache" in result.details:
+                result.details["compile_time"] = build_result.details["compile_time"]
+                result.details["cache"]["binary"] = build_result.details["cache"]["binary"]
+            save_iteration_result(result)
+    return cpp_code, iteration_results
 
 
 def main():
-    clean_environment()
-    results = []
-    prompt = generate_initial_prompt()
-    feedback = "Initial version - no previous results"
+    parser = argparse.ArgumentParser(description="LLM-driven optimisation of the GPS anomaly correction algorithm")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue from the last completed iteration in the checkpoint")
+    parser.add_argument("--extend", type=int, default=0, metavar="N",
+                        help="With --resume, run N iterations beyond the checkpointed run's limit")
+    args = parser.parse_args()
+    if args.extend and not args.resume:
+        parser.error("--extend requires --resume")
+
+    state = None
+    if args.resume:
+        setup_environment()
+        state = load_checkpoint(CHECKPOINT_FILE)
+        if state is None:
+            parser.error(f"No checkpoint at {CHECKPOINT_FILE}")
+        state["max_iterations"] += args.extend
+    else:
+        clean_environment()
+
+    # Checkpoints from before the results store get a fresh run id
+    run_id = (state or {}).get("run_id") or new_run_id()
+    results_store.start_run(run_id, {"model": MODEL, "input_files": INPUT_FILES, "io_format": IO_FORMAT,
+                                     "harness_mode": HARNESS_MODE, "compile_flags": COMPILE_FLAGS})
+    try:
+        with tracer.span("run", resume=args.resume), JobScheduler(MAX_WORKERS, MAX_PENDING_JOBS) as scheduler:
+            run_iterations(scheduler, run_id, state)
+    finally:
+        close_worker_pools()
+    generate_final_report(run_id)
+    results_store.close()
 
-    for iteration in range(1, MAX_ITERATIONS + 1):
-        print(f"\n--- Iteration {iteration} ---")
 
-        # Get AI-generated code
-        print("Generating algorithm...")
-        try:
-            cpp_code = get_ai_response(prompt)
-            if len(cpp_code) > MAX_CODE_LENGTH:
-                cpp_code = cpp_code[:MAX_CODE_LENGTH]
-        except Exception as e:
-            print(f"AI Error: {str(e)}")
-            continue
-
-        # Test with all input files
-        iteration_results = []
-        execution_stats = {
-            "total": len(INPUT_FILES),
-            "passed": 0,
-            "avg_time": 0,
-            "best_time": float('inf')
-        }
+def result_from_dict(data: Dict) -> TestResult:
+    result = TestResult()
+    result.__dict__.update(data)
+    return result
 
-        for input_file in INPUT_FILES:
-            print(f"Testing with {input_file}...")
-            result = compile_and_run(cpp_code, input_file, iteration)
-            iteration_results.append(result)
-            save_iteration_result(result)
 
-            if result.correction_success:
-                execution_stats["passed"] += 1
-                execution_stats["avg_time"] += result.execution_time
-                if result.execution_time < execution_stats["best_time"]:
-                    execution_stats["best_time"] = result.execution_time
-
-            if result.errors:
-                print(f"Test failed: {result.errors[:200]}")
-
-        # Calculate averages
-        if execution_stats["passed"] > 0:
-            execution_stats["avg_time"] /= execution_stats["passed"]
-
-        # Store best result
-        successful_results = [r for r in iteration_results if r.correction_success]
-        if successful_results:
-            best_iteration_result = min(successful_results, key=lambda x: x.execution_time)
-            results.append(best_iteration_result)
-
-        # Check completion condition
-        if len([r for r in results if r.correction_success]) >= MAX_ITERATIONS:
-            break
-
-        # Prepare feedback for next iteration
-        errors = "\n".join(r.errors for r in iteration_results if r.errors)
-        feedback = (f"Iteration {iteration} Results:\n"
-                    f"- Success Rate: {execution_stats['passed']}/{execution_stats['total']}\n"
-                    f"- Avg Time: {execution_stats['avg_time']:.2f}s\n"
-                    f"- Best Time: {execution_stats['best_time']:.2f}s\n"
-                    f"- Main Issues: {errors[:500] or 'None'}")
-
-        prompt = generate_improvement_prompt(cpp_code, errors, execution_stats, feedback)
-
-    generate_final_report(results)
+def iteration_entry(iteration: int, selected_code: Optional[str], completions: List[Dict],
+                    candidates: List[Tuple[str, List[TestResult]]]) -> Dict:
+    """History record of one iteration; one without a usable completion has no candidates"""
+    return {
+        "iteration": iteration,
+        "selected_code": selected_code,
+        "completions": completions,
+        "candidates": [{"code": code, "results": [r.__dict__ for r in candidate_results]}
+                       for code, candidate_results in candidates]
+    }
+
+
+def checkpoint_state(run_id: str, iteration: int, max_iterations: int, prompt: str, feedback: str,
+                     results: List[TestResult], history: List[Dict]) -> Dict:
+    """Everything run_iterations needs to continue after the given iteration"""
+    return {
+        "run_id": run_id,
+        "completed_iteration": iteration,
+        "max_iterations": max_iterations,
+        "prompt": prompt,
+        "feedback": feedback,
+        "results": [result.__dict__ for result in results],
+        "iterations": history
+    }
+
+
+def run_iterations(scheduler: JobScheduler, run_id: str, state: Optional[Dict] = None) -> List[TestResult]:
+    """Run the optimisation loop, from scratch or from a checkpoint state; returns the best result per iteration"""
+    if state is None:
+        state = checkpoint_state(run_id, 0, MAX_ITERATIONS, generate_initial_prompt(),
+                                 "Initial version - no previous results", [], [])
+    results = [result_from_dict(data) for data in state["results"]]
+    history = state["iterations"]
+    prompt = state["prompt"]
+    feedback = state["feedback"]
+    first_iteration = state["completed_iteration"] + 1
+    max_iterations = state["max_iterations"]
+    if first_iteration > max_iterations:
+        print(f"Checkpointed run already completed {max_iterations} iterations; use --extend N to continue")
+    elif first_iteration > 1:
+        print(f"Resuming after iteration {state['completed_iteration']} of {max_iterations}")
+
+    def checkpoint(iteration: int, candidates: List[Tuple[str, List[TestResult]]]):
+        """Persist an iteration's rows with the loop state, whether or not it produced candidates"""
+        with tracer.span("checkpoint", iteration=iteration):
+            # Recorded with the checkpoint, so a resumed run neither loses nor repeats an iteration's rows
+            results_store.record(run_id, [result for _, candidate_results in candidates
+                                          for result in candidate_results])
+            save_checkpoint(CHECKPOINT_FILE, checkpoint_state(run_id, iteration, max_iterations, prompt,
+                                                              feedback, results, history))
+
+    for iteration in range(first_iteration, max_iterations + 1):
+        with tracer.span("iteration", iteration=iteration):
+            print(f"\n--- Iteration {iteration} ---")
+
+            # Get AI-generated code
+            print("Generating algorithm...")
+            if len(CANDIDATE_TEMPERATURES) > 1:
+                candidates = asyncio.run(generate_candidates(prompt, iteration, scheduler))
+                completions = report_llm_requests(iteration)
+                if not candidates:
+                    if LLM_REPLAY:
+                        print("Replay ended: no recorded responses for this prompt")
+                        break
+                    history.append(iteration_entry(iteration, None, completions, []))
+                    checkpoint(iteration, [])  # the prompt is retried by the next iteration
+                    continue
+                # The best passing candidate feeds the next improvement prompt
+                cpp_code, iteration_results = select_best_candidate(candidates)
+            else:
+                try:
+                    cpp_code = get_ai_response(prompt)
+                    if len(cpp_code) > MAX_CODE_LENGTH:
+                        cpp_code = cpp_code[:MAX_CODE_LENGTH]
+                except ReplayMissError as e:
+                    print(f"Replay ended: {str(e)}")
+                    break
+                except CompletionAborted:
+                    cpp_code = None  # reported with the iteration's completions
+                except Exception as e:
+                    print(f"AI Error: {str(e)}")
+                    cpp_code = None
+                finally:
+                    completions = report_llm_requests(iteration)
+                if cpp_code is None:
+                    history.append(iteration_entry(iteration, None, completions, []))
+                    checkpoint(iteration, [])  # the prompt is retried by the next iteration
+                    continue
+
+                # Test with all input files
+                cpp_code, iteration_results = evaluate_candidate(cpp_code, iteration, scheduler)
+                candidates = [(cpp_code, iteration_results)]
+
+            execution_stats = {
+                "total": len(INPUT_FILES),
+                "passed": 0,
+                "avg_time": 0,
+                "best_time": float('inf'),
+                "peak_rss": 0,
+                "avg_cpu": 0,
+                "avg_switches": 0
+            }
+
+            for result in iteration_results:
+                if result.correction_success:
+                    run_time = robust_time(result)[0]
+                    execution_stats["passed"] += 1
+                    execution_stats["avg_time"] += run_time
+                    if run_time < execution_stats["best_time"]:
+                        execution_stats["best_time"] = run_time
+                    usage = result.details.get("resources")
+                    if usage:
+                        execution_stats["peak_rss"] = max(execution_stats["peak_rss"], usage["peak_rss"])
+                        execution_stats["avg_cpu"] += usage["cpu_user"] + usage["cpu_sys"]
+                        execution_stats["avg_switches"] += usage["voluntary_switches"] + usage["involuntary_switches"]
+
+                if result.errors:
+                    print(f"Test failed: {result.errors[:200]}")
+
+            # Calculate averages
+            if execution_stats["passed"] > 0:
+                execution_stats["avg_time"] /= execution_stats["passed"]
+                execution_stats["avg_cpu"] /= execution_stats["passed"]
+                execution_stats["avg_switches"] /= execution_stats["passed"]
+
+            # Store best result
+            successful_results = [r for r in iteration_results if r.correction_success]
+            if successful_results:
+                best_iteration_result = min(successful_results, key=robust_time)
+                results.append(best_iteration_result)
+
+            # Prepare feedback for next iteration
+            errors = "\n".join(r.errors for r in iteration_results if r.errors)
+            feedback = (f"Iteration {iteration} Results:\n"
+                        f"- Success Rate: {execution_stats['passed']}/{execution_stats['total']}\n"
+                        f"- Avg Time: {execution_stats['avg_time']:.2f}s\n"
+                        f"- Best Time: {execution_stats['best_time']:.2f}s\n"
+                        f"- Main Issues: {errors[:500] or 'None'}")
+
+            prompt = generate_improvement_prompt(cpp_code, errors, execution_stats, feedback)
+
+            history.append(iteration_entry(iteration, cpp_code, completions, candidates))
+            checkpoint(iteration, candidates)
+
+            # Check completion condition
+            if len([r for r in results if r.correction_success]) >= max_iterations:
+                break
+
+    return results
 
 
 if __name__ == "__main__":
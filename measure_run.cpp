@@ -0,0 +1,68 @@
+// Launcher used by process_metrics.py to measure one candidate run.
+//
+//   measure_run <report fd> <memory limit bytes|-> <cpu limit seconds|-> <command> [args...]
+//
+// Forks, applies the limits to the child and execs the command; stdin, stdout
+// and stderr are inherited. After reaping the child it writes one line to the
+// report fd:  <exit|signal|error> <code> <maxrss> <utime s> <stime s> <nvcsw> <nivcsw>
+// The child is forked from this small process rather than from the Python
+// harness, so its peak RSS does not include the harness's address space.
+#include <cerrno>
+#include <cstdio>
+#include <cstdlib>
+#include <cstring>
+#include <string>
+#include <sys/resource.h>
+#include <sys/time.h>
+#include <sys/types.h>
+#include <sys/wait.h>
+#include <unistd.h>
+
+static double seconds(const timeval& tv) {
+    return tv.tv_sec + tv.tv_usec / 1e6;
+}
+
+int main(int argc, char* argv[]) {
+    if (argc < 5) {
+        std::fprintf(stderr, "usage: measure_run <fd> <memory|-> <cpu|-> <command> [args...]\n");
+        return 2;
+    }
+    int report_fd = std::atoi(argv[1]);
+    std::string memory = argv[2], cpu = argv[3];
+
+    pid_t pid = fork();
+    if (pid < 0) {
+        dprintf(report_fd, "error %d 0 0 0 0 0\n", errno);
+        return 2;
+    }
+    if (pid == 0) {
+        close(report_fd);
+        if (memory != "-") {
+            rlim_t limit = std::strtoull(memory.c_str(), nullptr, 10);
+            rlimit rl{limit, limit};
+            setrlimit(RLIMIT_AS, &rl);
+        }
+        if (cpu != "-") {
+            rlim_t limit = std::strtoull(cpu.c_str(), nullptr, 10);
+            rlimit rl{limit, limit + 1};
+            setrlimit(RLIMIT_CPU, &rl);
+        }
+        execvp(argv[4], argv + 4);
+        std::perror("exec");
+        _exit(127);
+    }
+
+    int status = 0;
+    rusage usage{};
+    while (wait4(pid, &status, 0, &usage) < 0) {
+        if (errno != EINTR) {
+            dprintf(report_fd, "error %d 0 0 0 0 0\n", errno);
+            return 2;
+        }
+    }
+    const char* kind = WIFSIGNALED(status) ? "signal" : "exit";
+    int code = WIFSIGNALED(status) ? WTERMSIG(status) : WEXITSTATUS(status);
+    dprintf(report_fd, "%s %d %ld %.6f %.6f %ld %ld\n", kind, code, usage.ru_maxrss,
+            seconds(usage.ru_utime), seconds(usage.ru_stime), usage.ru_nvcsw, usage.ru_nivcsw);
+    return WIFSIGNALED(status) ? 128 + code : code;
+}
@@ -0,0 +1,211 @@
+import os
+import sys
+import math
+import signal
+import threading
+import subprocess
+from types import SimpleNamespace
+from typing import BinaryIO, Dict, List, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # Windows: no rlimits or rusage, runs are unlimited and unmeasured
+    resource = None
+
+# ru_maxrss is reported in kilobytes on Linux and in bytes on macOS
+MAXRSS_UNIT = 1 if sys.platform == "darwin" else 1024
+CPU_LIMIT_SIGNAL = -getattr(signal, "SIGXCPU", 24)  # the soft RLIMIT_CPU was reached
+
+
+def limit_process(pid: int, memory_limit: Optional[int], cpu_limit: Optional[float]):
+    """Apply an address-space limit (bytes) and a CPU-time limit (seconds) to a running process.
+
+    Used where the measure_run launcher is not available; prlimit is Linux-only,
+    elsewhere the limits are not enforced. Callers apply it before sending any
+    input, while the process is still blocked on stdin.
+    """
+    if resource is None or not hasattr(resource, "prlimit"):
+        return
+    try:
+        if memory_limit is not None:
+            resource.prlimit(pid, resource.RLIMIT_AS, (memory_limit, memory_limit))
+        if cpu_limit is not None:
+            seconds = max(1, math.ceil(cpu_limit))
+            resource.prlimit(pid, resource.RLIMIT_CPU, (seconds, seconds + 1))
+    except (ValueError, OSError):
+        pass
+
+
+def usage_from_rusage(usage, bytes_in: int, bytes_out: int) -> Dict:
+    return {
+        "peak_rss": usage.ru_maxrss * MAXRSS_UNIT,
+        "cpu_user": usage.ru_utime,
+        "cpu_sys": usage.ru_stime,
+        "voluntary_switches": usage.ru_nvcsw,
+        "involuntary_switches": usage.ru_nivcsw,
+        "bytes_in": bytes_in,
+        "bytes_out": bytes_out
+    }
+
+
+def parse_runner_report(line: str) -> Tuple[int, Optional[SimpleNamespace]]:
+    """Return code and rusage fields from measure_run's report line"""
+    kind, code, maxrss, utime, stime, nvcsw, nivcsw = line.split()
+    if kind == "error":
+        raise OSError(int(code), "measure_run could not start the command")
+    usage = SimpleNamespace(ru_maxrss=int(maxrss), ru_utime=float(utime), ru_stime=float(stime),
+                            ru_nvcsw=int(nvcsw), ru_nivcsw=int(nivcsw))
+    return (-int(code) if kind == "signal" else int(code)), usage
+
+
+def run_measured(command: List[str], input_data: Optional[bytes] = None, timeout: float = 15,
+                 memory_limit: Optional[int] = None, cpu_limit: Optional[float] = None,
+                 stdin: Optional[BinaryIO] = None, stdout: Optional[BinaryIO] = None,
+                 runner: Optional[str] = None) -> Tuple[int, bytes, bytes, Optional[Dict]]:
+    """Run a command under resource limits and return (returncode, stdout, stderr, usage).
+
+    usage covers exactly this run: peak RSS in bytes, user/system CPU seconds,
+    voluntary/involuntary context switches and the bytes written to its stdin
+    and read from its stdout. With runner (the compiled measure_run.cpp) the
+    command is forked from that small launcher; without it the child is reaped
+    with os.wait4, whose peak RSS also counts the harness's own address space
+    because Linux folds the pre-exec memory of the spawning process into it.
+    stdin/stdout may be files instead of in-memory data; usage is None where
+    neither is available. Raises subprocess.TimeoutExpired like subprocess.run.
+    """
+    if not hasattr(os, "wait4"):
+        run_result = subprocess.run(command, input=input_data, stdin=stdin,
+                                    stdout=stdout or subprocess.PIPE, stderr=subprocess.PIPE, timeout=timeout)
+        return run_result.returncode, run_result.stdout or b"", run_result.stderr, None
+
+    report_read = report_write = None
+    if runner:
+        report_read, report_write = os.pipe()
+        command_line = [runner, str(report_write),
+                        "-" if memory_limit is None else str(memory_limit),
+                        "-" if cpu_limit is None else str(max(1, math.ceil(cpu_limit))), *command]
+    else:
+        command_line = command
+    try:
+        # A new session lets a timeout kill the launcher and the candidate together
+        process = subprocess.Popen(command_line, stdin=stdin or subprocess.PIPE, stdout=stdout or subprocess.PIPE,
+                                   stderr=subprocess.PIPE, pass_fds=(report_write,) if runner else (),
+                                   start_new_session=True)
+    finally:
+        if report_write is not None:
+            os.close(report_write)
+    if not runner:
+        limit_process(process.pid, memory_limit, cpu_limit)
+    output = {"stdout": b"", "stderr": b"", "report": b""}
+
+    # Pipes are pumped by threads so the main thread is free to reap the child
+    def feed():
+        try:
+            process.stdin.write(input_data or b"")
+        except (BrokenPipeError, OSError):
+            pass
+        finally:
+            try:
+                process.stdin.close()
+            except OSError:
+                pass
+
+    def drain(name: str, pipe):
+        output[name] = pipe.read()
+
+    pumps = [threading.Thread(target=drain, args=("stderr", process.stderr), daemon=True)]
+    if stdin is None:
+        pumps.append(threading.Thread(target=feed, daemon=True))
+    if stdout is None:
+        pumps.append(threading.Thread(target=drain, args=("stdout", process.stdout), daemon=True))
+    if runner:
+        report = os.fdopen(report_read, "rb")
+        pumps.append(threading.Thread(target=drain, args=("report", report), daemon=True))
+    for pump in pumps:
+        pump.start()
+
+    timed_out = threading.Event()
+
+    def expire():
+        timed_out.set()
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except OSError:
+            pass
+
+    timer = threading.Timer(timeout, expire)
+    timer.start()
+    try:
+        _, status, rusage = os.wait4(process.pid, 0)
+    finally:
+        timer.cancel()
+    process.returncode = os.waitstatus_to_exitcode(status)
+    for pump in pumps:
+        pump.join()
+    for pipe in (process.stdin, process.stdout, process.stderr):
+        if pipe is not None:
+            pipe.close()
+    if runner:
+        report.close()
+    if timed_out.is_set():
+        raise subprocess.TimeoutExpired(command, timeout, output["stdout"], output["stderr"])
+
+    returncode = process.returncode
+    if runner and output["report"]:
+        returncode, rusage = parse_runner_report(output["report"].decode("ascii"))
+    bytes_in = os.fstat(stdin.fileno()).st_size if stdin is not None else len(input_data or b"")
+    bytes_out = os.fstat(stdout.fileno()).st_size if stdout is not None else len(output["stdout"])
+    return returncode, output["stdout"], output["stderr"], usage_from_rusage(rusage, bytes_in, bytes_out)
+
+
+def process_snapshot(pid: int) -> Optional[Dict]:
+    """Cumulative CPU and context switches of a running process, from /proc (Linux only)"""
+    try:
+        with open(f"/proc/{pid}/stat", "r") as f:
+            # Fields after the parenthesised command name; utime and stime are fields 14 and 15
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open(f"/proc/{pid}/status", "r") as f:
+            status = dict(line.split(":", 1) for line in f if ":" in line)
+    except (OSError, IndexError, ValueError):
+        return None
+    ticks = os.sysconf("SC_CLK_TCK")
+    return {
+        "peak_rss": int(status["VmHWM"].split()[0]) * 1024 if "VmHWM" in status else 0,
+        "cpu_user": int(fields[11]) / ticks,
+        "cpu_sys": int(fields[12]) / ticks,
+        "voluntary_switches": int(status.get("voluntary_ctxt_switches", 0)),
+        "involuntary_switches": int(status.get("nonvoluntary_ctxt_switches", 0))
+    }
+
+
+def reset_peak_rss(pid: int):
+    """Restart a process's VmHWM high-water mark so the next snapshot covers one request"""
+    try:
+        with open(f"/proc/{pid}/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def snapshot_delta(before: Optional[Dict], after: Optional[Dict], bytes_in: int, bytes_out: int) -> Optional[Dict]:
+    """Usage of one request served by a persistent process, in run_measured's format"""
+    if before is None or after is None:
+        return None
+    usage = {key: after[key] - before[key] for key in before if key != "peak_rss"}
+    usage["peak_rss"] = after["peak_rss"]
+    usage["bytes_in"] = bytes_in
+    usage["bytes_out"] = bytes_out
+    return usage
+
+
+def limit_error(returncode: int, stderr: bytes, usage: Optional[Dict], memory_limit: Optional[int],
+                cpu_limit: Optional[float]) -> Optional[str]:
+    """Describe a run that failed or was rejected because it reached a resource limit"""
+    if returncode == CPU_LIMIT_SIGNAL or (cpu_limit is not None and usage is not None and
+                                          usage["cpu_user"] + usage["cpu_sys"] > cpu_limit):
+        return f"CPU limit exceeded ({cpu_limit}s)"
+    # An allocation refused under RLIMIT_AS surfaces as bad_alloc, usually via std::terminate
+    if returncode != 0 and memory_limit is not None and any(
+            marker in stderr for marker in (b"bad_alloc", b"Cannot allocate memory", b"out of memory")):
+        return f"Memory limit exceeded ({memory_limit // (1024 * 1024)} MB)"
+    return None
@@ -0,0 +1,254 @@
+import os
+import json
+import uuid
+import sqlite3
+import hashlib
+import argparse
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+DEFAULT_PATH = "results.sqlite"
+LEADERBOARD_SIZE = 10
+REGRESSION_TOLERANCE = 0.1  # a run's best time may be this much slower than the previous best
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    started TEXT NOT NULL,
+    config TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sources (
+    code_hash TEXT PRIMARY KEY,
+    code TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id TEXT NOT NULL REFERENCES runs(run_id),
+    iteration INTEGER NOT NULL,
+    candidate INTEGER NOT NULL,
+    input_file TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    code_hash TEXT NOT NULL REFERENCES sources(code_hash),
+    build_hash TEXT,
+    compile_success INTEGER NOT NULL,
+    anomaly_detected INTEGER NOT NULL,
+    correction_success INTEGER NOT NULL,
+    execution_time REAL NOT NULL,
+    robust_time REAL NOT NULL,
+    robust_p95 REAL NOT NULL,
+    benchmark_runs INTEGER,
+    stddev REAL,
+    peak_rss INTEGER,
+    cpu_user REAL,
+    cpu_sys REAL,
+    compile_time REAL,
+    code_size INTEGER,
+    binary_size INTEGER,
+    changed_points INTEGER,
+    unchanged_points INTEGER,
+    time_mismatches INTEGER,
+    invalid_changes INTEGER,
+    remaining_anomalies INTEGER,
+    max_speed_violations INTEGER,
+    time_reversals INTEGER,
+    errors TEXT,
+    details TEXT NOT NULL,
+    UNIQUE (run_id, iteration, candidate, input_file)
+);
+CREATE INDEX IF NOT EXISTS results_by_file ON results (input_file, correction_success, robust_time);
+CREATE INDEX IF NOT EXISTS results_by_evaluation ON results (run_id, iteration, candidate);
+CREATE INDEX IF NOT EXISTS results_by_code ON results (code_hash);
+"""
+
+COUNTERS = ["changed_points", "unchanged_points", "time_mismatches", "invalid_changes", "remaining_anomalies",
+            "max_speed_violations", "time_reversals"]
+
+
+def new_run_id() -> str:
+    return f"{datetime.now().strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:6]}"
+
+
+def code_hash(code: str) -> str:
+    """Identity of an algorithm across runs, independent of compiler and flags"""
+    return hashlib.sha256(code.encode("utf-8")).hexdigest()
+
+
+class ResultsStore:
+    """Append-only SQLite store of every evaluated TestResult, across runs.
+
+    Rows are only ever inserted; recording the same (run, iteration,
+    candidate, input file) twice, as a resumed run may, keeps the first row.
+    Sources are stored once per code hash. The connection is opened on first
+    use, so importing processes that never record do not touch the file.
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH):
+        self.path = path
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            self._connection.row_factory = sqlite3.Row
+            self._connection.executescript(SCHEMA)
+        return self._connection
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def start_run(self, run_id: str, config: Dict):
+        with self._lock, self.connection:
+            self.connection.execute("INSERT OR IGNORE INTO runs (run_id, started, config) VALUES (?, ?, ?)",
+                                    (run_id, datetime.now().isoformat(), json.dumps(config)))
+
+    def record(self, run_id: str, results: Iterable) -> int:
+        """Append TestResults of a run in one transaction; returns the number of new rows"""
+        rows, sources = [], {}
+        for result in results:
+            source = code_hash(result.algorithm_code)
+            sources[source] = result.algorithm_code
+            details = result.details
+            benchmark = details.get("benchmark") or {}
+            resources = details.get("resources") or {}
+            rows.append((
+                run_id, result.iteration, result.candidate, result.input_file, result.timestamp, source,
+                details.get("source_hash"), int(result.compile_success), int(result.anomaly_detected),
+                int(result.correction_success), result.execution_time,
+                benchmark.get("median", result.execution_time), benchmark.get("p95", result.execution_time),
+                benchmark.get("runs"), benchmark.get("stddev"), resources.get("peak_rss"),
+                resources.get("cpu_user"), resources.get("cpu_sys"), details.get("compile_time"),
+                details.get("code_size"), details.get("binary_size"),
+                *(details.get(counter) for counter in COUNTERS),
+                result.errors, json.dumps(details, default=str)))
+        with self._lock, self.connection:
+            self.connection.executemany("INSERT OR IGNORE INTO sources (code_hash, code) VALUES (?, ?)",
+                                        sources.items())
+            before = self.connection.total_changes
+            self.connection.executemany(
+                f"INSERT OR IGNORE INTO results (run_id, iteration, candidate, input_file, timestamp, code_hash, "
+                f"build_hash, compile_success, anomaly_detected, correction_success, execution_time, robust_time, "
+                f"robust_p95, benchmark_runs, stddev, peak_rss, cpu_user, cpu_sys, compile_time, code_size, "
+                f"binary_size, {', '.join(COUNTERS)}, errors, details) "
+                f"VALUES ({', '.join('?' * (23 + len(COUNTERS)))})", rows)
+            return self.connection.total_changes - before
+
+    def _query(self, sql: str, params=()) -> List[Dict]:
+        with self._lock:
+            return [dict(row) for row in self.connection.execute(sql, params)]
+
+    def run_results(self, run_id: str) -> List[Dict]:
+        """Every recorded result of a run in evaluation order, details decoded"""
+        rows = self._query("SELECT * FROM results WHERE run_id = ? ORDER BY iteration, candidate, id", (run_id,))
+        for row in rows:
+            row["details"] = json.loads(row["details"])
+        return rows
+
+    def source(self, source_hash: str) -> Optional[str]:
+        """Code of an algorithm by its hash or an unambiguous hash prefix"""
+        rows = self._query("SELECT code FROM sources WHERE code_hash LIKE ? LIMIT 2", (source_hash + "%",))
+        return rows[0]["code"] if len(rows) == 1 else None
+
+    def runs(self) -> List[Dict]:
+        return self._query("SELECT run_id, started, config, "
+                           "(SELECT COUNT(*) FROM results WHERE results.run_id = runs.run_id) AS results "
+                           "FROM runs ORDER BY started")
+
+    def leaderboard(self, input_files: List[str], limit: int = LEADERBOARD_SIZE) -> List[Dict]:
+        """Fastest algorithms, across all runs, that passed on every one of input_files.
+
+        An evaluation is one (run, iteration, candidate); its time is the sum
+        of its robust times (benchmark median, else the single run) over the
+        files. Each algorithm appears once, with its fastest evaluation.
+        """
+        placeholders = ", ".join("?" * len(input_files))
+        return self._query(f"""
+            WITH evaluations AS (
+                SELECT run_id, iteration, candidate, code_hash, SUM(robust_time) AS total_time,
+                       MAX(peak_rss) AS peak_rss, MIN(timestamp) AS timestamp
+                FROM results WHERE input_file IN ({placeholders})
+                GROUP BY run_id, iteration, candidate
+                HAVING COUNT(*) = ? AND MIN(correction_success) = 1
+            ), ranked AS (
+                SELECT *, ROW_NUMBER() OVER (PARTITION BY code_hash ORDER BY total_time) AS position,
+                       COUNT(*) OVER (PARTITION BY code_hash) AS evaluations
+                FROM evaluations
+            )
+            SELECT code_hash, run_id, iteration, candidate, total_time, peak_rss, timestamp, evaluations
+            FROM ranked WHERE position = 1 ORDER BY total_time LIMIT ?""",
+            (*input_files, len(input_files), limit))
+
+    def regressions(self, run_id: str, tolerance: float = REGRESSION_TOLERANCE) -> List[Dict]:
+        """Input files on which a run's best passing time is slower than the best of all earlier runs.
+
+        A file that passed in an earlier run but never passed in this one is
+        a regression with best_time None.
+        """
+        return self._query("""
+            WITH earlier AS (
+                SELECT run_id FROM runs WHERE started < (SELECT started FROM runs WHERE run_id = :run)
+            ), previous AS (
+                SELECT input_file, MIN(robust_time) AS previous_best FROM results
+                WHERE run_id IN earlier AND correction_success = 1 GROUP BY input_file
+            ), current AS (
+                SELECT input_file, MIN(CASE WHEN correction_success = 1 THEN robust_time END) AS best_time
+                FROM results WHERE run_id = :run GROUP BY input_file
+            )
+            SELECT current.input_file, current.best_time, previous.previous_best,
+                   current.best_time / previous.previous_best AS ratio,
+                   (SELECT run_id FROM results WHERE input_file = current.input_file AND correction_success = 1
+                        AND run_id IN earlier ORDER BY robust_time LIMIT 1) AS previous_run
+            FROM current JOIN previous USING (input_file)
+            WHERE current.best_time IS NULL OR current.best_time > previous.previous_best * (1 + :tolerance)
+            ORDER BY current.input_file""", {"run": run_id, "tolerance": tolerance})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the results store of all optimisation runs")
+    parser.add_argument("--db", default=DEFAULT_PATH)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("runs", help="List recorded runs")
+    leaderboard = commands.add_parser("leaderboard", help="Fastest correct algorithms across all runs")
+    leaderboard.add_argument("--inputs", nargs="+", default=["points.json", "points2.json", "points3.json"])
+    leaderboard.add_argument("--limit", type=int, default=LEADERBOARD_SIZE)
+    regressions = commands.add_parser("regressions", help="Input files a run got slower on than earlier runs")
+    regressions.add_argument("run_id", nargs="?", help="Defaults to the latest run")
+    regressions.add_argument("--tolerance", type=float, default=REGRESSION_TOLERANCE)
+    source = commands.add_parser("source", help="Print the code of an algorithm by its hash prefix")
+    source.add_argument("code_hash")
+    args = parser.parse_args()
+
+    store = ResultsStore(args.db)
+    if args.command == "runs":
+        for run in store.runs():
+            print(f"{run['run_id']}  {run['started']}  {run['results']} results")
+    elif args.command == "leaderboard":
+        for position, row in enumerate(store.leaderboard(args.inputs, args.limit), 1):
+            print(f"{position:>3}. {row['total_time']:.4f}s  {row['code_hash'][:12]}  run {row['run_id']} "
+                  f"iteration {row['iteration']}.{row['candidate']} ({row['evaluations']} evaluations)")
+    elif args.command == "regressions":
+        runs = store.runs()
+        run_id = args.run_id or (runs[-1]["run_id"] if runs else None)
+        if run_id is None:
+            parser.error("no runs recorded")
+        rows = store.regressions(run_id, args.tolerance)
+        for row in rows:
+            current = f"{row['best_time']:.4f}s" if row["best_time"] is not None else "no passing result"
+            print(f"{row['input_file']}: {current} vs {row['previous_best']:.4f}s in run {row['previous_run']}")
+        if not rows:
+            print(f"No regressions in run {run_id}")
+    else:
+        code = store.source(args.code_hash)
+        if code is None:
+            parser.error(f"No single source matches {args.code_hash}")
+        print(code)
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
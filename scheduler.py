@@ -0,0 +1,58 @@
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, Future, wait
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+
+class JobScheduler:
+    """Run independent jobs on worker processes with a bounded submission queue.
+
+    Results come back in job order. Timeouts are enforced inside each job, so a
+    slow job only holds its own worker. With max_workers <= 1 jobs run inline.
+    Workers are spawned, not forked: the parent runs threads (candidate
+    evaluation, worker pool readers) whose state must not leak into children.
+    """
+
+    def __init__(self, max_workers: int, max_pending: Optional[int] = None):
+        self.max_workers = max(1, max_workers)
+        self.max_pending = max(1, max_pending or 2 * self.max_workers)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+
+    def __enter__(self) -> "JobScheduler":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True)
+                self._pool = None
+
+    def map(self, func: Callable[..., Any], jobs: Sequence[Tuple]) -> List[Any]:
+        """Run func(*job) for every job and return the results in job order"""
+        if self.max_workers == 1 or len(jobs) <= 1:
+            return [func(*job) for job in jobs]
+
+        # map() may be called from several threads when candidates are evaluated concurrently
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                 mp_context=multiprocessing.get_context("spawn"))
+
+        results: List[Any] = [None] * len(jobs)
+        pending: Dict[Future, int] = {}
+        next_job = 0
+
+        while next_job < len(jobs) or pending:
+            while next_job < len(jobs) and len(pending) < self.max_pending:
+                pending[self._pool.submit(func, *jobs[next_job])] = next_job
+                next_job += 1
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                results[pending.pop(future)] = future.result()
+
+        return results
@@ -0,0 +1,253 @@
+import json
+import math
+from typing import List, Dict, Tuple, Iterable, Iterator, TextIO, Union
+
+import numpy as np
+
+from distance import threshold_distances
+
+EARTH_RADIUS = 6371000  # Earth radius in meters
+MAX_SPEED = 50  # m/s (180 km/h)
+
+
+def calculate_distance(lat1: int, lon1: int, lat2: int, lon2: int) -> float:
+    """Calculate distance between two GPS points in meters using Haversine formula"""
+    lat1, lon1, lat2, lon2 = lat1 / 1e6, lon1 / 1e6, lat2 / 1e6, lon2 / 1e6
+
+    R = EARTH_RADIUS
+    dlat = math.radians(lat2 - lat1)
+    dlon = math.radians(lon2 - lon1)
+    a = (math.sin(dlat / 2) * math.sin(dlat / 2) +
+         math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) *
+         math.sin(dlon / 2) * math.sin(dlon / 2))
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+    return R * c
+
+
+def track_arrays(points: Union[List[Dict], "TrackBuffer"]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Load a TrackBuffer or a list of point dicts into float64 lat/lon/time arrays"""
+    from track_buffer import TrackBuffer  # imports this module through trace_format
+    if isinstance(points, TrackBuffer):
+        return points.lat.astype(np.float64), points.lon.astype(np.float64), points.time.astype(np.float64)
+    n = len(points)
+    lat = np.fromiter((p["lat"] for p in points), dtype=np.float64, count=n)
+    lon = np.fromiter((p["lon"] for p in points), dtype=np.float64, count=n)
+    times = np.fromiter((p["time"] for p in points), dtype=np.float64, count=n)
+    return lat, lon, times
+
+
+def segment_speeds(lat: np.ndarray, lon: np.ndarray, times: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Return (speed, time_diff) per segment; speed is NaN where time does not advance.
+
+    Speeds are only exact near MAX_SPEED: elsewhere they come from the fast
+    approximate kernel, which cannot move them across the threshold.
+    """
+    time_diff = np.diff(np.asarray(times, dtype=np.float64))
+    distance = threshold_distances(lat, lon, MAX_SPEED * time_diff)
+    forward = time_diff > 0
+    speed = np.full(time_diff.shape, np.nan)
+    np.divide(distance, time_diff, out=speed, where=forward)
+    return speed, time_diff
+
+
+def changed_mask(in_lat: np.ndarray, in_lon: np.ndarray,
+                 out_lat: np.ndarray, out_lon: np.ndarray) -> np.ndarray:
+    """Boolean mask of points whose coordinates differ between input and output"""
+    return (in_lat != out_lat) | (in_lon != out_lon)
+
+
+def analyze_arrays(in_lat: np.ndarray, in_lon: np.ndarray, in_time: np.ndarray,
+                   out_lat: np.ndarray, out_lon: np.ndarray, out_time: np.ndarray) -> Tuple[bool, Dict]:
+    """Whole-array equivalent of main.analyze_results operating on lat/lon/time arrays"""
+    n = len(in_lat)
+    analysis = {
+        "remaining_anomalies": 0,
+        "max_speed_violations": 0,
+        "time_reversals": 0,
+        "point_count_match": n == len(out_lat),
+        "unchanged_points": 0,
+        "changed_points": 0,
+        "time_mismatches": 0,
+        "invalid_changes": 0
+    }
+
+    if not analysis["point_count_match"]:
+        return False, analysis
+
+    analysis["time_mismatches"] = int(np.count_nonzero(in_time != out_time))
+
+    changed = changed_mask(in_lat, in_lon, out_lat, out_lon)
+    analysis["changed_points"] = int(np.count_nonzero(changed))
+    analysis["unchanged_points"] = n - analysis["changed_points"]
+
+    # A change is invalid when the input point was reachable at legal speed from both neighbours
+    if n > 2:
+        in_speed, _ = segment_speeds(in_lat, in_lon, in_time)
+        prev_speed = in_speed[:-1]
+        next_speed = in_speed[1:]
+        # NaN speeds (non-advancing time) compare False, matching the loop's time checks
+        legal = (prev_speed <= MAX_SPEED) & (next_speed <= MAX_SPEED)
+        analysis["invalid_changes"] = int(np.count_nonzero(changed[1:-1] & legal))
+
+    if n > 1:
+        out_speed, out_time_diff = segment_speeds(out_lat, out_lon, out_time)
+        analysis["time_reversals"] = int(np.count_nonzero(out_time_diff <= 0))
+        analysis["max_speed_violations"] = int(np.count_nonzero(out_speed > MAX_SPEED))
+
+    analysis["remaining_anomalies"] = analysis["max_speed_violations"] + analysis["time_reversals"]
+
+    correction_success = (
+            analysis["time_mismatches"] == 0 and
+            analysis["invalid_changes"] == 0 and
+            analysis["remaining_anomalies"] == 0
+    )
+
+    return correction_success, analysis
+
+
+def analyze_results_batch(input_data: Union[List[Dict], "TrackBuffer"],
+                          output_data: Union[List[Dict], "TrackBuffer"]) -> Tuple[bool, Dict]:
+    """Vectorized drop-in replacement for main.analyze_results; also takes TrackBuffers"""
+    return analyze_arrays(*track_arrays(input_data), *track_arrays(output_data))
+
+
+def iter_json_points(stream: TextIO, chunk_size: int = 1 << 16) -> Iterator[Dict]:
+    """Incrementally parse a JSON array of point objects from a text stream.
+
+    Holds at most a chunk plus one object in memory; raises ValueError on
+    malformed or truncated input.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    eof = False
+
+    def fill() -> bool:
+        nonlocal buffer, pos, eof
+        if eof:
+            return False
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            eof = True
+            return False
+        buffer = buffer[pos:] + chunk
+        pos = 0
+        return True
+
+    def next_char() -> str:
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos].isspace():
+                pos += 1
+            if pos < len(buffer):
+                return buffer[pos]
+            if not fill():
+                return ""
+
+    if next_char() != "[":
+        raise ValueError("Expected '[' at start of JSON array")
+    pos += 1
+
+    expect_value = next_char() != "]"
+    while expect_value:
+        next_char()
+        while True:
+            try:
+                point, end = decoder.raw_decode(buffer, pos)
+                break
+            except json.JSONDecodeError:
+                # The object may continue in the next chunk
+                if not fill():
+                    raise ValueError(f"Truncated or invalid JSON point near offset {pos}")
+        pos = end
+        yield point
+
+        separator = next_char()
+        if separator == ",":
+            pos += 1
+        elif separator == "]":
+            expect_value = False
+        else:
+            raise ValueError(f"Expected ',' or ']' after point, got {separator!r}")
+
+    pos += 1
+    if next_char() != "":
+        raise ValueError("Unexpected data after JSON array")
+
+
+def analyze_stream(input_points: Iterable[Dict], output_points: Iterable[Dict]) -> Tuple[bool, Dict]:
+    """Single-pass, constant-memory equivalent of main.analyze_results.
+
+    Input and output points are consumed in lockstep; invalid_changes for a
+    point is settled once the next input point (one point of lookahead) arrives.
+    """
+    analysis = {
+        "remaining_anomalies": 0,
+        "max_speed_violations": 0,
+        "time_reversals": 0,
+        "point_count_match": True,
+        "unchanged_points": 0,
+        "changed_points": 0,
+        "time_mismatches": 0,
+        "invalid_changes": 0
+    }
+
+    input_iter = iter(input_points)
+    output_iter = iter(output_points)
+    # Input window: two points before the current one, and whether the previous one changed
+    before_prev = prev = prev_out = None
+    prev_changed = False
+    index = 0
+
+    while True:
+        current = next(input_iter, None)
+        current_out = next(output_iter, None)
+        if current is None or current_out is None:
+            if current is not None or current_out is not None:
+                # Counts only mean something when the lengths match
+                mismatch = dict.fromkeys(analysis, 0)
+                mismatch["point_count_match"] = False
+                return False, mismatch
+            break
+
+        if current["time"] != current_out["time"]:
+            analysis["time_mismatches"] += 1
+
+        changed = current["lat"] != current_out["lat"] or current["lon"] != current_out["lon"]
+        if changed:
+            analysis["changed_points"] += 1
+        else:
+            analysis["unchanged_points"] += 1
+
+        # The previous point is interior now that it has a successor; settle its change
+        if prev_changed and index >= 2:
+            prev_time = prev["time"] - before_prev["time"]
+            next_time = current["time"] - prev["time"]
+            if prev_time > 0 and next_time > 0:
+                prev_speed = calculate_distance(before_prev["lat"], before_prev["lon"],
+                                                prev["lat"], prev["lon"]) / prev_time
+                next_speed = calculate_distance(prev["lat"], prev["lon"],
+                                                current["lat"], current["lon"]) / next_time
+                if prev_speed <= MAX_SPEED and next_speed <= MAX_SPEED:
+                    analysis["invalid_changes"] += 1
+
+        if prev_out is not None:
+            time_diff = current_out["time"] - prev_out["time"]
+            if time_diff <= 0:
+                analysis["time_reversals"] += 1
+            elif calculate_distance(prev_out["lat"], prev_out["lon"],
+                                    current_out["lat"], current_out["lon"]) / time_diff > MAX_SPEED:
+                analysis["max_speed_violations"] += 1
+
+        before_prev, prev, prev_out, prev_changed = prev, current, current_out, changed
+        index += 1
+
+    analysis["remaining_anomalies"] = analysis["max_speed_violations"] + analysis["time_reversals"]
+
+    correction_success = (
+            analysis["time_mismatches"] == 0 and
+            analysis["invalid_changes"] == 0 and
+            analysis["remaining_anomalies"] == 0
+    )
+
+    return correction_success, analysis
@@ -0,0 +1,215 @@
+import sys
+import json
+import math
+import time
+import random
+import argparse
+import socketserver
+from collections import deque
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from benchmark import percentile
+
+EARTH_RADIUS = 6371000.0  # Earth radius in meters, as in best_algorithm.cpp
+MAX_SPEED = 50.0  # m/s
+DEFAULT_WINDOW = 8  # max anomalous points held back waiting for the next good fix
+LATENCY_SAMPLES = 100000  # reservoir size for latency percentiles
+
+
+def haversine(lat1: int, lon1: int, lat2: int, lon2: int) -> float:
+    """Distance in meters between microdegree points, in the same operation order as best_algorithm.cpp"""
+    dlat = (lat2 - lat1) * 1e-6
+    dlon = (lon2 - lon1) * 1e-6
+    alat1 = lat1 * 1e-6 * math.pi / 180.0
+    alat2 = lat2 * 1e-6 * math.pi / 180.0
+    dlat_rad = dlat * math.pi / 180.0
+    dlon_rad = dlon * math.pi / 180.0
+    a = (math.sin(dlat_rad / 2) * math.sin(dlat_rad / 2) +
+         math.cos(alat1) * math.cos(alat2) *
+         math.sin(dlon_rad / 2) * math.sin(dlon_rad / 2))
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+    return EARTH_RADIUS * c
+
+
+def round_half_away(value: float) -> int:
+    """std::round semantics (halves away from zero)"""
+    whole = math.trunc(value)
+    return int(whole + math.copysign(1, value) * (abs(value - whole) >= 0.5))
+
+
+class LatencyStats:
+    """Per-point latency in seconds, kept as a bounded uniform reservoir"""
+
+    def __init__(self, samples: int = LATENCY_SAMPLES, seed: int = 0):
+        self.capacity = samples
+        self.samples: List[float] = []
+        self.count = 0
+        self.max = 0.0
+        self._rng = random.Random(seed)
+
+    def add(self, latency: float):
+        self.count += 1
+        self.max = max(self.max, latency)
+        if len(self.samples) < self.capacity:
+            self.samples.append(latency)
+        else:
+            slot = self._rng.randrange(self.count)
+            if slot < self.capacity:
+                self.samples[slot] = latency
+
+    def summary(self) -> Dict:
+        if not self.samples:
+            return {"points": 0}
+        return {
+            "points": self.count,
+            "p50": percentile(self.samples, 50),
+            "p95": percentile(self.samples, 95),
+            "p99": percentile(self.samples, 99),
+            "max": self.max
+        }
+
+
+class StreamingDetector:
+    """Online version of the speed-threshold detector with a bounded lookahead.
+
+    A point is anomalous when the segment to its predecessor or successor is
+    faster than max_speed, so every point is held until its successor arrives.
+    Anomalous points are then held until the next good point is known and are
+    linearly interpolated between the surrounding good points, exactly as the
+    batch detector does. If more than window anomalous points are waiting, the
+    oldest is released at the last good position instead; memory is O(window).
+    """
+
+    def __init__(self, window: int = DEFAULT_WINDOW, max_speed: float = MAX_SPEED,
+                 latency: Optional[LatencyStats] = None):
+        self.window = max(1, window)
+        self.max_speed = max_speed
+        self.latency = latency
+        self._last_good: Optional[Dict] = None
+        self._held: Deque[Tuple[Dict, float]] = deque()  # anomalous points awaiting the next good one
+        self._undecided: Optional[Tuple[Dict, float]] = None  # newest point, waiting for its successor
+        self._undecided_fast = False  # segment into the undecided point is too fast
+        self._undecided_first = True
+        self.forced = 0  # points released by the window limit rather than interpolated
+
+    def _fast(self, a: Dict, b: Dict) -> bool:
+        dt = b["time"] - a["time"]
+        return dt > 0 and haversine(a["lat"], a["lon"], b["lat"], b["lon"]) / dt > self.max_speed
+
+    def _emit(self, out: List[Dict], point: Dict, arrival: float):
+        if self.latency is not None:
+            self.latency.add(time.perf_counter() - arrival)
+        out.append(point)
+
+    def _settle(self, good: Dict, good_arrival: float, out: List[Dict]):
+        """A good point is known: interpolate the held points up to it and release them all"""
+        anchor = self._last_good
+        for point, arrival in self._held:
+            corrected = point
+            if anchor is not None and good["time"] != anchor["time"]:
+                alpha = (point["time"] - anchor["time"]) / (good["time"] - anchor["time"])
+                corrected = {"lat": round_half_away(anchor["lat"] + alpha * (good["lat"] - anchor["lat"])),
+                             "lon": round_half_away(anchor["lon"] + alpha * (good["lon"] - anchor["lon"])),
+                             "time": point["time"]}
+            self._emit(out, corrected, arrival)
+        self._held.clear()
+        self._emit(out, good, good_arrival)
+        self._last_good = good
+
+    def push(self, point: Dict, arrival: Optional[float] = None) -> List[Dict]:
+        """Add the next point; returns the corrected points that became final, in input order"""
+        arrival = time.perf_counter() if arrival is None else arrival
+        out: List[Dict] = []
+        if self._undecided is not None:
+            previous, previous_arrival = self._undecided
+            fast_after = self._fast(previous, point)
+            if not self._undecided_first and (self._undecided_fast or fast_after):
+                self._held.append(self._undecided)
+            else:
+                self._settle(previous, previous_arrival, out)
+            self._undecided_fast = fast_after
+            self._undecided_first = False
+
+            if len(self._held) > self.window:
+                # Latency bound: give up waiting for the next good fix for the oldest point
+                held, held_arrival = self._held.popleft()
+                anchor = self._last_good or held
+                self._emit(out, {"lat": anchor["lat"], "lon": anchor["lon"], "time": held["time"]}, held_arrival)
+                self.forced += 1
+        self._undecided = (point, arrival)
+        return out
+
+    def flush(self) -> List[Dict]:
+        """End of stream: the last point is never anomalous, so everything held is released"""
+        out: List[Dict] = []
+        if self._undecided is not None:
+            self._settle(*self._undecided, out)
+            self._undecided = None
+        return out
+
+
+def correct_stream(points: Iterable[Dict], window: int = DEFAULT_WINDOW,
+                   latency: Optional[LatencyStats] = None) -> Iterator[Dict]:
+    """Generator API: yield corrected points as soon as each becomes final"""
+    detector = StreamingDetector(window, latency=latency)
+    for point in points:
+        yield from detector.push(point)
+    yield from detector.flush()
+
+
+def serve_lines(reader: TextIO, writer: TextIO, window: int) -> Dict:
+    """One JSON point per input line in, one corrected point per output line out"""
+    latency = LatencyStats()
+    detector = StreamingDetector(window, latency=latency)
+
+    def write(points: List[Dict]):
+        for point in points:
+            writer.write(json.dumps(point, separators=(",", ":")) + "\n")
+        if points:
+            writer.flush()
+
+    for line in reader:
+        if line.strip():
+            point = json.loads(line)
+            write(detector.push({"lat": int(point["lat"]), "lon": int(point["lon"]), "time": int(point["time"])}))
+    write(detector.flush())
+    return {**latency.summary(), "forced": detector.forced}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming GPS anomaly correction over line-delimited JSON")
+    parser.add_argument("--window", type=int, default=DEFAULT_WINDOW,
+                        help="Max anomalous points held while waiting for the next good fix")
+    endpoint = parser.add_mutually_exclusive_group()
+    endpoint.add_argument("--port", type=int, help="Serve each TCP connection on 127.0.0.1 as a separate stream")
+    endpoint.add_argument("--unix-socket", help="Serve each connection on this Unix socket as a separate stream")
+    args = parser.parse_args()
+
+    if args.port is None and args.unix_socket is None:
+        stats = serve_lines(sys.stdin, sys.stdout, args.window)
+        print(f"Latency: {json.dumps(stats)}", file=sys.stderr)
+        return
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            with self.connection.makefile("r", encoding="utf-8") as reader, \
+                    self.connection.makefile("w", encoding="utf-8") as writer:
+                stats = serve_lines(reader, writer, args.window)
+            print(f"Connection closed, latency: {json.dumps(stats)}", file=sys.stderr)
+
+    if args.unix_socket:
+        server = socketserver.ThreadingUnixStreamServer(args.unix_socket, Handler)
+    else:
+        server = socketserver.ThreadingTCPServer(("127.0.0.1", args.port), Handler)
+    server.daemon_threads = True
+    print(f"Serving on {args.unix_socket or f'127.0.0.1:{args.port}'}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
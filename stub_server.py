@@ -0,0 +1,155 @@
+import json
+import time
+import argparse
+import itertools
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+
+
+class StubState:
+    """Canned completions served round-robin, plus request counters"""
+
+    def __init__(self, responses: List[str], delay: float, chunk_chars: int = 4, chunk_delay: float = 0.0):
+        self.responses = itertools.cycle(responses)
+        self.delay = delay
+        self.chunk_chars = chunk_chars  # streamed completions arrive in pieces of this size, about one token
+        self.chunk_delay = chunk_delay
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.cancelled_streams = 0
+
+    def next_response(self) -> str:
+        with self.lock:
+            self.requests += 1
+            return next(self.responses)
+
+
+def make_handler(state: StubState):
+    class ChatCompletionsHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self.send_error(404)
+                return
+
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            with state.lock:
+                state.in_flight += 1
+                state.max_in_flight = max(state.max_in_flight, state.in_flight)
+            try:
+                time.sleep(state.delay)
+                content = state.next_response()
+            finally:
+                with state.lock:
+                    state.in_flight -= 1
+
+            if body.get("stream"):
+                self.stream(body, content)
+                return
+
+            prompt_tokens = sum(len(m.get("content", "").split()) for m in body.get("messages", []))
+            completion_tokens = len(content.split())
+            payload = json.dumps({
+                "id": f"chatcmpl-stub-{state.requests}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model", "stub"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop"
+                }],
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens
+                }
+            }).encode("utf-8")
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def stream(self, body: dict, content: str):
+            """Server-sent chat.completion.chunk events; a client that disconnects cancels the rest"""
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.end_headers()
+
+            def event(delta: dict, finish_reason=None) -> bytes:
+                return ("data: " + json.dumps({
+                    "id": f"chatcmpl-stub-{state.requests}",
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": body.get("model", "stub"),
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+                }) + "\n\n").encode("utf-8")
+
+            sent = 0
+            try:
+                self.wfile.write(event({"role": "assistant", "content": ""}))
+                for start in range(0, len(content), state.chunk_chars):
+                    time.sleep(state.chunk_delay)
+                    self.wfile.write(event({"content": content[start:start + state.chunk_chars]}))
+                    self.wfile.flush()
+                    sent += 1
+                self.wfile.write(event({}, "stop") + b"data: [DONE]\n\n")
+                self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                with state.lock:
+                    state.cancelled_streams += 1
+                print(f"[stub] stream cancelled by the client after {sent} of "
+                      f"{-(-len(content) // state.chunk_chars)} chunks")
+
+        def log_message(self, format, *args):
+            print(f"[stub] {self.address_string()} {format % args} "
+                  f"(requests={state.requests}, max_in_flight={state.max_in_flight})")
+
+    return ChatCompletionsHandler
+
+
+def serve(host: str, port: int, responses: List[str], delay: float = 0.0, chunk_chars: int = 4,
+          chunk_delay: float = 0.0) -> ThreadingHTTPServer:
+    """Start a chat-completions stub; call serve_forever() or run it in a thread"""
+    return ThreadingHTTPServer((host, port), make_handler(StubState(responses, delay, chunk_chars, chunk_delay)))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Local chat-completions stub for offline runs of main.py "
+                    "(set OPENAI_BASE_URL=http://HOST:PORT/v1)")
+    parser.add_argument("responses", nargs="*", default=["best_algorithm.cpp"],
+                        help="C++ files served round-robin as fenced completions")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--delay", type=float, default=0.0,
+                        help="Seconds to wait before answering, to simulate API latency")
+    parser.add_argument("--chunk-chars", type=int, default=4,
+                        help="Characters per event of a streamed completion (stream=true requests)")
+    parser.add_argument("--chunk-delay", type=float, default=0.0,
+                        help="Seconds between streamed events, to simulate generation speed")
+    parser.add_argument("--trailer", default="",
+                        help="Text appended after every code block, e.g. an explanation a streamed client skips")
+    args = parser.parse_args()
+
+    responses = []
+    for path in args.responses:
+        with open(path, "r", encoding="utf-8") as f:
+            responses.append(f"```cpp\n{f.read()}\n```{args.trailer}")
+
+    server = serve(args.host, args.port, responses, args.delay, args.chunk_chars, args.chunk_delay)
+    print(f"Serving {len(responses)} canned completion(s) on http://{args.host}:{args.port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
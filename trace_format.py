@@ -0,0 +1,120 @@
+import json
+import struct
+import argparse
+from typing import BinaryIO, Dict, Iterable, Iterator, List
+
+from scoring import iter_json_points
+
+# Header: magic, format version, record size, point count (little-endian, 16 bytes)
+MAGIC = b"GPST"
+VERSION = 1
+HEADER = struct.Struct("<4sHHQ")
+# Record: int32 lat, int32 lon (microdegrees), int64 time (unix seconds)
+RECORD = struct.Struct("<iiq")
+BINARY_FLAG = "--binary"  # argument that switches a candidate to binary stdin/stdout
+
+
+def encode_header(count: int) -> bytes:
+    return HEADER.pack(MAGIC, VERSION, RECORD.size, count)
+
+
+def decode_header(data: bytes) -> int:
+    """Validate a header and return its point count"""
+    if len(data) < HEADER.size:
+        raise ValueError("Truncated binary trace header")
+    magic, version, record_size, count = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError(f"Not a binary trace (magic {magic!r})")
+    if version != VERSION or record_size != RECORD.size:
+        raise ValueError(f"Unsupported binary trace version {version} (record size {record_size})")
+    return count
+
+
+def encode_points(points: List[Dict]) -> bytes:
+    """Serialise points to an in-memory binary trace"""
+    body = b"".join(RECORD.pack(p["lat"], p["lon"], p["time"]) for p in points)
+    return encode_header(len(points)) + body
+
+
+def decode_points(data: bytes) -> List[Dict]:
+    """Parse an in-memory binary trace; raises ValueError on malformed input"""
+    count = decode_header(data)
+    expected = HEADER.size + count * RECORD.size
+    if len(data) != expected:
+        raise ValueError(f"Binary trace holds {len(data)} bytes, header announces {expected}")
+    return [{"lat": lat, "lon": lon, "time": timestamp}
+            for lat, lon, timestamp in RECORD.iter_unpack(data[HEADER.size:])]
+
+
+def is_binary_trace(path: str) -> bool:
+    with open(path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def iter_binary_points(stream: BinaryIO, chunk_records: int = 4096) -> Iterator[Dict]:
+    """Stream points from a binary trace file object"""
+    remaining = decode_header(stream.read(HEADER.size))
+    while remaining:
+        wanted = min(remaining, chunk_records)
+        chunk = stream.read(wanted * RECORD.size)
+        if len(chunk) != wanted * RECORD.size:
+            raise ValueError("Truncated binary trace")
+        for lat, lon, timestamp in RECORD.iter_unpack(chunk):
+            yield {"lat": lat, "lon": lon, "time": timestamp}
+        remaining -= wanted
+
+
+def write_binary_trace(path: str, points: Iterable[Dict]) -> int:
+    """Stream points into a binary trace file; the count is patched in at the end"""
+    count = 0
+    with open(path, "wb") as f:
+        f.write(encode_header(0))
+        for point in points:
+            f.write(RECORD.pack(point["lat"], point["lon"], point["time"]))
+            count += 1
+        f.seek(0)
+        f.write(encode_header(count))
+    return count
+
+
+def load_trace(path: str) -> List[Dict]:
+    """Load a trace file in either JSON or binary format"""
+    if is_binary_trace(path):
+        with open(path, "rb") as f:
+            return decode_points(f.read())
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def json_to_binary(json_path: str, binary_path: str) -> int:
+    with open(json_path, "r", encoding="utf-8") as f:
+        return write_binary_trace(binary_path, iter_json_points(f))
+
+
+def binary_to_json(binary_path: str, json_path: str) -> int:
+    """Write a binary trace back out as a JSON array, one point per line"""
+    count = 0
+    with open(binary_path, "rb") as src, open(json_path, "w", encoding="utf-8") as dst:
+        dst.write("[")
+        for point in iter_binary_points(src):
+            dst.write(",\n" if count else "\n")
+            dst.write(json.dumps(point))
+            count += 1
+        dst.write("\n]\n")
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert GPS traces between JSON and the binary record format")
+    parser.add_argument("direction", choices=["to-binary", "to-json"])
+    parser.add_argument("source")
+    parser.add_argument("destination")
+    args = parser.parse_args()
+
+    convert = json_to_binary if args.direction == "to-binary" else binary_to_json
+    count = convert(args.source, args.destination)
+    print(f"Converted {count} points to {args.destination}")
+
+
+if __name__ == "__main__":
+    main()
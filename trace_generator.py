@@ -0,0 +1,187 @@
+import json
+import math
+import random
+import argparse
+from itertools import zip_longest
+from typing import Dict, Iterator, Tuple, Iterable, Set
+
+from scoring import iter_json_points
+
+EARTH_RADIUS = 6371000  # Earth radius in meters
+MAX_SPEED = 50  # m/s, the detection threshold the candidates are scored against
+
+# (min speed, max speed) in m/s and the max change of speed per second
+SPEED_PROFILES = {
+    "walk": (0.8, 1.8, 0.2),
+    "city": (3.0, 14.0, 1.5),
+    "highway": (22.0, 36.0, 1.0),
+    "mixed": (2.0, 33.0, 1.2),
+}
+
+
+def labels_path(trace_path: str) -> str:
+    """Ground-truth label file written next to a trace"""
+    stem = trace_path[:-5] if trace_path.endswith(".json") else trace_path
+    return f"{stem}.labels.json"
+
+
+def generate_track(points: int, seed: int = 0, profile: str = "city",
+                   start_lat: float = 48.480512, start_lon: float = 32.271152,
+                   start_time: int = 1743465601, interval: float = 5.0, jitter: float = 1.0,
+                   gap_rate: float = 0.002, stationary_rate: float = 0.01,
+                   stationary_length: Tuple[int, int] = (5, 60), noise: float = 0.5,
+                   spike_rate: float = 0.01, spike_distance: Tuple[float, float] = (800.0, 5000.0)
+                   ) -> Iterator[Tuple[Dict, bool]]:
+    """Yield (point, is_spike) for a seeded synthetic track in microdegree format.
+
+    The vehicle follows a random-walk speed within the profile's range and a
+    slowly drifting heading, with occasional stationary segments (GPS noise
+    only, as in points2.json), jittered sampling intervals and rare long gaps.
+    Isolated spikes are displaced far enough to exceed MAX_SPEED on both sides;
+    the first and last points are never spiked.
+    """
+    rng = random.Random(seed)
+    min_speed, max_speed, max_accel = SPEED_PROFILES[profile]
+    lat, lon = start_lat, start_lon
+    timestamp = start_time
+    speed = rng.uniform(min_speed, max_speed)
+    heading = rng.uniform(0, 2 * math.pi)
+    stationary_left = 0
+    previous_spike = False
+
+    def draw_interval() -> int:
+        dt = max(1, int(round(interval + rng.uniform(-jitter, jitter))))
+        if rng.random() < gap_rate:
+            dt += rng.randint(30, 600)
+        return dt
+
+    # Intervals are drawn one step ahead so a spike can be sized against both neighbours
+    dt = 0
+    next_dt = draw_interval()
+    for index in range(points):
+        if index > 0:
+            dt, next_dt = next_dt, draw_interval()
+            timestamp += dt
+
+            if stationary_left == 0 and rng.random() < stationary_rate:
+                stationary_left = rng.randint(*stationary_length)
+
+            if stationary_left > 0:
+                stationary_left -= 1
+            else:
+                speed += rng.uniform(-max_accel, max_accel) * dt
+                speed = min(max(speed, min_speed), max_speed)
+                heading += rng.gauss(0, 0.05) * dt
+                distance = speed * dt
+                lat += math.degrees(distance * math.cos(heading) / EARTH_RADIUS)
+                lon += math.degrees(distance * math.sin(heading) /
+                                    (EARTH_RADIUS * math.cos(math.radians(lat))))
+
+        # Receiver noise in meters, applied to the reported fix only
+        fix_lat = lat + math.degrees(rng.gauss(0, noise) / EARTH_RADIUS)
+        fix_lon = lon + math.degrees(rng.gauss(0, noise) / (EARTH_RADIUS * math.cos(math.radians(lat))))
+
+        is_spike = (0 < index < points - 1 and not previous_spike and rng.random() < spike_rate)
+        if is_spike:
+            # Far enough that both adjacent intervals imply an impossible speed
+            distance = max(rng.uniform(*spike_distance), 2 * MAX_SPEED * max(dt, next_dt))
+            direction = rng.uniform(0, 2 * math.pi)
+            fix_lat += math.degrees(distance * math.cos(direction) / EARTH_RADIUS)
+            fix_lon += math.degrees(distance * math.sin(direction) /
+                                    (EARTH_RADIUS * math.cos(math.radians(lat))))
+        previous_spike = is_spike
+
+        yield {"lat": int(round(fix_lat * 1e6)), "lon": int(round(fix_lon * 1e6)), "time": timestamp}, is_spike
+
+
+def write_track(path: str, points: int, seed: int = 0, **options) -> Dict:
+    """Stream a generated track to path and its ground-truth labels next to it"""
+    count = 0
+    spikes = 0
+    with open(path, "w", encoding="utf-8") as trace, \
+            open(labels_path(path), "w", encoding="utf-8") as labels:
+        labels.write(json.dumps({"trace": path, "seed": seed, **options})[:-1])
+        labels.write(', "anomalies": [')
+        trace.write("[")
+        for index, (point, is_spike) in enumerate(generate_track(points, seed=seed, **options)):
+            trace.write(",\n" if index else "\n")
+            trace.write(json.dumps(point))
+            if is_spike:
+                labels.write(f", {index}" if spikes else str(index))
+                spikes += 1
+            count += 1
+        trace.write("\n]\n")
+        labels.write(f'], "points": {count}, "spikes": {spikes}}}\n')
+    return {"points": count, "spikes": spikes}
+
+
+def load_labels(path: str) -> Set[int]:
+    """Indices of injected spikes from a label file"""
+    with open(path, "r", encoding="utf-8") as f:
+        return set(json.load(f)["anomalies"])
+
+
+def detection_scores(anomalies: Set[int], changed: Iterable[int]) -> Dict:
+    """Precision and recall of the changed points against the injected spikes"""
+    changed = set(changed)
+    true_positives = len(changed & anomalies)
+    return {
+        "true_positives": true_positives,
+        "false_positives": len(changed - anomalies),
+        "false_negatives": len(anomalies - changed),
+        "precision": true_positives / len(changed) if changed else 1.0,
+        "recall": true_positives / len(anomalies) if anomalies else 1.0
+    }
+
+
+def score_correction(trace_path: str, corrected_path: str) -> Dict:
+    """Score a corrected trace against the labels generated with the original.
+
+    Both traces are streamed point by point, so only the changed indices are held in memory.
+    Raises ValueError if the traces differ in length.
+    """
+    def changed_indices(original: Iterable[Dict], corrected: Iterable[Dict]) -> Iterator[int]:
+        for i, (a, b) in enumerate(zip_longest(original, corrected)):
+            if a is None or b is None:
+                longer = corrected_path if a is None else trace_path
+                raise ValueError(f"{longer} holds more points than the other trace (first extra at index {i})")
+            if a["lat"] != b["lat"] or a["lon"] != b["lon"]:
+                yield i
+
+    with open(trace_path, "r", encoding="utf-8") as original, \
+            open(corrected_path, "r", encoding="utf-8") as corrected:
+        changed = changed_indices(iter_json_points(original), iter_json_points(corrected))
+        return detection_scores(load_labels(labels_path(trace_path)), changed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Synthetic GPS traces with labeled spike injection")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    generate = commands.add_parser("generate", help="Write a trace and its .labels.json")
+    generate.add_argument("output")
+    generate.add_argument("--points", type=int, default=10000)
+    generate.add_argument("--seed", type=int, default=0)
+    generate.add_argument("--profile", choices=sorted(SPEED_PROFILES), default="city")
+    generate.add_argument("--interval", type=float, default=5.0, help="Mean sampling interval in seconds")
+    generate.add_argument("--jitter", type=float, default=1.0, help="Max deviation from the interval")
+    generate.add_argument("--gap-rate", type=float, default=0.002)
+    generate.add_argument("--stationary-rate", type=float, default=0.01)
+    generate.add_argument("--spike-rate", type=float, default=0.01)
+
+    score = commands.add_parser("score", help="Precision/recall of a corrected trace")
+    score.add_argument("trace")
+    score.add_argument("corrected")
+
+    args = parser.parse_args()
+    if args.command == "generate":
+        stats = write_track(args.output, args.points, seed=args.seed, profile=args.profile,
+                            interval=args.interval, jitter=args.jitter, gap_rate=args.gap_rate,
+                            stationary_rate=args.stationary_rate, spike_rate=args.spike_rate)
+        print(f"Wrote {stats['points']} points ({stats['spikes']} spikes) to {args.output}")
+    else:
+        print(json.dumps(score_correction(args.trace, args.corrected), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+import os
+import json
+import time
+import asyncio
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+
+class _NullSpan:
+    """Shared no-op span handed out while tracing is disabled"""
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, key: str, value):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def _track_id() -> int:
+    """Trace tid of the caller: its asyncio task if it runs in one, else its thread.
+
+    Tasks on one event loop interleave without nesting, so each gets its own
+    track; on a shared one their spans would appear to overlap.
+    """
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+    return id(task) if task is not None else threading.get_ident()
+
+
+class Span:
+    """One timed region; attributes can be added until it ends"""
+
+    __slots__ = ("tracer", "name", "args", "start")
+
+    def __init__(self, tracer: "Tracer", name: str, args: Dict):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+        self.start = 0
+
+    def __enter__(self) -> "Span":
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter_ns()
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.tracer.record(self.name, self.start, end, self.args)
+        return False
+
+    def set(self, key: str, value):
+        self.args[key] = value
+
+
+class Tracer:
+    """Collects spans as Chrome trace "complete" events.
+
+    Every process buffers its own events and flush() appends them to a
+    per-process file in directory, so spans recorded in scheduler worker
+    processes are merged by export(). Timestamps come from the monotonic
+    perf_counter clock, which is shared across processes. With directory
+    None, span() returns a shared no-op object and records nothing.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory
+        self._events: List[Dict] = []
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.directory is not None
+
+    def span(self, name: str, **args):
+        if self.directory is None:
+            return _NULL_SPAN
+        return Span(self, name, args)
+
+    def record(self, name: str, start_ns: int, end_ns: int, args: Dict):
+        event = {"name": name, "ph": "X", "ts": start_ns / 1000, "dur": (end_ns - start_ns) / 1000,
+                 "pid": os.getpid(), "tid": _track_id(), "args": args}
+        with self._lock:
+            self._events.append(event)
+
+    def flush(self):
+        """Append this process's buffered events to its file in the trace directory"""
+        if self.directory is None:
+            return
+        with self._lock:
+            events, self._events = self._events, []
+        if not events:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, f"events_{os.getpid()}.jsonl"), "a", encoding="utf-8") as f:
+            f.writelines(json.dumps(event, default=str) + "\n" for event in events)
+
+    def events(self) -> List[Dict]:
+        """Every flushed event from all processes, including this one's buffer"""
+        self.flush()
+        if self.directory is None or not os.path.isdir(self.directory):
+            return []
+        events = []
+        for name in sorted(os.listdir(self.directory)):
+            if name.startswith("events_") and name.endswith(".jsonl"):
+                with open(os.path.join(self.directory, name), "r", encoding="utf-8") as f:
+                    events.extend(json.loads(line) for line in f if line.strip())
+        return events
+
+    def export(self, path: str) -> List[Dict]:
+        """Write all events as a Chrome trace-event file (chrome://tracing, Perfetto) and return them"""
+        events = self.events()
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        return events
+
+
+def summarize(events: List[Dict]) -> List[Dict]:
+    """Per-span-name totals in seconds, slowest total first.
+
+    Self time excludes nested spans on the same track (thread or asyncio
+    task), so the self column adds up to the traced wall time without double
+    counting.
+    """
+    self_time: Dict[int, float] = {}
+    by_thread = defaultdict(list)
+    for index, event in enumerate(events):
+        by_thread[(event["pid"], event["tid"])].append(index)
+        self_time[index] = event["dur"]
+    for indices in by_thread.values():
+        indices.sort(key=lambda i: (events[i]["ts"], -events[i]["dur"]))
+        stack: List[int] = []
+        for index in indices:
+            event = events[index]
+            while stack and events[stack[-1]]["ts"] + events[stack[-1]]["dur"] < event["ts"] + event["dur"]:
+                stack.pop()
+            if stack:
+                self_time[stack[-1]] -= event["dur"]
+            stack.append(index)
+
+    rows: Dict[str, Dict] = {}
+    for index, event in enumerate(events):
+        row = rows.setdefault(event["name"], {"span": event["name"], "count": 0, "total": 0.0,
+                                              "self": 0.0, "max": 0.0})
+        row["count"] += 1
+        row["total"] += event["dur"] / 1e6
+        row["self"] += max(self_time[index], 0.0) / 1e6
+        row["max"] = max(row["max"], event["dur"] / 1e6)
+    for row in rows.values():
+        row["mean"] = row["total"] / row["count"]
+    return sorted(rows.values(), key=lambda row: row["total"], reverse=True)
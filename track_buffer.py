@@ -0,0 +1,211 @@
+import json
+from decimal import Decimal
+from typing import Dict, Iterable, Iterator, List, Union
+
+import numpy as np
+
+from scoring import changed_mask
+from trace_format import HEADER, RECORD, decode_header, encode_header, is_binary_trace
+
+# One binary trace record; binary traces are viewed through it without copying
+RECORD_DTYPE = np.dtype([("lat", "<i4"), ("lon", "<i4"), ("time", "<i8")])
+JSON_CHUNK_BYTES = 1 << 20  # JSON text parsed per json.loads call
+WHITESPACE = b" \t\r\n"
+
+
+def _integral_float(text: str) -> int:
+    """A number written with a fraction or exponent, e.g. 48480512.0, accepted when its value is an integer"""
+    value = Decimal(text)
+    if value != value.to_integral_value():
+        raise ValueError(f"Non-integer value {text}")
+    if value.adjusted() > 18:
+        # Checked before int() so a huge exponent cannot build a huge integer
+        raise OverflowError(f"Value {text} outside the int64 range")
+    return int(value)
+
+
+def _reject_constant(text: str):
+    raise ValueError(f"Non-numeric value {text}")
+
+
+class TrackBuffer:
+    """Columnar GPS track: int32 lat/lon microdegrees and int64 time seconds.
+
+    16 bytes per point, against several hundred for a list of point dicts.
+    Slices are views sharing the parent's arrays, and a buffer loaded from a
+    binary trace views the file's bytes directly (read-only). Indexing a
+    single point or iterating yields plain {"lat", "lon", "time"} dicts.
+    """
+
+    __slots__ = ("lat", "lon", "time")
+
+    def __init__(self, lat, lon, time):
+        self.lat = np.asarray(lat, dtype=np.int32)
+        self.lon = np.asarray(lon, dtype=np.int32)
+        self.time = np.asarray(time, dtype=np.int64)
+        if not len(self.lat) == len(self.lon) == len(self.time):
+            raise ValueError("lat, lon and time columns differ in length")
+
+    @classmethod
+    def from_points(cls, points: Iterable[Dict]) -> "TrackBuffer":
+        points = points if isinstance(points, list) else list(points)
+        return cls(*_point_columns(points))
+
+    @classmethod
+    def from_binary(cls, data: bytes) -> "TrackBuffer":
+        """View an in-memory binary trace; raises ValueError on malformed input"""
+        count = decode_header(data)
+        expected = HEADER.size + count * RECORD.size
+        if len(data) != expected:
+            raise ValueError(f"Binary trace holds {len(data)} bytes, header announces {expected}")
+        records = np.frombuffer(data, dtype=RECORD_DTYPE, count=count, offset=HEADER.size)
+        return cls(records["lat"], records["lon"], records["time"])
+
+    @classmethod
+    def from_json_bytes(cls, data: Union[bytes, str], chunk_bytes: int = JSON_CHUNK_BYTES) -> "TrackBuffer":
+        """Parse a JSON array of flat point objects; raises ValueError on malformed input.
+
+        The array is decoded a chunk of whole objects at a time straight into
+        preallocated columns, so no list of dicts for the full track is ever
+        built. Values must be integral: 48480512.0 and 4.8480512e7 are read as
+        48480512, while fractions, NaN and Infinity are rejected, as a trace
+        holds whole microdegrees and seconds. Points may carry extra keys,
+        nested values included.
+        """
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        # Bounds of the array; data.strip() would copy the whole document
+        start, end = 0, len(data)
+        while start < end and data[start] in WHITESPACE:
+            start += 1
+        while end > start and data[end - 1] in WHITESPACE:
+            end -= 1
+        if end - start < 2 or data[start] != ord("[") or data[end - 1] != ord("]"):
+            raise ValueError("Not a JSON array")
+        capacity = data.count(b"{", start, end)  # one per point unless strings or nested values hold braces
+        lat = np.empty(capacity, dtype=np.int32)
+        lon = np.empty(capacity, dtype=np.int32)
+        times = np.empty(capacity, dtype=np.int64)
+
+        pos, end, filled = start + 1, end - 1, 0
+        while True:
+            cut = data.rfind(b"}", pos, min(pos + chunk_bytes, end))
+            if cut < 0:
+                cut = data.find(b"}", pos, end)
+            if cut < 0:
+                break
+            points = None
+            while points is None:
+                chunk = data[pos:cut + 1].lstrip()
+                # Every chunk after the first continues the array after a separating comma
+                if filled:
+                    if not chunk.startswith(b","):
+                        raise ValueError(f"Expected ',' between points near offset {pos}")
+                    chunk = chunk[1:]
+                try:
+                    points = json.loads(b"[" + chunk + b"]", parse_float=_integral_float,
+                                        parse_constant=_reject_constant)
+                except json.JSONDecodeError as e:
+                    # A cut at a brace inside a nested value or a string leaves the last point unclosed:
+                    # retry up to the next brace. An error before the end of the chunk is in the data.
+                    if not (e.msg.startswith("Unterminated string") or e.pos >= len(e.doc) - 1):
+                        raise ValueError(f"Invalid JSON near offset {pos}: {e}")
+                    cut = data.find(b"}", cut + 1, end)
+                    if cut < 0:
+                        raise ValueError(f"Unterminated point near offset {pos}: {e}")
+            try:
+                count = len(points)
+                lat[filled:filled + count], lon[filled:filled + count], times[filled:filled + count] = \
+                    _point_columns(points)
+            except (KeyError, TypeError, OverflowError) as e:
+                raise ValueError(f"Invalid point near offset {pos}: {e!r}")
+            filled += count
+            pos = cut + 1
+        if data[pos:end].strip():
+            raise ValueError(f"Unexpected data near offset {pos}")
+        return cls(lat[:filled], lon[:filled], times[:filled])
+
+    @classmethod
+    def load(cls, path: str) -> "TrackBuffer":
+        """Load a trace file in either JSON or binary format"""
+        with open(path, "rb") as f:
+            data = f.read()
+        return cls.from_binary(data) if is_binary_trace(path) else cls.from_json_bytes(data)
+
+    def __len__(self) -> int:
+        return len(self.lat)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return TrackBuffer(self.lat[index], self.lon[index], self.time[index])
+        return {"lat": int(self.lat[index]), "lon": int(self.lon[index]), "time": int(self.time[index])}
+
+    def __iter__(self) -> Iterator[Dict]:
+        for lat, lon, timestamp in zip(self.lat.tolist(), self.lon.tolist(), self.time.tolist()):
+            yield {"lat": lat, "lon": lon, "time": timestamp}
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, TrackBuffer):
+            return NotImplemented
+        return (len(self) == len(other) and np.array_equal(self.lat, other.lat) and
+                np.array_equal(self.lon, other.lon) and np.array_equal(self.time, other.time))
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"TrackBuffer({len(self)} points)"
+
+    @property
+    def nbytes(self) -> int:
+        return self.lat.nbytes + self.lon.nbytes + self.time.nbytes
+
+    def _check_aligned(self, other: "TrackBuffer"):
+        if len(self) != len(other):
+            raise ValueError(f"Tracks differ in length ({len(self)} and {len(other)} points)")
+
+    def changed_mask(self, other: "TrackBuffer") -> np.ndarray:
+        """Boolean mask of points whose coordinates differ from other's"""
+        self._check_aligned(other)
+        return changed_mask(self.lat, self.lon, other.lat, other.lon)
+
+    def time_mismatch_mask(self, other: "TrackBuffer") -> np.ndarray:
+        self._check_aligned(other)
+        return self.time != other.time
+
+    def to_points(self) -> List[Dict]:
+        return list(self)
+
+    def to_binary(self) -> bytes:
+        records = np.empty(len(self), dtype=RECORD_DTYPE)
+        records["lat"], records["lon"], records["time"] = self.lat, self.lon, self.time
+        return encode_header(len(self)) + records.tobytes()
+
+    def _json_lines(self) -> str:
+        return ",\n".join(f'{{"lat": {lat}, "lon": {lon}, "time": {timestamp}}}' for lat, lon, timestamp in
+                           zip(self.lat.tolist(), self.lon.tolist(), self.time.tolist()))
+
+    def to_json_bytes(self) -> bytes:
+        """JSON array with one point per line, as trace_format.binary_to_json writes it"""
+        return f"[\n{self._json_lines()}\n]\n".encode("utf-8") if len(self) else b"[\n]\n"
+
+    def save_json(self, path: str, chunk_points: int = 65536):
+        """Write to_json_bytes() to path a chunk of points at a time"""
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("[")
+            for start in range(0, len(self), chunk_points):
+                f.write(",\n" if start else "\n")
+                f.write(self[start:start + chunk_points]._json_lines())
+            f.write("\n]\n")
+
+
+def _point_columns(points: List[Dict]):
+    """lat, lon and time arrays of a list of point dicts; raises OverflowError outside int32/int64"""
+    count = len(points)
+    lat = np.fromiter((p["lat"] for p in points), dtype=np.int64, count=count)
+    lon = np.fromiter((p["lon"] for p in points), dtype=np.int64, count=count)
+    times = np.fromiter((p["time"] for p in points), dtype=np.int64, count=count)
+    limits = np.iinfo(np.int32)
+    for column in (lat, lon):
+        if count and (column.min() < limits.min or column.max() > limits.max):
+            raise OverflowError("Coordinate outside the int32 microdegree range")
+    return lat.astype(np.int32), lon.astype(np.int32), times
@@ -0,0 +1,229 @@
+import queue
+import struct
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from process_metrics import limit_error, limit_process, process_snapshot, reset_peak_rss, run_measured, snapshot_delta
+
+SERVE_FLAG = "--serve"  # argument that starts a candidate as a persistent worker
+FRAME_HEADER = struct.Struct("<I")  # little-endian payload length
+PROBE_REQUEST = b"[]"  # an empty trace: every worker must answer it with an empty trace
+PROBE_TIMEOUT = 2.0
+
+_probe_results: Dict[tuple, bool] = {}
+_probe_lock = threading.Lock()
+
+
+class WorkerError(Exception):
+    """A persistent worker crashed, timed out or rejected a trace"""
+
+
+class TraceRejected(WorkerError):
+    """The worker answered with an empty frame: this trace failed, the worker is still usable"""
+
+
+class LimitExceeded(TraceRejected):
+    """The trace used more CPU or memory than the pool allows"""
+
+
+def encode_frame(payload: bytes) -> bytes:
+    return FRAME_HEADER.pack(len(payload)) + payload
+
+
+class FramedWorker:
+    """One long-lived candidate process speaking the length-prefixed protocol.
+
+    Each request is a frame holding one whole trace in the candidate's I/O
+    format; the worker answers with one frame holding the corrected trace, or
+    an empty frame if it could not process that trace. The worker exits on EOF.
+    """
+
+    def __init__(self, command: Sequence[str], memory_limit: Optional[int] = None):
+        self.command = list(command) + [SERVE_FLAG]
+        self.process = subprocess.Popen(self.command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                         stderr=subprocess.DEVNULL)
+        # RLIMIT_CPU would accumulate over every trace served, so CPU is checked per request instead
+        limit_process(self.process.pid, memory_limit, None)
+        self._responses: "queue.Queue[Optional[bytes]]" = queue.Queue()
+        # Pipes cannot be read with a timeout portably, so a thread turns frames into queue items
+        self._reader = threading.Thread(target=self._read_frames, daemon=True)
+        self._reader.start()
+
+    def _read_exact(self, size: int) -> Optional[bytes]:
+        data = b""
+        while len(data) < size:
+            chunk = self.process.stdout.read(size - len(data))
+            if not chunk:
+                return None
+            data += chunk
+        return data
+
+    def _read_frames(self):
+        while True:
+            header = self._read_exact(FRAME_HEADER.size)
+            if header is None:
+                break
+            payload = self._read_exact(FRAME_HEADER.unpack(header)[0])
+            if payload is None:
+                break
+            self._responses.put(payload)
+        self._responses.put(None)
+
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+    def request(self, payload: bytes, timeout: float) -> bytes:
+        try:
+            self.process.stdin.write(encode_frame(payload))
+            self.process.stdin.flush()
+        except (BrokenPipeError, OSError) as e:
+            raise WorkerError(f"Worker stdin closed: {e}")
+        try:
+            response = self._responses.get(timeout=timeout)
+        except queue.Empty:
+            raise WorkerError(f"Worker did not answer within {timeout}s")
+        if response is None:
+            raise WorkerError(f"Worker exited with code {self.process.wait()}")
+        if not response:
+            raise TraceRejected("Worker rejected the trace")
+        return response
+
+    def close(self):
+        if self.alive():
+            try:
+                self.process.stdin.close()
+                self.process.wait(timeout=1)
+            except (OSError, subprocess.TimeoutExpired):
+                self.process.kill()
+                self.process.wait()
+
+
+def supports_persistent(command: Sequence[str], probe: bytes = PROBE_REQUEST,
+                        timeout: float = PROBE_TIMEOUT) -> bool:
+    """Whether a candidate answers the framing protocol; results are remembered per command"""
+    key = tuple(command)
+    with _probe_lock:
+        if key in _probe_results:
+            return _probe_results[key]
+
+    # A one-shot binary keeps reading until EOF, so it never answers the probe frame
+    worker = FramedWorker(command)
+    try:
+        supported = worker.request(probe, timeout).strip() == probe.strip()
+    except WorkerError:
+        supported = False
+    finally:
+        if supported:
+            worker.close()
+        else:
+            worker.process.kill()
+            worker.process.wait()
+
+    with _probe_lock:
+        _probe_results[key] = supported
+    return supported
+
+
+class WorkerPool:
+    """Pool of persistent candidate workers, falling back to one process per trace.
+
+    Crashed or stuck workers are replaced before the next request; the trace
+    that hit the failure raises WorkerError.
+    """
+
+    def __init__(self, command: Sequence[str], size: int, timeout: float = 15,
+                 probe: bytes = PROBE_REQUEST, persistent: Optional[bool] = None,
+                 memory_limit: Optional[int] = None, cpu_limit: Optional[float] = None,
+                 runner: Optional[str] = None):
+        self.command = list(command)
+        self.size = max(1, size)
+        self.timeout = timeout
+        self.memory_limit = memory_limit
+        self.cpu_limit = cpu_limit
+        self.runner = runner  # measure_run launcher for one-shot runs, see process_metrics.run_measured
+        # A caller that already probed this binary (e.g. in another process) can pass the answer
+        self.persistent = supports_persistent(self.command, probe) if persistent is None else persistent
+        self._idle: "queue.Queue[FramedWorker]" = queue.Queue()
+        self._workers: List[FramedWorker] = []
+        self._lock = threading.Lock()
+        self.restarts = 0
+        if self.persistent:
+            for _ in range(self.size):
+                self._spawn()
+
+    def _spawn(self):
+        worker = FramedWorker(self.command, self.memory_limit)
+        with self._lock:
+            self._workers.append(worker)
+        self._idle.put(worker)
+
+    def _retire(self, worker: FramedWorker):
+        if worker.alive():
+            worker.process.kill()
+        worker.process.wait()
+        with self._lock:
+            self._workers.remove(worker)
+            self.restarts += 1
+
+    def process(self, payload: bytes) -> bytes:
+        """Correct one trace payload and return the candidate's output"""
+        return self.process_measured(payload)[0]
+
+    def process_measured(self, payload: bytes) -> Tuple[bytes, Optional[Dict]]:
+        """Correct one trace payload; also returns its resource usage (see process_metrics)"""
+        if not self.persistent:
+            returncode, stdout, stderr, usage = run_measured(self.command, payload, self.timeout,
+                                                             self.memory_limit, self.cpu_limit, runner=self.runner)
+            exceeded = limit_error(returncode, stderr, usage, self.memory_limit, self.cpu_limit)
+            if exceeded:
+                raise LimitExceeded(exceeded)
+            if returncode != 0:
+                raise WorkerError(f"Exit code {returncode}: {stderr.decode('utf-8', errors='replace')[:200]}")
+            return stdout, usage
+
+        worker = self._idle.get()
+        try:
+            reset_peak_rss(worker.process.pid)
+            before = process_snapshot(worker.process.pid)
+            response = worker.request(payload, self.timeout)
+            usage = snapshot_delta(before, process_snapshot(worker.process.pid), len(payload), len(response))
+            exceeded = limit_error(0, b"", usage, self.memory_limit, self.cpu_limit)
+            if exceeded:
+                raise LimitExceeded(exceeded)
+        except TraceRejected:
+            self._idle.put(worker)
+            raise
+        except WorkerError:
+            # Crashed, or timed out and could still answer later out of sequence: replace it
+            self._retire(worker)
+            self._spawn()
+            raise
+        self._idle.put(worker)
+        return response, usage
+
+    def map(self, payloads: Sequence[bytes]) -> List[object]:
+        """Process payloads concurrently; each entry is the output bytes or the WorkerError raised"""
+        def run(payload: bytes):
+            try:
+                return self.process(payload)
+            except WorkerError as e:
+                return e
+            except subprocess.TimeoutExpired as e:
+                return WorkerError(str(e))
+
+        with ThreadPoolExecutor(max_workers=self.size) as executor:
+            return list(executor.map(run, payloads))
+
+    def close(self):
+        with self._lock:
+            workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.close()
+
+    def __enter__(self) -> "WorkerPool":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()